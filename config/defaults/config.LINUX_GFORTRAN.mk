@@ -5,7 +5,10 @@ RM       = /bin/rm -rf
 
 # Fortran compiler and flags
 FF90        = gfortran
-FF90_FLAGS  = -fdefault-real-8 -O2 -fPIC
+# Uncomment to compile the evaluation and projection routines with
+# OpenMP. The number of threads can be set with pySpline.setNumThreads
+# OMP_FLAGS = -fopenmp
+FF90_FLAGS  = -fdefault-real-8 -O2 -fPIC $(OMP_FLAGS)
 
 # C compiler and flags
 CC       = gcc
@@ -5,7 +5,10 @@ RM       = /bin/rm -rf
 
 # Fortran compiler and flags
 FF90        = ifort
-FF90_FLAGS  = -r8 -O2 -fPIC
+# Uncomment to compile the evaluation and projection routines with
+# OpenMP. The number of threads can be set with pySpline.setNumThreads
+# OMP_FLAGS = -qopenmp
+FF90_FLAGS  = -r8 -O2 -fPIC $(OMP_FLAGS)
 
 # C compiler and flags
 CC       = gcc
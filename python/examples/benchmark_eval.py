@@ -0,0 +1,50 @@
+from __future__ import print_function
+# This script times point evaluation of surfaces and volumes with the
+# kernels used by getValue(), which are order specialized for k=2 and
+# k=4, and with the generic kernels on the same data. Quadratic splines
+# only have the generic kernel and are included for reference.
+import time
+import numpy
+from pyspline import pySpline
+
+def knots(k, nCtl):
+    t = numpy.zeros(nCtl + k)
+    t[nCtl:] = 1.0
+    t[k-1:nCtl+1] = numpy.linspace(0, 1, nCtl - k + 2)
+    return t
+
+def timeIt(func, nRepeat=5):
+    times = []
+    for i in range(nRepeat):
+        timeA = time.time()
+        func()
+        times.append(time.time() - timeA)
+    return min(times)
+
+numpy.random.seed(0)
+nCtl = 10
+N = 1000000
+u, v, w = numpy.random.random((3, N))
+
+print('%-10s %6s %14s %14s %9s' % ('Object', 'Order', 'getValue (s)',
+                                   'Generic (s)', 'Speedup'))
+for k in [2, 3, 4]:
+    surf = pySpline.Surface(ku=k, kv=k, tu=knots(k, nCtl), tv=knots(k, nCtl),
+                            coef=numpy.random.random((nCtl, nCtl, 3)))
+    dt = timeIt(lambda: surf.getValue(u, v))
+    dtGeneric = timeIt(lambda: pySpline.libspline.eval_surface_generic(
+        u.reshape((-1, 1)), v.reshape((-1, 1)), surf.tu, surf.tv, k, k,
+        surf.coef.T))
+    print('%-10s %6d %14.4f %14.4f %9.2f' % ('Surface', k, dt, dtGeneric,
+                                             dtGeneric/dt))
+
+for k in [2, 3, 4]:
+    t = knots(k, nCtl)
+    vol = pySpline.Volume(ku=k, kv=k, kw=k, tu=t, tv=t, tw=t,
+                          coef=numpy.random.random((nCtl, nCtl, nCtl, 3)))
+    dt = timeIt(lambda: vol.getValue(u, v, w))
+    dtGeneric = timeIt(lambda: pySpline.libspline.eval_volume_generic(
+        u.reshape((-1, 1, 1)), v.reshape((-1, 1, 1)), w.reshape((-1, 1, 1)),
+        vol.tu, vol.tv, vol.tw, k, k, k, vol.coef.T))
+    print('%-10s %6d %14.4f %14.4f %9.2f' % ('Volume', k, dt, dtGeneric,
+                                             dtGeneric/dt))
@@ -11,10 +11,14 @@ from __future__ import division
 # ===========================================================================
 # External Python modules
 # ===========================================================================
+import time
 import warnings
 import numpy
 from scipy import sparse
 from scipy.sparse import linalg
+from scipy.linalg import lapack, cholesky_banded, cho_solve_banded, \
+    LinAlgError
+from scipy.spatial import cKDTree
 
 # ===========================================================================
 # Custom Python modules
@@ -39,7 +43,7 @@ class Error(Exception):
                 i += len(word)+1
         msg += ' '*(78-i) + '|\n' + '+'+'-'*78+'+'+'\n'
         print(msg)
-        Exception.__init__()
+        Exception.__init__(self, message)
 
 def writeTecplot1D(handle, name, data):
     """A Generic function to write a 1D data zone to a tecplot file.
@@ -172,6 +176,649 @@ def _assembleMatrix(data, indices, indptr, shape):
     return M
 
 
+def _curveJacobian(s, t, k, nCtl):
+    """
+    Assemble the basis function matrix of a 1D b-spline at the
+    parametric positions s.
+
+    Parameters
+    ----------
+    s : array
+        Parametric positions. Flattened if not 1D.
+    t : array
+        Knot vector
+    k : int
+        Order of the spline
+    nCtl : int
+        Number of control points
+
+    Returns
+    -------
+    N : scipy csr sparse matrix of size (s.size, nCtl)
+        The basis function matrix
+    """
+    s = numpy.array(s, 'd').flatten()
+    n = s.size
+    vals = numpy.zeros(n*k)
+    rowPtr = numpy.zeros(n+1, 'intc')
+    colInd = numpy.zeros(n*k, 'intc')
+    libspline.curve_jacobian_wrap(s, [], t, k, nCtl, vals, rowPtr, colInd)
+
+    return _assembleMatrix(vals, colInd, rowPtr, (n, nCtl))
+
+
+def _uniformKnots(nCtl, k):
+    """
+    Uniform open knot vector on [0, 1] for nCtl control points of
+    order k
+    """
+    t = numpy.zeros(nCtl + k)
+    t[nCtl:] = 1.0
+    t[k-1:nCtl+1] = numpy.linspace(0, 1, nCtl - k + 2)
+
+    return t
+
+def _smoothingPenalty(nCtl):
+    """
+    Sparse matrix D^T D where D takes the second differences of the
+    control points along each parametric direction. nCtl is a list of
+    the number of control points in each direction, and the control
+    points are in C order.
+    """
+    nTotal = numpy.prod(nCtl)
+    P = sparse.csr_matrix((nTotal, nTotal))
+    for i, n in enumerate(nCtl):
+        if n < 3:
+            continue
+        D = sparse.diags([1.0, -2.0, 1.0], [0, 1, 2], shape=(n-2, n))
+        DTD = D.transpose()*D
+        P = P + sparse.kron(sparse.kron(
+            sparse.identity(int(numpy.prod(nCtl[:i]))), DTD),
+            sparse.identity(int(numpy.prod(nCtl[i+1:])))).tocsr()
+
+    return P
+
+def _factorize(A, symmetric=False):
+    """
+    Factorize a sparse matrix and return a function that solves with
+    it, like scipy's factorized(). Banded matrices such as the 1D
+    b-spline collocation and normal equation matrices are factorized
+    with the LAPACK banded routines, which are O(n*k^2) in time and
+    only store the band. Symmetric matrices try a banded Cholesky
+    factorization first. Anything else goes through SuperLU.
+
+    Parameters
+    ----------
+    A : scipy sparse matrix
+        Square matrix to factorize
+    symmetric : bool
+        Set to True if A is known to be symmetric, e.g. N^T W N
+
+    Returns
+    -------
+    solve : function
+        solve(rhs, trans=False) returns the solution for a rhs of size
+        (n) or (n, nRhs). With trans=True the system with A^T is
+        solved instead, using the same factorization.
+    """
+    A = sparse.coo_matrix(A.tocsr())
+    n = A.shape[0]
+    if A.shape[1] != n or A.nnz == 0 or A.dtype != numpy.dtype('d'):
+        return _superLU(A)
+
+    lower = max(0, numpy.max(A.row - A.col))
+    upper = max(0, numpy.max(A.col - A.row))
+    if lower + upper + 1 > n//2:
+        return _superLU(A)
+
+    if symmetric and lower == upper:
+        upperPart = A.row <= A.col
+        ab = numpy.zeros((upper+1, n))
+        ab[upper + A.row[upperPart] - A.col[upperPart],
+           A.col[upperPart]] = A.data[upperPart]
+        try:
+            c = cholesky_banded(ab)
+        except LinAlgError:
+            pass
+        else:
+            return lambda rhs, trans=False: cho_solve_banded((c, False),
+                                                              rhs)
+
+    ab = numpy.zeros((2*lower+upper+1, n))
+    ab[lower + upper + A.row - A.col, A.col] = A.data
+    lu, piv, info = lapack.dgbtrf(ab, lower, upper)
+    if info != 0:
+        raise Error("Banded LU factorization failed with info = %d. The "
+                    "fit matrix is singular; check for repeated parameters "
+                    "or too many control points." % info)
+
+    def solve(rhs, trans=False):
+        x, info = lapack.dgbtrs(lu, lower, upper, rhs, piv,
+                                trans=int(trans))
+        if info != 0:
+            raise Error("Banded solve failed with info = %d." % info)
+        return x
+
+    return solve
+
+def _superLU(A):
+    """SuperLU factorization of A with the same solve interface as
+    _factorize()"""
+    try:
+        lu = linalg.splu(sparse.csc_matrix(A))
+    except RuntimeError as e:
+        raise Error("Sparse LU factorization failed: %s" % str(e))
+
+    return lambda rhs, trans=False: lu.solve(rhs, 'T' if trans else 'N')
+
+
+def _tensorGrid(*params):
+    """
+    Determine if the parametric coordinate arrays U, V (and W) of a
+    surface or volume form a tensor product grid, i.e. U only varies
+    along the first axis, V only along the second and so on.
+
+    Parameters
+    ----------
+    params : arrays
+        The parametric coordinate arrays. All must have the same
+        shape with one axis per array.
+
+    Returns
+    -------
+    vecs : list of 1D arrays or None
+        The 1D parameter vectors for each direction, or None if the
+        parameters are not a tensor product grid.
+    """
+    nd = len(params)
+    vecs = []
+    for d, P in enumerate(params):
+        index = [0]*nd
+        index[d] = slice(None)
+        p = P[tuple(index)]
+        shape = [1]*nd
+        shape[d] = -1
+        if not numpy.array_equal(P, numpy.broadcast_to(p.reshape(shape),
+                                                       P.shape)):
+            return None
+        vecs.append(p)
+
+    return vecs
+
+
+class _LinearFit(object):
+    """
+    The linear map from the data to the coefficients of a fit,
+    coef = (A^-1 (B X + c))[:nCtl]. A is kept factorized, so fitting
+    new data with the same parameters, or applying the transpose of
+    the map, only needs a back substitution.
+
+    Parameters
+    ----------
+    solve : function
+        Solve function for A, as returned by _factorize()
+    B : scipy sparse matrix
+        Maps the data, flattened to size (nPts, nDim), to the rhs
+    nCtl : int
+        Number of coefficients. Any further unknowns of A, such as
+        Lagrange multipliers, are dropped.
+    c : array
+        Optional constant part of the rhs, size (B.shape[0], nDim)
+    """
+    def __init__(self, solve, B, nCtl, c=None):
+        self._solve = solve
+        self.B = sparse.csr_matrix(B)
+        self.nCtl = nCtl
+        self.c = c
+
+    def solve(self, X):
+        """Return the coefficients, size (nCtl, nDim), for data X"""
+        X = numpy.asarray(X, 'd')
+        rhs = self.B*X.reshape((self.B.shape[1], -1))
+        if self.c is not None:
+            rhs = rhs + self.c
+
+        return self._solve(rhs)[:self.nCtl]
+
+    def solveT(self, coefBar):
+        """Apply the transpose of the map to coefBar, size (nCtl, nDim)"""
+        coefBar = numpy.asarray(coefBar, 'd').reshape((self.nCtl, -1))
+        rhs = numpy.zeros((self.B.shape[0], coefBar.shape[1]))
+        rhs[:self.nCtl] = coefBar
+
+        return self.B.transpose()*self._solve(rhs, trans=True)
+
+class _SeparableFit(object):
+    """
+    The fit of a tensor product spline to gridded data. Since the full
+    basis matrix is the Kronecker product of the 1D basis matrices,
+    the fit is done one direction at a time with only the small 1D
+    systems ever factorized. The interface is the same as _LinearFit,
+    but with the data and coefficients in their gridded shapes.
+
+    Parameters
+    ----------
+    Ns : list of scipy sparse matrices
+        The 1D basis matrices, one per parametric direction
+    interp : bool
+        True for interpolation (square Ns), False for a least squares
+        fit
+    """
+    def __init__(self, Ns, interp):
+        self.Bs = []
+        self.solves = []
+        for N in Ns:
+            if interp:
+                self.Bs.append(sparse.identity(N.shape[0], format='csr'))
+                self.solves.append(_factorize(N))
+            else:
+                self.Bs.append(N.transpose().tocsr())
+                self.solves.append(_factorize(N.transpose()*N,
+                                              symmetric=True))
+
+    def solve(self, X):
+        """Return the coefficients, size (nCtl1, ..., nCtld, nDim), for
+        the data X, size (N1, ..., Nd, nDim)"""
+        coef = numpy.array(X, 'd')
+        for axis in range(len(self.Bs)):
+            coef = _applyAxis(coef, axis, lambda rhs: self.solves[axis](
+                self.Bs[axis]*rhs))
+
+        return coef
+
+    def solveT(self, coefBar):
+        """Apply the transpose of the map to coefBar"""
+        XBar = numpy.array(coefBar, 'd')
+        for axis in range(len(self.Bs)):
+            XBar = _applyAxis(XBar, axis, lambda rhs: self.Bs[
+                axis].transpose()*self.solves[axis](rhs, trans=True))
+
+        return XBar
+
+def _fitState(knots, coef):
+    """The knots and coefficient shape a fit operator was built for"""
+    return coef.shape, [numpy.array(t) for t in knots]
+
+def _checkFitState(state, knots, coef):
+    """Raise an Error if the knots or number of control points have
+    changed since the fit operator was built"""
+    shape, fitKnots = state
+    if coef.shape != shape or not all(
+            numpy.array_equal(a, b) for a, b in zip(fitKnots, knots)):
+        raise Error("The knots or number of control points have changed "
+                    "since the last fit. Call recompute() before refit().")
+
+def _applyAxis(X, axis, func):
+    """Apply the linear function func to every 1D slice of X along
+    the given axis"""
+    rhs = numpy.moveaxis(X, axis, 0)
+    shape = rhs.shape
+    rhs = numpy.ascontiguousarray(rhs.reshape((shape[0], -1)))
+    sol = func(rhs)
+
+    return numpy.moveaxis(sol.reshape((sol.shape[0],) + shape[1:]), 0, axis)
+
+
+def _refineKnots(t, k, s, err, tol):
+    """
+    Find where to insert knots to reduce the error of a fit. Each knot
+    span containing a point with an error larger than tol is split
+    halfway between the two middle parameters of its points, so both
+    new spans still have data. Points on the left knot of a span are
+    counted in that span. The new knots are returned in order of
+    decreasing error.
+
+    Parameters
+    ----------
+    t : array
+        Knot vector
+    k : int
+        Spline order
+    s : array
+        Parameters of the data points
+    err : array
+        Error of the fit at each data point
+    tol : float
+        Required accuracy of the fit
+
+    Returns
+    -------
+    knots : list
+        Knots to insert
+    """
+    span = numpy.clip(numpy.searchsorted(t, s, side='right') - 1,
+                      k - 1, len(t) - k - 1)
+    newKnots = []
+    for j in numpy.unique(span[err > tol]):
+        inSpan = span == j
+        sSpan = numpy.unique(s[inSpan])
+        if len(sSpan) >= 2:
+            m = len(sSpan)//2
+            newKnots.append((numpy.max(err[inSpan]),
+                             0.5*(sSpan[m-1] + sSpan[m])))
+    newKnots.sort(reverse=True)
+
+    return [knot for e, knot in newKnots]
+
+def _insertKnots(t, k, coef, axis, knots):
+    """
+    Insert a set of knots into one parametric direction of a spline
+    with a single call to libspline.refineknot for all the coefficient
+    slices. Knots outside the interior of t are ignored and the
+    multiplicity of each knot is limited to k-1.
+
+    Parameters
+    ----------
+    t : array
+        Knot vector in the direction being refined
+    k : int
+        Spline order in the direction being refined
+    coef : array
+        Spline coefficients, with the last dimension being nDim
+    axis : int
+        Axis of coef that corresponds to t
+    knots : array
+        Knots to insert. A value may be repeated to insert it more
+        than once.
+
+    Returns
+    -------
+    tNew : array
+        The new knot vector
+    coefNew : array
+        The new coefficients
+    """
+    knots = numpy.sort(numpy.atleast_1d(numpy.array(knots, 'd')).flatten())
+    knots = knots[(knots > t[0]) & (knots < t[-1])]
+    x = []
+    for value in numpy.unique(knots):
+        mult = numpy.sum(numpy.abs(t - value) < 1e-12)
+        x.extend([value]*min(numpy.sum(knots == value), k - 1 - mult))
+    if len(x) == 0:
+        return t.copy(), coef.copy()
+
+    C = numpy.moveaxis(coef, axis, 0)
+    shape = C.shape
+    tNew, coefNew = libspline.refineknot(x, t, k,
+                                         C.reshape((shape[0], -1)).T)
+    coefNew = coefNew.T.reshape((shape[0] + len(x),) + shape[1:])
+
+    return tNew, numpy.ascontiguousarray(numpy.moveaxis(coefNew, 0, axis))
+
+def _window(t, k, coef, axis, low, high):
+    """
+    Extract the part of a spline between the parameters low and high
+    along one parametric direction. Knots are inserted at low and high
+    in a single pass until the spline is clamped there, and then the
+    knots and coefficients are sliced once. The new knot vector is
+    rescaled to [0, 1].
+
+    Parameters
+    ----------
+    t : array
+        Knot vector in the direction being windowed
+    k : int
+        Spline order in the direction being windowed
+    coef : array
+        Spline coefficients, with the last dimension being nDim
+    axis : int
+        Axis of coef that corresponds to t
+    low : float
+        Lower bound of the window
+    high : float
+        Upper bound of the window
+
+    Returns
+    -------
+    tNew : array
+        Knot vector of the windowed spline
+    coefNew : array
+        Coefficients of the windowed spline
+    """
+    low = max(low, t[0])
+    high = min(high, t[-1])
+    if low >= high:
+        raise Error("The lower bound of the window must be less than "
+                    "the upper bound.")
+
+    tNew, coef = _insertKnots(t, k, coef, axis, [low]*(k-1) + [high]*(k-1))
+    start = 0
+    end = len(tNew) - k
+    if low > t[0]:
+        start = numpy.searchsorted(tNew, low + 1e-12, side='right') - k
+    if high < t[-1]:
+        end = numpy.searchsorted(tNew, high - 1e-12, side='left')
+
+    tNew = tNew[start:end+k].copy()
+    tNew[0] = low
+    tNew[-1] = high
+    tNew = (tNew - low)/(high - low)
+    coef = numpy.moveaxis(numpy.moveaxis(coef, axis, 0)[start:end], 0, axis)
+
+    return tNew, numpy.ascontiguousarray(coef)
+
+def _removeKnots(t, k, coef, axis, tol, getError):
+    """
+    Remove as many interior knots as possible from one parametric
+    direction of a spline. Each knot is removed as many times as
+    libspline.removeknot allows, and the removal is kept only if
+    getError() shows the spline is still within tol of the original.
+
+    Parameters
+    ----------
+    t : array
+        Knot vector in the direction being reduced
+    k : int
+        Spline order in the direction being reduced
+    coef : array
+        Spline coefficients, with the last dimension being nDim
+    axis : int
+        Axis of coef that corresponds to t
+    tol : float
+        Allowed deviation from the original spline
+    getError : function
+        getError(t, coef) returns the maximum deviation of the spline
+        with the trial knots and coefficients from the original
+
+    Returns
+    -------
+    tNew : array
+        The reduced knot vector
+    coefNew : array
+        The reduced coefficients
+    """
+    i = k
+    while i < len(t) - k:
+        # Last occurrence and multiplicity of the knot
+        r = i
+        while r + 1 < len(t) - k and t[r+1] == t[i]:
+            r += 1
+        mult = r - i + 1
+
+        C = numpy.moveaxis(coef, axis, 0)
+        shape = C.shape
+        C = C.reshape((shape[0], -1, shape[-1])).T
+        num = mult
+        removed = 0
+        while num > 0:
+            tNew, coefNew, nRemoved = libspline.removeknot(
+                r, mult, num, t, k, C, tol)
+            if nRemoved == 0:
+                break
+            coefNew = coefNew.T[:shape[0]-nRemoved].reshape(
+                (shape[0]-nRemoved,) + shape[1:])
+            coefNew = numpy.ascontiguousarray(
+                numpy.moveaxis(coefNew, 0, axis))
+            tNew = tNew[:len(t)-nRemoved]
+            if getError(tNew, coefNew) <= tol:
+                t, coef, removed = tNew, coefNew, nRemoved
+                break
+            num = nRemoved - 1
+
+        i = r + 1 - removed
+
+    return t, coef
+
+def _spanSamples(t, k):
+    """Parameters at which to check the deviation of a spline: 2k
+    points in each non-empty knot span"""
+    knots = numpy.unique(t)
+
+    return numpy.unique(numpy.hstack([numpy.linspace(a, b, 2*k) for a, b in
+                                      zip(knots[:-1], knots[1:])]))
+
+def _knotSpan(t, k, s):
+    """Zero based index of the knot span containing s, the same as
+    findSpan in the compiled library"""
+    nCtl = len(t) - k
+
+    return int(min(max(numpy.searchsorted(t, s, side='right') - 1, k - 1),
+                   nCtl - 1))
+
+def _powerSpans(t, k):
+    """
+    Power basis form of the b-spline basis functions in each
+    non-empty knot span.
+
+    Returns
+    -------
+    breaks : array of size nSpan+1
+        The distinct knots in the parametric range
+    first : int array of size nSpan
+        Index of the first control point acting on each span
+    M : array of size (nSpan, k, k)
+        M[j, p, i] is the coefficient of x**p of basis function
+        first[j]+i in span j, where x = (s - breaks[j])/(breaks[j+1] -
+        breaks[j]) is the local coordinate of the span
+    """
+    nCtl = len(t) - k
+    breaks = numpy.unique(t[k-1:nCtl+1])
+    nSpan = len(breaks) - 1
+
+    # The basis functions are polynomials of degree k-1 inside each
+    # span so they are recovered exactly from k samples. Chebyshev
+    # points keep the Vandermonde system well conditioned.
+    x = 0.5 - 0.5*numpy.cos((2*numpy.arange(k) + 1)*numpy.pi/(2*k))
+    s = breaks[:-1, None] + numpy.outer(numpy.diff(breaks), x)
+    vals = numpy.zeros(nSpan*k*k)
+    rowPtr = numpy.zeros(nSpan*k+1, 'intc')
+    colInd = numpy.zeros(nSpan*k*k, 'intc')
+    libspline.curve_jacobian_wrap(s.flatten(), [], t, k, nCtl, vals, rowPtr,
+                                  colInd)
+    V = numpy.vander(x, k, increasing=True)
+    M = numpy.linalg.solve(V[None, :, :], vals.reshape((nSpan, k, k)))
+
+    return breaks, colInd[::k*k].copy(), M
+
+def _powerCoef(knots, ks, coef):
+    """
+    Convert the coefficients of a tensor product b-spline to per-span
+    power basis coefficients, one direction at a time.
+
+    Returns
+    -------
+    breaks : list of arrays
+        Break points in each direction
+    pcoef : array of size (nSpan_1, ..., nSpan_d, k_1, ..., k_d, nDim)
+        Power basis coefficients of each span
+    """
+    breaks = []
+    P = numpy.asarray(coef, 'd')
+    for axis, (t, k) in enumerate(zip(knots, ks)):
+        b, first, M = _powerSpans(t, k)
+        breaks.append(b)
+        X = numpy.take(P, first[:, None] + numpy.arange(k), axis=2*axis)
+        pre, post = X.shape[:2*axis], X.shape[2*axis+2:]
+        X = X.reshape((int(numpy.prod(pre)), len(first), k,
+                       int(numpy.prod(post))))
+        X = numpy.einsum('spi,asib->aspb', M, X)
+        P = X.reshape(pre + X.shape[1:3] + post)
+
+    nDir = len(knots)
+    P = P.transpose(list(range(0, 2*nDir, 2)) + list(range(1, 2*nDir, 2)) +
+                    [2*nDir])
+
+    return breaks, numpy.ascontiguousarray(P)
+
+class _PowerBasis(object):
+    """
+    Cached power basis form of a spline. The cache is built on the
+    first update() and kept until reset() is called, which the
+    knot and coefficient properties do whenever they are assigned.
+    """
+    def __init__(self):
+        self.breaks = None
+        self.pcoef = None
+
+    def reset(self):
+        """Discard the cached coefficients"""
+        self.breaks = None
+        self.pcoef = None
+
+    def update(self, knots, ks, coef):
+        """Return the break points and power basis coefficients for
+        the given knots, orders and coefficients"""
+        if self.pcoef is None:
+            self.breaks, self.pcoef = _powerCoef(knots, ks, coef)
+
+        return self.breaks, self.pcoef
+
+def _splineData(name):
+    """
+    Create a property for a knot vector or coefficient array that
+    discards the cached power basis form of the spline whenever it is
+    assigned.
+    """
+    key = '_' + name
+
+    def getter(self):
+        return getattr(self, key)
+
+    def setter(self, value):
+        setattr(self, key, value)
+        if getattr(self, '_power', None) is not None:
+            self._power.reset()
+
+    return property(getter, setter)
+
+def _outside(breaks, *params):
+    """
+    Return a mask of the parametric positions that lie outside the
+    break points in any direction.
+    """
+    mask = False
+    for b, p in zip(breaks, params):
+        mask = mask | (p < b[0]) | (p > b[-1])
+
+    return mask
+
+def _closestData(spline, x0):
+    """
+    Find the discrete data point of a curve, surface or volume that is
+    closest to each of the points in x0. This is used to globalize the
+    Newton search in projectPoint. The search tree is built from the
+    output of computeData() the first time it is needed and then
+    reused.
+
+    Parameters
+    ----------
+    spline : Curve, Surface or Volume
+        The object to search
+    x0 : array of size (N, nDim)
+        The points to find
+
+    Returns
+    -------
+    ind : int array of length N
+        The flattened index into spline.data of the closest point
+    """
+    spline.computeData()
+    if spline.dataTree is None:
+        spline.dataTree = cKDTree(spline.data.reshape((-1, spline.nDim)))
+
+    return spline.dataTree.query(x0)[1]
+
+
 def checkInput(inputVal, inputName, dataType, dataRank, dataShape=None):
     """This is a generic function to check the data type and sizes of
     inputs in functions where the user must supply proper
@@ -228,6 +875,35 @@ def checkInput(inputVal, inputName, dataType, dataRank, dataShape=None):
     else:
         return tmp
 
+
+def setNumThreads(nThreads):
+    """Set the number of OpenMP threads used by the compiled
+    evaluation, jacobian assembly and projection routines. This has
+    no effect unless pySpline was compiled with OpenMP enabled
+    (see the OMP_FLAGS option in the config files).
+
+    Parameters
+    ----------
+    nThreads : int
+        Number of threads to use. Must be at least 1.
+    """
+    nThreads = checkInput(nThreads, 'nThreads', int, 0)
+    if nThreads < 1:
+        raise Error("'nThreads' must be at least 1")
+    libspline.set_num_threads(nThreads)
+
+
+def getNumThreads():
+    """Return the number of OpenMP threads the compiled routines will
+    use. This is always 1 if pySpline was compiled without OpenMP.
+
+    Returns
+    -------
+    nThreads : int
+        Number of threads
+    """
+    return int(libspline.get_num_threads())
+
 # =============================================================================
 # pySpline classes
 # =============================================================================
@@ -308,10 +984,14 @@ class Curve(object):
     >>> #LMS parabolic curve with parameter values
     >>> parabola = pySpline.Curve(x=x, y=y, k=3, s=s)
     """
+    t = _splineData('t')
+    coef = _splineData('coef')
+
     def __init__(self, **kwargs):
         self.length = None
         self.gpts = None
         self.data = None
+        self.dataTree = None
         self.sdata = None
         self.localInterp = False
         # We have provided information to create curve directly
@@ -441,6 +1121,8 @@ nCtl=<number of control points> must be specified for a LMS fit'
                 if self.nDim <= 1:
                     raise Error("For 1D splines, the basis, 's' must be given.")
                 self._getParameterization()
+            # Keep the parameters before any parameter correction
+            self.origS = self.s.copy()
 
             if 'weights' in kwargs:
                 self.weights = checkInput(
@@ -479,22 +1161,55 @@ nCtl=<number of control points> must be specified for a LMS fit'
 
             self.recompute(self.nIter, computeKnots=True)
 
-    def recompute(self, nIter, computeKnots=True):
+    def recompute(self, nIter=None, computeKnots=True, rmsTol=0.0,
+                  maxIter=None, stallTol=0.0):
         """
         Run iterations of Hoscheks Parameter Correction on the current curve
 
         Parameters
         ----------
         nIter : int
-            The number of parameter correction iterations to run
+            The number of iterations to run. Each iteration is a fit
+            followed by a parameter correction, so the default of 1
+            already corrects the parameters once. Note that this
+            differs from Surface.recompute(), where nIter counts the
+            fits and nIter-1 corrections are done. Defaults to the
+            nIter value given when the curve was created.
         computeKnots : bool
             Flag whether or not the knots should be recomputed
+        rmsTol : float
+            Stop iterating once the RMS error of the fit is below
+            this value.
+        maxIter : int
+            Maximum number of iterations. Takes precedence over nIter
+            if both are given.
+        stallTol : float
+            Stop iterating once an iteration reduces the RMS error by
+            less than this fraction of the previous RMS error. The
+            default of 0.0 disables the check.
+
+        Returns
+        -------
+        report : dict
+            The fit report, which is also stored in self.fitReport.
+            It contains the RMS error of each iteration ('rms'), the
+            time in seconds spent assembling the matrices
+            ('tAssembly'), factorizing and solving ('tFactor') and in
+            the parameter correction ('tParaCorr'), the maximum
+            distance between the data and the curve ('maxError') and
+            the reason the iterations stopped ('exitReason').
             """
 
         # Return if we don't have original data to fit
         if not self.origData or self.localInterp:
             return
 
+        if maxIter is None:
+            maxIter = self.nIter if nIter is None else nIter
+
+        report = {'rms': [], 'tAssembly': 0.0, 'tFactor': 0.0,
+                  'tParaCorr': 0.0, 'maxError': 0.0, 'exitReason': 'maxIter'}
+
         # Do the separation between the constrained and unconstrained:
         # u -> unconstrained
         # s -> constrained
@@ -533,6 +1248,18 @@ nCtl=<number of control points> must be specified for a LMS fit'
                             numpy.arange(len(weights)+1),
                             (len(weights), len(weights)))
 
+        # The rows of S and T, stacked, are Q*X + d: Q picks out the
+        # data points and d holds the derivative data
+        nRows = nu + ndu + nc + ndc
+        Q = sparse.csr_matrix(
+            (numpy.ones(nu + nc), (numpy.append(
+                numpy.arange(nu), nu + ndu + numpy.arange(nc)),
+                numpy.append(suSelect[0], scSelect[0]))),
+            shape=(nRows, self.N))
+        d = numpy.zeros((nRows, self.nDim))
+        d[nu:nu+ndu] = S[nu:]
+        d[nu+ndu+nc:] = T[nc:]
+
         if self.interp:
             self.nCtl = nu+nc+ndu+ndc
             self.nIter = 1
@@ -553,6 +1280,7 @@ nCtl=<number of control points> must be specified for a LMS fit'
         self.coef = numpy.zeros((self.nCtl, self.nDim), 'd')
 
         # Get the 'N' jacobian
+        t0 = time.time()
         nVals = numpy.zeros((nu+ndu)*self.k)           # |
         nRowPtr  = numpy.zeros(nu+ndu+1, 'intc')       # | -> CSR formulation
         nColInd = numpy.zeros((nu+ndu)*self.k, 'intc')# |
@@ -560,18 +1288,23 @@ nCtl=<number of control points> must be specified for a LMS fit'
             su, sdu, self.t, self.k, self.nCtl, nVals, nRowPtr, nColInd)
         N = _assembleMatrix(nVals, nColInd, nRowPtr,
                             (nu+ndu, self.nCtl)).tocsc()
+        report['tAssembly'] += time.time() - t0
 
         if self.interp:
             # Factorize once for efficiency
-            solve = linalg.dsolve.factorized( N )
-            for idim in range(self.nDim):
-                self.coef[:, idim] = solve(S[:, idim])
-
-            return
+            t0 = time.time()
+            B = sparse.hstack([sparse.identity(nu+ndu),
+                               sparse.csr_matrix((nu+ndu, nc+ndc))])
+            self._setFit(_factorize(N), B, Q, d)
+            report['tFactor'] += time.time() - t0
+            report['rms'].append(self._fitRMS(N, S))
+            report['exitReason'] = 'interp'
+            return self._finishReport(report)
 
         # If we do NOT have an interpolation:
         length = libspline.poly_length(self.X.T)
-        for i in range(nIter):
+        for i in range(maxIter):
+            t0 = time.time()
             su = self.s[suSelect]
             sc = self.s[scSelect]
             if self.deriv != None:
@@ -580,7 +1313,11 @@ nCtl=<number of control points> must be specified for a LMS fit'
 
             libspline.curve_jacobian_wrap(su, sdu, self.t, self.k, self.nCtl,
                                          nVals, nRowPtr, nColInd)
+            # Rebuild N since the parameters have changed
+            N = _assembleMatrix(nVals, nColInd, nRowPtr,
+                                (nu+ndu, self.nCtl)).tocsc()
             NTWN = (N.transpose()*W*N).tocsc() # We need this either way
+            report['tAssembly'] += time.time() - t0
 
             if nc + ndc == 0: # We are doing LMS but no
                               # constraints...just a straight weighted
@@ -588,15 +1325,18 @@ nCtl=<number of control points> must be specified for a LMS fit'
 
 
                 # Factorize once for efficiency
-                solve = linalg.dsolve.factorized( NTWN )
-                for idim in range(self.nDim):
-                    self.coef[:, idim] = solve(N.transpose()*W*S[:, idim])
+                t0 = time.time()
+                B = sparse.hstack([N.transpose()*W,
+                                   sparse.csr_matrix((self.nCtl, nc+ndc))])
+                self._setFit(_factorize(NTWN, symmetric=True), B, Q, d)
+                report['tFactor'] += time.time() - t0
 
             else:
                 # Now its more complicated since we have
                 # constraints --only works with scipy Sparse
                 # matrices
 
+                t0 = time.time()
                 mVals = numpy.zeros((nc+ndc)*self.k)          #|
                 mRowPtr = numpy.zeros(nc+ndc+1, 'intc')       #| -> CSR
                 mColInd = numpy.zeros((nc+ndc)*self.k, 'intc')#|
@@ -621,27 +1361,156 @@ nCtl=<number of control points> must be specified for a LMS fit'
                 # Create sparse csr matrix and factorize
                 J = _assembleMatrix(jVal, jColInd, jRowPtr,
                                     (self.nCtl+nc+ndc, self.nCtl+nc+ndc))
+                report['tAssembly'] += time.time() - t0
 
                 # Factorize once for efficiency
-                solve = linalg.dsolve.factorized(J)
-                for idim in range(self.nDim):
-                    rhs = numpy.hstack((N.transpose()*W*S[:, idim],
-                                        T[:, idim]))
-                    self.coef[:, idim] = solve(rhs)[0:self.nCtl]
+                t0 = time.time()
+                B = sparse.block_diag([N.transpose()*W,
+                                       sparse.identity(nc+ndc)])
+                self._setFit(_factorize(J), B, Q, d)
+                report['tFactor'] += time.time() - t0
 
             # end if (constr - not constrained
 
             # Run para correction
+            t0 = time.time()
             libspline.curve_para_corr(self.t, self.k, self.s,
                                      self.coef.T, length, self.X.T)
+            report['tParaCorr'] += time.time() - t0
+
+            # Check for convergence
+            rms = self._fitRMS(N, S)
+            report['rms'].append(rms)
+            if rms <= rmsTol:
+                report['exitReason'] = 'rmsTol'
+                break
+            if stallTol > 0.0 and i > 0 and \
+                    report['rms'][-2] - rms < stallTol*report['rms'][-2]:
+                report['exitReason'] = 'stall'
+                break
         # end for (iter loop)
 
-        # Check the RMS
+        return self._finishReport(report)
+
+    def _setFit(self, solve, B, Q, d):
+        """Store the fit operator for the system with solve function
+        solve and rhs B*(Q*X + d), and compute the coefficients"""
+        self._fit = _LinearFit(solve, B*Q, self.nCtl, B*d)
+        self.coef = self._fit.solve(self.X)
+        self._fitState = _fitState([self.t], self.coef)
+
+    def refit(self, X):
+        """
+        Fit new data with the same parameters, knots and weights as
+        the last fit done by recompute(). The factorization from that
+        fit is reused, so only a back substitution is required. No
+        parameter correction is done.
+
+        Parameters
+        ----------
+        X : array, size (N, nDim)
+            New data. It must have the same shape as the original
+            data.
+        """
+        self._checkFit()
+        X = numpy.array(X, 'd').reshape(self.X.shape)
+        self.coef = self._fit.solve(X)
+        self.X = X
+
+    def refitAdjoint(self, coefBar):
+        """
+        Transpose of the refit() operation. Given the derivative of a
+        function with respect to the coefficients, return its
+        derivative with respect to the data X. The cost is the same
+        as a refit().
+
+        Parameters
+        ----------
+        coefBar : array, size (nCtl, nDim)
+            Derivative of a function with respect to the coefficients
+
+        Returns
+        -------
+        XBar : array, size (N, nDim)
+            Derivative of the function with respect to the data
+        """
+        self._checkFit()
+        return self._fit.solveT(coefBar).reshape(self.X.shape)
+
+    def _checkFit(self):
+        if getattr(self, '_fit', None) is None:
+            raise Error("refit() requires a curve that was fit to data.")
+        _checkFitState(self._fitState, [self.t], self.coef)
+
+    def adaptiveFit(self, tol, maxCtl=None):
+        """
+        Refit the curve with as few control points as possible such
+        that the data is within tol of the curve. The fit starts with
+        a single polynomial segment. Knots are then inserted with
+        insertKnot() into every span where the error is larger than
+        tol and the curve is refit, until the tolerance is met. The
+        parameters the curve was created with are used and no
+        parameter correction is done.
+
+        Parameters
+        ----------
+        tol : float
+            Maximum allowed distance between the data and the curve
+        maxCtl : int
+            Maximum number of control points. Defaults to the number
+            of data points.
+
+        Returns
+        -------
+        maxError : float
+            Maximum distance between the data and the curve. This is
+            only larger than tol if maxCtl was reached or the spans
+            could not be split further.
+        """
+        if not self.origData or self.localInterp:
+            raise Error("adaptiveFit() requires a curve that was fit to "
+                        "data.")
+        if maxCtl is None:
+            maxCtl = self.N
+
+        # The original parameters are held fixed, so undo the
+        # parameter correction done by recompute() after each fit
+        s = self.origS.copy()
+        self.interp = False
+        self.nCtl = self.k
+        self.t = libspline.knots_lms(s, self.nCtl, self.k)
+        self.coef = numpy.zeros((self.nCtl, self.nDim))
+        while True:
+            self.recompute(maxIter=1, computeKnots=False)
+            self.s = s.copy()
+            err = numpy.linalg.norm(self.getValue(s).reshape(
+                self.X.shape) - self.X, axis=1)
+            knots = _refineKnots(self.t, self.k, s, err, tol)
+            knots = knots[:max(maxCtl - self.nCtl, 0)]
+            if len(knots) == 0:
+                break
+            for knot in knots:
+                self.insertKnot(knot, 1)
+
+        return float(numpy.max(err))
+
+    def _fitRMS(self, N, S):
+        """Compute the RMS error of the current fit to the data S with
+        basis matrix N"""
         rms = 0.0
         for idim in range(self.nDim):
             rms += numpy.linalg.norm(N*self.coef[:, idim]-S[:, idim])**2
 
-        rms = numpy.sqrt(rms/self.N)
+        return float(numpy.sqrt(rms/self.N))
+
+    def _finishReport(self, report):
+        """Add the maximum error to the fit report and store it"""
+        vals = self.getValue(self.s).reshape(self.X.shape)
+        report['maxError'] = float(numpy.max(
+            numpy.linalg.norm(vals - self.X, axis=1)))
+        self.fitReport = report
+
+        return report
 
     def _getParameterization(self):
         """Compute a parametrization for the curve based on an
@@ -696,14 +1565,70 @@ nCtl=<number of control points> must be specified for a LMS fit'
         self.t = tNew[0:self.nCtl+self.k+actualR]
         self.coef = coefNew[:, 0:self.nCtl+actualR].T
         self.nCtl = self.nCtl + actualR
+        self._fit = None
 
         # break_pt is converted to zero based ordering here!!!
         return actualR, breakPt-1
 
+    def refine(self, knots):
+        """
+        Insert a set of knots into the curve at once. This is the same
+        as calling insertKnot() for each knot, but is done in a single
+        pass over the coefficients.
+
+        Parameters
+        ----------
+        knots : array
+            Parametric positions of the knots to insert. A value may
+            be repeated to insert it more than once. Knots outside the
+            curve are ignored and the multiplicity of any knot is
+            limited to k-1.
+        """
+        self.t, self.coef = _insertKnots(self.t, self.k, self.coef, 0, knots)
+        self.nCtl = len(self.coef)
+        self._fit = None
+
+    def removeKnots(self, tol):
+        """
+        Remove as many interior knots as possible while keeping the
+        curve within tol of the original curve. This can greatly
+        reduce the number of control points of interpolated curves.
+        The deviation is measured at 2k points in each span of the
+        original knot vector.
+
+        Parameters
+        ----------
+        tol : float
+            Allowed distance from the original curve
+
+        Returns
+        -------
+        maxError : float
+            Maximum distance between the new and original curves
+        ratio : float
+            Original number of control points divided by the new
+            number of control points
+        """
+        s = _spanSamples(self.t, self.k)
+        X = libspline.eval_curve(s, self.t, self.k, self.coef.T).T
+
+        def getError(t, coef):
+            values = libspline.eval_curve(s, t, self.k, coef.T).T
+            return numpy.max(numpy.linalg.norm(values - X, axis=1))
+
+        nCtl = self.nCtl
+        self.t, self.coef = _removeKnots(self.t, self.k, self.coef, 0, tol,
+                                         getError)
+        self.nCtl = len(self.coef)
+        self._fit = None
+
+        return getError(self.t, self.coef), nCtl/float(self.nCtl)
+
     def splitCurve(self, u):
         """
-        Split the curve at parametric position u. This uses the
-        :func:`insertKnot` routine
+        Split the curve at parametric position u. The knots are
+        inserted once and both curves are sliced from the result;
+        this curve is not modified.
 
         Parameters
         ----------
@@ -732,18 +1657,10 @@ nCtl=<number of control points> must be specified for a LMS fit'
             return Curve(t=self.t.copy(), k=self.k,
                                   coef=self.coef.copy()), None
 
-        r, breakPt = self.insertKnot(u, self.k-1)
-        # Break point is now at the right so we need to adjust the
-        # counter to the left
-        breakPt = breakPt - self.k + 2
-
-        # Process knot vectors:
-        uu = self.t[breakPt]
-        t1 = numpy.hstack((self.t[0:breakPt+self.k-1].copy(), uu))/uu
-        t2 = (numpy.hstack((uu, self.t[breakPt:].copy()))-uu)/(1.0-uu)
-
-        coef1 = self.coef[0:breakPt, :].copy()
-        coef2 = self.coef[breakPt-1:, :].copy()
+        t, coef = _insertKnots(self.t, self.k, self.coef, 0,
+                               [u]*(self.k-1))
+        t1, coef1 = _window(t, self.k, coef, 0, t[0], u)
+        t2, coef2 = _window(t, self.k, coef, 0, u, t[-1])
 
         return \
             Curve(t=t1, k=self.k, coef=coef1), \
@@ -760,10 +1677,9 @@ nCtl=<number of control points> must be specified for a LMS fit'
         uHigh : float
             Upper bound for the clip
         """
-        __, c = self.splitCurve(uLow)
-        c, __ = c.splitCurve((uHigh-uLow)/(1.0-uLow))
+        t, coef = _window(self.t, self.k, self.coef, 0, uLow, uHigh)
 
-        return c
+        return Curve(t=t, k=self.k, coef=coef)
 
     def getLength(self):
         """ Compute the length of the curve using the Euclidean Norm
@@ -809,6 +1725,32 @@ nCtl=<number of control points> must be specified for a LMS fit'
         """
         return self.getValue(s)
 
+    def setPowerBasis(self, flag=True):
+        """
+        Evaluate the curve from a per-span power basis form of the
+        spline in getValue(). The power basis coefficients are
+        computed once, after which each point only requires a span
+        search and Horner's scheme instead of the b-spline basis
+        recursion. This is worthwhile when the same curve is
+        evaluated many times. The cached form is rebuilt when the knots
+        or coefficients are assigned; coefficients modified in place
+        must be assigned back, e.g. ``curve.coef = curve.coef``. Points
+        outside the range of the knots are evaluated with the
+        b-spline basis since extrapolating the end spans is not
+        accurate. The values are the same as the standard evaluation
+        to within round-off.
+
+        Parameters
+        ----------
+        flag : bool
+            True to use the power basis form, False to go back to the
+            standard evaluation and free the cache.
+        """
+        self._power = _PowerBasis() if flag else None
+
+    def _usePower(self):
+        return getattr(self, '_power', None) is not None
+
     def getValue(self, s):
         """
         Evaluate the spline at parametric position, s
@@ -828,7 +1770,15 @@ nCtl=<number of control points> must be specified for a LMS fit'
             """
 
         s = numpy.array(s).T
-        if self.coef.dtype == numpy.dtype('d'):
+        if self.coef.dtype == numpy.dtype('d') and self._usePower():
+            s = numpy.atleast_1d(s)
+            b, pcoef = self._power.update([self.t], [self.k], self.coef)
+            vals, nOut = libspline.eval_curve_power(s, b[0], pcoef.T)
+            if nOut > 0:
+                mask = _outside(b, s)
+                vals[:, mask] = libspline.eval_curve(s[mask], self.t, self.k,
+                                                     self.coef.T)
+        elif self.coef.dtype == numpy.dtype('d'):
             vals = libspline.eval_curve(numpy.atleast_1d(s),
                                        self.t, self.k, self.coef.T)
         else:
@@ -838,28 +1788,54 @@ nCtl=<number of control points> must be specified for a LMS fit'
 
         return vals.squeeze().T
 
+    def getBasisMatrix(self, s):
+        """
+        Compute the basis function matrix for a fixed set of
+        parametric positions. The returned object can then evaluate
+        the curve at s for any coefficients much faster than calling
+        getValue() repeatedly.
+
+        Parameters
+        ----------
+        s : float or array
+            Parametric position(s) at which to evaluate the curve.
+
+        Returns
+        -------
+        N : BasisMatrix
+            Basis matrix object. N(coef) gives the same result as
+            getValue(s) would with these coefficients.
+        """
+        s = numpy.array(s, 'd')
+        N = _curveJacobian(s, self.t, self.k, self.nCtl)
+
+        return BasisMatrix(N, s.shape, (self.nCtl,))
+
     def getDerivative(self, s):
         """
         Evaluate the derivatie of the spline at parametric position, s
 
         Parameters
         ----------
-        s : float
-            Parametric location for derivative
+        s : float or array
+            Parametric location(s) for derivative
 
         Returns
         -------
         ds : array
-            The first derivative. This is an array of size nDim
+            The first derivative. This is an array of size nDim if a
+            single s was given, or an array of size (N, nDim) if a
+            vector of s values were given.
             """
+        s = numpy.array(s, 'd').T
         if self.coef.dtype == numpy.dtype('d'):
-            ds = libspline.eval_curve_deriv(
-                s, self.t, self.k, self.coef.T).squeeze()
+            ds = libspline.eval_curve_deriv_m(
+                numpy.atleast_1d(s), self.t, self.k, self.coef.T)
         else:
-            ds = libspline.eval_curve_deriv_c(
-                s, self.t, self.k, self.coef.T).squeeze()
+            ds = libspline.eval_curve_deriv_m_c(
+                numpy.atleast_1d(s), self.t, self.k, self.coef.T)
 
-        return ds
+        return ds.squeeze().T
 
     def getSecondDerivative(self, s):
         """
@@ -868,23 +1844,61 @@ nCtl=<number of control points> must be specified for a LMS fit'
 
         Parameters
         ----------
-        s : float
-            Parametric location for derivative
+        s : float or array
+            Parametric location(s) for derivative
 
         Returns
         -------
         d2s : array
-            The second derivative. This is an array of size nDim
+            The second derivative. This is an array of size nDim if a
+            single s was given, or an array of size (N, nDim) if a
+            vector of s values were given.
 
         """
+        s = numpy.array(s, 'd').T
         if self.coef.dtype == numpy.dtype('d'):
-            d2s = libspline.eval_curve_deriv2(
-                s, self.t, self.k, self.coef.T).squeeze()
+            d2s = libspline.eval_curve_deriv2_m(
+                numpy.atleast_1d(s), self.t, self.k, self.coef.T)
         else:
-            d2s = libspline.eval_curve_deriv2_c(
-                s, self.t, self.k, self.coef.T).squeeze()
+            d2s = libspline.eval_curve_deriv2_m_c(
+                numpy.atleast_1d(s), self.t, self.k, self.coef.T)
+
+        return d2s.squeeze().T
+
+    def evaluate(self, s, order=2):
+        """
+        Evaluate the spline and its derivatives at parametric
+        position(s) s in a single pass. The basis functions are only
+        computed once per point, so this is cheaper than calling
+        getValue(), getDerivative() and getSecondDerivative()
+        separately.
+
+        Parameters
+        ----------
+        s : float or array
+            Parametric position(s) at which to evaluate the curve.
+        order : int
+            Highest derivative to compute. Must be 0, 1 or 2.
 
-        return d2s
+        Returns
+        -------
+        result : list
+            [values, ds, d2s] truncated to order+1 entries. Each
+            entry has the same shape as getValue() would return.
+        """
+        if order not in [0, 1, 2]:
+            raise Error("order must be 0, 1 or 2")
+
+        if self.coef.dtype != numpy.dtype('d'):
+            funcs = [self.getValue, self.getDerivative,
+                     self.getSecondDerivative]
+            return [funcs[i](s) for i in range(order+1)]
+
+        s = numpy.array(s, 'd').T
+        vals = libspline.eval_curve_derivs(
+            numpy.atleast_1d(s), self.t, self.k, self.coef.T, order)
+
+        return [vals[i].squeeze().T for i in range(order+1)]
 
     def projectPoint(self, x0, nIter=25, eps=1e-10, **kwargs):
         """
@@ -919,17 +1933,14 @@ nCtl=<number of control points> must be specified for a LMS fit'
         if len(x0) != len(s):
             raise Error('projectPoint: The length of x0 and s must be the same')
 
-        # If necessary get brute-force starting point
+        # If necessary get starting point from the discrete data
         if numpy.any(s<0) or numpy.any(s>1):
-            self.computeData()
-            s = libspline.point_curve_start(
-                x0.T, self.sdata, self.data.T)
+            ind = _closestData(self, x0)
+            s = self.sdata[ind]
 
-        D = numpy.zeros_like(x0)
-        for i in range(len(x0)):
-            s[i], D[i] = libspline.point_curve(x0[i], self.t, self.k,
-                                               self.coef.T, nIter, eps, s[i])
-        return s.squeeze(), D.squeeze()
+        s, D = libspline.point_curve_batch(x0.T, self.t, self.k, self.coef.T,
+                                           nIter, eps, s)
+        return s.squeeze(), D.T.squeeze()
 
     def projectCurve(self, inCurve, nIter=25, eps=1e-10, **kwargs):
         """
@@ -1056,6 +2067,7 @@ nCtl=<number of control points> must be specified for a LMS fit'
         if self.data is None:
             self.calcInterpolatedGrevillePoints()
             self.data = self.getValue(self.sdata)
+            self.dataTree = None
 
     def writeTecplot(self, fileName, curve=True, coef=True, orig=True):
         """
@@ -1226,11 +2238,16 @@ class Surface(object):
     **bottom** surface as described in :class:`Volume` documentation.
     """
 
+    tu = _splineData('tu')
+    tv = _splineData('tv')
+    coef = _splineData('coef')
+
     def __init__(self, recompute=True, **kwargs):
         
         self.name = None
         self.edgeCurves = [None, None, None, None]
         self.data = None
+        self.dataTree = None
         self.udata = None
         self.vdata = None
         if 'ku' in kwargs and 'kv' in kwargs and 'tu' in kwargs and 'tv' in \
@@ -1559,46 +2576,239 @@ MUST be defined for task lms or interpolate'
             if recompute:
                 self.recompute()
 
-    def recompute(self):
-        """Recompute the surface if any data has been modified"""
-
-        vals, rowPtr, colInd = libspline.surface_jacobian_wrap(\
-            self.U.T, self.V.T, self.tu, self.tv, self.ku, self.kv,
-            self.nCtlu, self.nCtlv)
-
-        N = _assembleMatrix(vals, colInd, rowPtr, (self.Nu*self.Nv,
-                                                   self.nCtlu*self.nCtlv))
+    def recompute(self, nIter=None, rmsTol=0.0, stallTol=0.0):
+        """Recompute the surface if any data has been modified. For
+        LMS fits, the fit is followed by up to nIter-1 rounds of
+        Hoschek parameter correction, each of which moves the
+        parameters of the data points to their foot points on the
+        current surface and refits. The RMS error of the final fit is
+        stored in self.rms.
 
-        self.coef = numpy.zeros((self.nCtlu, self.nCtlv, self.nDim))
-        if self.interp:
-            # Factorize once for efficiency
-            solve = linalg.dsolve.factorized( N )
-            for idim in range(self.nDim):
-                self.coef[:, :, idim] = \
-                             solve(self.X[:, :, idim].flatten()).reshape(
-                    [self.nCtlu, self.nCtlv])
-        else:
-            solve = linalg.dsolve.factorized(N.transpose()*N)
-            for idim in range(self.nDim):
-                rhs  = N.transpose()*self.X[:, :, idim].flatten()
-                self.coef[:, :, idim] = \
-                             solve(rhs).reshape([self.nCtlu, self.nCtlv])
+        Parameters
+        ----------
+        nIter : int
+            Number of fits, so nIter-1 is the number of parameter
+            corrections and the default of 1 does none. Note that
+            this differs from Curve.recompute(), where every one of
+            the nIter iterations is a fit followed by a parameter
+            correction. Defaults to the nIter value given when the
+            surface was created.
+        rmsTol : float
+            Stop the parameter correction once the RMS error of the
+            fit is below this value.
+        stallTol : float
+            Stop the parameter correction once an iteration reduces
+            the RMS error by less than this fraction of the previous
+            RMS error. The default of 0.0 disables the check.
+        """
+        if nIter is None:
+            nIter = self.nIter
+
+        self._computeCoef()
+        self.rms = self._computeRMS()
+        if not self.interp:
+            self.U = numpy.ascontiguousarray(self.U, 'd')
+            self.V = numpy.ascontiguousarray(self.V, 'd')
+            for i in range(nIter-1):
+                if self.rms <= rmsTol:
+                    break
+                libspline.surface_para_corr(
+                    self.tu, self.tv, self.ku, self.kv, self.U.T, self.V.T,
+                    self.coef.T, self.X.T)
+                self._computeCoef()
+                rms, self.rms = self.rms, self._computeRMS()
+                if stallTol > 0.0 and rms - self.rms < stallTol*rms:
+                    break
 
         self.setEdgeCurves()
 
-    def calcParameterization(self):
-        """Compute a spatial parameterization"""
+    def _computeRMS(self):
+        """Compute the RMS error of the current fit to the data"""
+        D = self.getValue(self.U, self.V) - self.X
 
-        u = numpy.zeros(self.Nu, 'd')
-        U = numpy.zeros((self.Nu, self.Nv), 'd')
-        singularSounter = 0
-        # loop over each v, and average the 'u' parameter
-        for j in range(self.Nv):
-            temp = numpy.zeros(self.Nu, 'd')
+        return numpy.sqrt(numpy.sum(D**2)/(self.Nu*self.Nv))
 
-            for i in range(self.Nu-1):
-                temp[i+1] = temp[i] + numpy.linalg.norm(
-                    self.X[i, j]-self.X[i+1, j])
+    def _computeCoef(self):
+        """Solve for the coefficients with the current parameters. If
+        the parameterization is a tensor product grid (e.g. u and v
+        were given), the fit is done with one 1D solve per direction.
+        Otherwise the full basis matrix is assembled and factorized."""
+
+        grid = _tensorGrid(self.U, self.V)
+        if grid is not None:
+            Ns = [_curveJacobian(grid[0], self.tu, self.ku, self.nCtlu),
+                  _curveJacobian(grid[1], self.tv, self.kv, self.nCtlv)]
+            self._fit = _SeparableFit(Ns, self.interp)
+        else:
+            vals, rowPtr, colInd = libspline.surface_jacobian_wrap(\
+                self.U.T, self.V.T, self.tu, self.tv, self.ku, self.kv,
+                self.nCtlu, self.nCtlv)
+
+            N = _assembleMatrix(vals, colInd, rowPtr, (
+                self.Nu*self.Nv, self.nCtlu*self.nCtlv))
+
+            if self.interp:
+                self._fit = _LinearFit(_factorize(N), sparse.identity(
+                    N.shape[0]), N.shape[1])
+            else:
+                self._fit = _LinearFit(_factorize(
+                    N.transpose()*N, symmetric=True), N.transpose(),
+                                       N.shape[1])
+
+        self.coef = self._fit.solve(self.X).reshape(
+            (self.nCtlu, self.nCtlv, self.nDim))
+        self._fitState = _fitState([self.tu, self.tv], self.coef)
+
+    def refit(self, X):
+        """
+        Fit new data with the same parameters and knots as the last
+        fit. The factorization from that fit is reused, so only a
+        back substitution is required. No parameter correction is
+        done.
+
+        Parameters
+        ----------
+        X : array, size (Nu, Nv, nDim)
+            New data. It must have the same shape as the original
+            data.
+        """
+        self._checkFit()
+        X = numpy.array(X, 'd').reshape(self.X.shape)
+        self.coef = self._fit.solve(X).reshape(self.coef.shape)
+        self.X = X
+        self.setEdgeCurves()
+
+    def refitAdjoint(self, coefBar):
+        """
+        Transpose of the refit() operation. Given the derivative of a
+        function with respect to the coefficients, return its
+        derivative with respect to the data X.
+
+        Parameters
+        ----------
+        coefBar : array, size (nCtlu, nCtlv, nDim)
+            Derivative of a function with respect to the coefficients
+
+        Returns
+        -------
+        XBar : array, size (Nu, Nv, nDim)
+            Derivative of the function with respect to the data
+        """
+        self._checkFit()
+        coefBar = numpy.array(coefBar, 'd').reshape(self.coef.shape)
+        if isinstance(self._fit, _LinearFit):
+            coefBar = coefBar.reshape((-1, self.nDim))
+
+        return self._fit.solveT(coefBar).reshape(self.X.shape)
+
+    def _checkFit(self):
+        if getattr(self, '_fit', None) is None:
+            raise Error("refit() requires a surface that was fit to data.")
+        _checkFitState(self._fitState, [self.tu, self.tv], self.coef)
+
+    def adaptiveFit(self, tol, maxCtl=None):
+        """
+        Refit the surface with as few control points as possible such
+        that the data is within tol of the surface. The fit starts
+        with a single polynomial patch. Each refinement inserts knots
+        with insertKnot() into every span where the error is larger
+        than tol, in whichever of the u or v directions reduces the
+        squared error most per added control point, and refits. This
+        is repeated until the tolerance is met. The parameters of the
+        data are not changed.
+
+        Parameters
+        ----------
+        tol : float
+            Maximum allowed distance between the data and the surface
+        maxCtl : int
+            Maximum total number of control points. By default, the
+            number of control points in each direction is only limited
+            by the number of data points.
+
+        Returns
+        -------
+        maxError : float
+            Maximum distance between the data and the surface. This is
+            only larger than tol if the number of control points could
+            not be increased further.
+        """
+        if not self.origData:
+            raise Error("adaptiveFit() requires a surface that was fit to "
+                        "data.")
+        if maxCtl is None:
+            maxCtl = self.Nu*self.Nv
+
+        self.interp = False
+        self.nCtlu = self.ku
+        self.nCtlv = self.kv
+        self.tu = libspline.knots_lms(self.u, self.nCtlu, self.ku)
+        self.tv = libspline.knots_lms(self.v, self.nCtlv, self.kv)
+        self._computeCoef()
+        err = self._pointErrors()
+
+        names = ['tu', 'tv', 'coef', 'nCtlu', 'nCtlv', '_fit', '_fitState']
+        while True:
+            state = [getattr(self, name) for name in names]
+            best = None
+            for direction in ['u', 'v']:
+                if direction == 'u':
+                    knots = _refineKnots(self.tu, self.ku, self.U.flatten(),
+                                         err.flatten(), tol)
+                    nMax = min(self.Nu, maxCtl//self.nCtlv) - self.nCtlu
+                    nOther = self.nCtlv
+                else:
+                    knots = _refineKnots(self.tv, self.kv, self.V.flatten(),
+                                         err.flatten(), tol)
+                    nMax = min(self.Nv, maxCtl//self.nCtlu) - self.nCtlv
+                    nOther = self.nCtlu
+                knots = knots[:max(nMax, 0)]
+                if len(knots) == 0:
+                    continue
+
+                for knot in knots:
+                    self.insertKnot(direction, knot, 1)
+                self._computeCoef()
+                newErr = self._pointErrors()
+                gain = (numpy.sum(err**2) - numpy.sum(newErr**2))/(
+                    len(knots)*nOther)
+                if best is None or gain > best[0]:
+                    best = (gain, newErr,
+                            [getattr(self, name) for name in names])
+
+                for name, value in zip(names, state):
+                    setattr(self, name, value)
+
+            if best is None:
+                break
+            err = best[1]
+            for name, value in zip(names, best[2]):
+                setattr(self, name, value)
+
+        self.rms = numpy.sqrt(numpy.sum(err**2)/(self.Nu*self.Nv))
+        self.setEdgeCurves()
+
+        return float(numpy.max(err))
+
+    def _pointErrors(self):
+        """Distance between each data point and the surface at its
+        parameters"""
+        return numpy.linalg.norm(self.getValue(self.U, self.V) - self.X,
+                                 axis=-1)
+
+    def calcParameterization(self):
+        """Compute a spatial parameterization"""
+
+        u = numpy.zeros(self.Nu, 'd')
+        U = numpy.zeros((self.Nu, self.Nv), 'd')
+        singularSounter = 0
+        # loop over each v, and average the 'u' parameter
+        for j in range(self.Nv):
+            temp = numpy.zeros(self.Nu, 'd')
+
+            for i in range(self.Nu-1):
+                temp[i+1] = temp[i] + numpy.linalg.norm(
+                    self.X[i, j]-self.X[i+1, j])
 
             if temp[-1] == 0: # We have a singular point
                 singularSounter += 1
@@ -1830,48 +3040,93 @@ MUST be defined for task lms or interpolate'
         if s >= 1.0:
             return
 
-        # This is relatively inefficient, but we'll do it for
-        # simplicity just call insertknot for each slice in the
-        # v-direction:
-
-        if direction == 'u':
-            # Insert once to know how many times it was actually inserted
-            # so we know how big to make the new coef:
-            actualR, tNew, coefNew, breakPt = libspline.insertknot(
-                s, r, self.tu, self.ku, self.coef[:, 0].T)
+        axis = ['u', 'v'].index(direction)
+        nCtl = self.coef.shape[axis]
+        self.refine(direction, numpy.full(r, s))
+        t = [self.tu, self.tv][axis]
+        k = [self.ku, self.kv][axis]
 
-            newCoef = numpy.zeros((self.nCtlu + actualR, self.nCtlv, self.nDim))
+        return self.coef.shape[axis] - nCtl, _knotSpan(t, k, s)
 
-            for j in range(self.nCtlv):
-                actualR, tNew, coefSlice, breakPt = libspline.insertknot(
-                    s, r, self.tu, self.ku, self.coef[:, j].T)
-                newCoef[:, j] = coefSlice[:, 0:self.nCtlu+actualR].T
-
-            self.tu = tNew[0:self.nCtlu+self.ku+actualR]
-            self.nCtlu = self.nCtlu + actualR
+    def refine(self, direction, knots):
+        """
+        Insert a set of knots into the surface along either u or v.
+        All the knots are inserted into every row of control points in
+        a single pass.
 
-        elif direction == 'v':
-            actualR, tNew, coefNew, breakPt = libspline.insertknot(
-                s, r, self.tv, self.kv, self.coef[0, :].T)
+        Parameters
+        ----------
+        direction : str
+            Parameteric direction to refine. Either 'u' or 'v'.
+        knots : array
+            Parametric positions of the knots to insert. A value may
+            be repeated to insert it more than once. Knots outside the
+            surface are ignored and the multiplicity of any knot is
+            limited to the order minus one.
+        """
+        if direction not in ['u', 'v']:
+            raise Error("Direction must be one of 'u' or 'v'")
 
-            newCoef = numpy.zeros((self.nCtlu, self.nCtlv+actualR, self.nDim))
+        if direction == 'u':
+            self.tu, self.coef = _insertKnots(self.tu, self.ku, self.coef,
+                                              0, knots)
+        else:
+            self.tv, self.coef = _insertKnots(self.tv, self.kv, self.coef,
+                                              1, knots)
+        self.nCtlu, self.nCtlv = self.coef.shape[0:2]
+        self._fit = None
 
-            for i in range(self.nCtlu):
-                actualR, tNew, coefSlice, breakPt = libspline.insertknot(
-                    s, r, self.tv, self.kv, self.coef[i, :].T)
-                newCoef[i, :] = coefSlice[:, 0:self.nCtlv+actualR].T
+    def removeKnots(self, tol):
+        """
+        Remove as many interior knots as possible, first along u and
+        then along v, while keeping the surface within tol of the
+        original surface. This can greatly reduce the number of
+        control points of interpolated surfaces. The deviation is
+        measured on a grid of 2k points in each span of the original
+        knot vectors.
 
-            self.tv = tNew[0:self.nCtlv+self.kv+actualR]
-            self.nCtlv = self.nCtlv + actualR
+        Parameters
+        ----------
+        tol : float
+            Allowed distance from the original surface
 
-        self.coef = newCoef
+        Returns
+        -------
+        maxError : float
+            Maximum distance between the new and original surfaces
+        ratio : float
+            Original number of control points divided by the new
+            number of control points
+        """
+        u = _spanSamples(self.tu, self.ku)
+        v = _spanSamples(self.tv, self.kv)
+        X = libspline.eval_surface_grid(u, v, self.tu, self.tv, self.ku,
+                                        self.kv, self.coef.T).T
+
+        def getError(tu, tv, coef):
+            values = libspline.eval_surface_grid(u, v, tu, tv, self.ku,
+                                                 self.kv, coef.T).T
+            return numpy.max(numpy.linalg.norm(values - X, axis=-1))
+
+        nCtl = self.nCtlu*self.nCtlv
+        self.tu, self.coef = _removeKnots(
+            self.tu, self.ku, self.coef, 0, tol,
+            lambda t, coef: getError(t, self.tv, coef))
+        self.tv, self.coef = _removeKnots(
+            self.tv, self.kv, self.coef, 1, tol,
+            lambda t, coef: getError(self.tu, t, coef))
+        self.nCtlu, self.nCtlv = self.coef.shape[0:2]
+        self._fit = None
+        self.setEdgeCurves()
 
-        # break_pt is converted to zero based ordering here!!!
-        return actualR, breakPt-1
+        return (getError(self.tu, self.tv, self.coef),
+                nCtl/float(self.nCtlu*self.nCtlv))
 
     def splitSurface(self, direction, s):
         """
-        Split surface into two surfaces at parametric location s
+        Split surface into two surfaces at parametric location s. The
+        knots are inserted once and both surfaces are sliced from the
+        result; this surface is not modified.
 
         Parameters
         ----------
@@ -1899,45 +3154,26 @@ MUST be defined for task lms or interpolate'
             return Surface(tu=self.tu.copy(), tv=self.tv.copy(),
                            ku=self.ku, kv=self.kv, coef=self.coef.copy()), None
 
-        if direction == 'u':
-            r, breakPt = self.insertKnot(direction, s, self.ku-1)
-            # Break point is now at the right so we need to adjust the
-            # counter to the left
-            breakPt = breakPt - self.ku + 2
-
-            tt = self.tu[breakPt]
-            # Process knot vectors:
-            t1 = numpy.hstack((self.tu[0:breakPt+self.ku-1].copy(), tt))/tt
-            t2 = (numpy.hstack((tt, self.tu[breakPt:].copy()))-tt)/(1.0-tt)
-
-            coef1 = self.coef[0:breakPt, :, :].copy()
-            coef2 = self.coef[breakPt-1:, :, :].copy()
-
-            return \
-                Surface(tu=t1, tv=self.tv, ku=self.ku, kv=self.kv, coef=coef1), \
-                Surface(tu=t2, tv=self.tv, ku=self.ku, kv=self.kv, coef=coef2)
-        elif direction == 'v':
-
-            r, breakPt = self.insertKnot(direction, s, self.kv-1)
-            # Break point is now at the right so we need to adjust the
-            # counter to the left
-            breakPt = breakPt - self.kv + 2
+        axis = ['u', 'v'].index(direction)
+        t = [self.tu, self.tv][axis]
+        k = [self.ku, self.kv][axis]
+        t, coef = _insertKnots(t, k, self.coef, axis, [s]*(k-1))
 
-            tt = self.tv[breakPt]
-            # Process knot vectors:
-            t1 = numpy.hstack((self.tv[0:breakPt+self.kv-1].copy(), tt))/tt
-            t2 = (numpy.hstack((tt, self.tv[breakPt:].copy()))-tt)/(1.0-tt)
+        surfs = []
+        for low, high in [(t[0], s), (s, t[-1])]:
+            tNew, coefNew = _window(t, k, coef, axis, low, high)
+            tu, tv = (tNew, self.tv.copy()) if axis == 0 else \
+                (self.tu.copy(), tNew)
+            surfs.append(Surface(tu=tu, tv=tv, ku=self.ku, kv=self.kv,
+                                 coef=coefNew))
 
-            coef1 = self.coef[:, 0:breakPt, :].copy()
-            coef2 = self.coef[:, breakPt-1:, :].copy()
-
-            return \
-                Surface(tu=self.tu, tv=t1, ku=self.ku, kv=self.kv, coef=coef1), \
-                Surface(tu=self.tu, tv=t2, ku=self.ku, kv=self.kv, coef=coef2)
+        return surfs[0], surfs[1]
 
     def windowSurface(self, uvLow, uvHigh):
         """Create a surface that is windowed by the rectangular
-        parametric range defined by uvLow and uvHigh.
+        parametric range defined by uvLow and uvHigh. Knots are
+        inserted at the window bounds and the coefficients are sliced
+        once in each direction.
 
         Parameters
         ----------
@@ -1953,22 +3189,39 @@ MUST be defined for task lms or interpolate'
         surf : pySpline.surface
             A new surface defined only on the interior of uvLow -> uvHigh
         """
+        tu, coef = _window(self.tu, self.ku, self.coef, 0, uvLow[0],
+                           uvHigh[0])
+        tv, coef = _window(self.tv, self.kv, coef, 1, uvLow[1], uvHigh[1])
 
-        # Do u-low split:
-        __, surf = self.splitSurface('u', uvLow[0])
-
-        # Do u-high split (and re-normalize the split coordinate)
-        surf, __ = surf.splitSurface('u', (uvHigh[0]-uvLow[0])/(1.0-uvLow[0]))
+        return Surface(tu=tu, tv=tv, ku=self.ku, kv=self.kv, coef=coef)
 
-        # Do v-low split:
-        __, surf = surf.splitSurface('v', uvLow[1])
+    def setPowerBasis(self, flag=True):
+        """
+        Evaluate the surface from a per-span power basis form of the
+        spline in getValue(). The power basis coefficients are
+        computed once, after which each point only requires a span
+        search and Horner's scheme instead of the b-spline basis
+        recursion. This is worthwhile when the same surface is
+        evaluated many times. The cached form is rebuilt when the knots
+        or coefficients are assigned; coefficients modified in place
+        must be assigned back, e.g. ``surface.coef = surface.coef``. Points
+        outside the range of the knots are evaluated with the
+        b-spline basis since extrapolating the end spans is not
+        accurate. The values are the same as the standard evaluation
+        to within round-off.
 
-        # Do v-high split (and re-normalize the split coordinate)
-        surf, __ = surf.splitSurface('v', (uvHigh[1]-uvLow[1])/(1.0-uvLow[1]))
+        Parameters
+        ----------
+        flag : bool
+            True to use the power basis form, False to go back to the
+            standard evaluation and free the cache.
+        """
+        self._power = _PowerBasis() if flag else None
 
-        return surf
+    def _usePower(self):
+        return getattr(self, '_power', None) is not None
 
-    def getValue(self, u, v):
+    def getValue(self, u, v, grid=False):
         """Evaluate the spline surface at parametric positions u,v. This is the
         main function for spline evaluation.
 
@@ -1978,51 +3231,110 @@ MUST be defined for task lms or interpolate'
             Parametric u values
         v : float, array or matrix (rank 0, 1, or 2)
             Parametric v values
+        grid : bool
+            If True, u and v must be 1D arrays and the surface is
+            evaluated at every combination of u and v. This is
+            equivalent to passing numpy.meshgrid(u, v, indexing='ij')
+            but is much cheaper since each basis function is computed
+            only once.
 
         Returns
         -------
         values : varies
             Spline evaluation at all points u,v. Shape depend on the
             input. If u,v are scalars, values is array of size nDim. If
-            u,v are a 1D list, return is (N,nDim) etc.
+            u,v are a 1D list, return is (N,nDim) etc. With grid=True
+            the return is (len(u), len(v), nDim).
             """
 
+        if grid:
+            vals = libspline.eval_surface_grid(
+                numpy.atleast_1d(u), numpy.atleast_1d(v), self.tu, self.tv,
+                self.ku, self.kv, self.coef.T)
+            return vals.squeeze().T
+
         u = numpy.array(u).T
         v = numpy.array(v).T
         if not u.shape == v.shape:
             raise Error("u and v must have the same shape")
 
-        vals = libspline.eval_surface(numpy.atleast_2d(u), numpy.atleast_2d(v),
-                                     self.tu, self.tv, self.ku, self.kv,
-                                     self.coef.T)
+        if self._usePower():
+            u = numpy.atleast_2d(u)
+            v = numpy.atleast_2d(v)
+            b, pcoef = self._power.update(
+                [self.tu, self.tv], [self.ku, self.kv], self.coef)
+            vals, nOut = libspline.eval_surface_power(u, v, b[0], b[1],
+                                                      pcoef.T)
+            if nOut > 0:
+                mask = _outside(b, u, v)
+                vals[:, mask] = libspline.eval_surface(
+                    u[mask][None, :], v[mask][None, :], self.tu, self.tv,
+                    self.ku, self.kv, self.coef.T)[:, 0, :]
+        else:
+            vals = libspline.eval_surface(
+                numpy.atleast_2d(u), numpy.atleast_2d(v), self.tu, self.tv,
+                self.ku, self.kv, self.coef.T)
         return vals.squeeze().T
 
+    def getBasisMatrix(self, u, v):
+        """
+        Compute the basis function matrix for a fixed set of
+        parametric positions. The returned object can then evaluate
+        the surface at (u, v) for any coefficients much faster than
+        calling getValue() repeatedly.
+
+        Parameters
+        ----------
+        u : float, array or matrix (rank 0, 1, or 2)
+            Parametric u values
+        v : float, array or matrix (rank 0, 1, or 2)
+            Parametric v values
+
+        Returns
+        -------
+        N : BasisMatrix
+            Basis matrix object. N(coef) gives the same result as
+            getValue(u, v) would with these coefficients.
+        """
+        u = numpy.array(u, 'd')
+        v = numpy.array(v, 'd')
+        if not u.shape == v.shape:
+            raise Error("u and v must have the same shape")
+
+        vals, rowPtr, colInd = libspline.surface_jacobian_wrap(
+            u.reshape((1, -1)), v.reshape((1, -1)), self.tu, self.tv,
+            self.ku, self.kv, self.nCtlu, self.nCtlv)
+        N = _assembleMatrix(vals, colInd, rowPtr,
+                            (u.size, self.nCtlu*self.nCtlv))
+
+        return BasisMatrix(N, u.shape, (self.nCtlu, self.nCtlv))
+
     def getDerivative(self, u, v):
         """ Evaluate the first derivatvies of the spline surface
 
         Parameters
         ----------
-        u : float
-            Parametric u value
-        v : float
-            Parametric v value
+        u : float, array or matrix (rank 0, 1, or 2)
+            Parametric u values
+        v : float, array or matrix (rank 0, 1, or 2)
+            Parametric v values
 
         Returns
         -------
-        deriv : array size (2,3)
-            Spline derivative evaluation at u,vall points u,v. Shape
-            depend on the input.
+        deriv : array
+            Spline derivative evaluation at all points u,v. If u,v
+            are scalars, deriv is size (2,nDim). Otherwise the shape
+            is u.shape + (2,nDim).
         """
         u = numpy.array(u)
         v = numpy.array(v)
         if not u.shape == v.shape:
             raise Error("u and v must have the same shape")
-        if not numpy.ndim(u) == 0:
-            raise Error("getDerivative only accepts scalar arguments")
 
-        deriv = libspline.eval_surface_deriv(u, v, self.tu, self.tv, self.ku,
-                                             self.kv, self.coef.T)
-        return deriv.T
+        deriv = libspline.eval_surface_deriv_m(
+            numpy.atleast_2d(u.T), numpy.atleast_2d(v.T), self.tu, self.tv,
+            self.ku, self.kv, self.coef.T)
+        return deriv.T.reshape(u.shape + (2, self.nDim))
 
     def getSecondDerivative(self, u, v):
         """ Evaluate the second derivatvies of the spline surface
@@ -2032,27 +3344,68 @@ MUST be defined for task lms or interpolate'
 
         Parameters
         ----------
-        u : float
-            Parametric u value
-        v : float
-            Parametric v value
+        u : float, array or matrix (rank 0, 1, or 2)
+            Parametric u values
+        v : float, array or matrix (rank 0, 1, or 2)
+            Parametric v values
 
         Returns
         -------
-        deriv : array size (2,2,3)
-            Spline derivative evaluation at u,vall points u,v. Shape
-            depend on the input.
+        deriv : array
+            Spline second derivative evaluation at all points u,v. If
+            u,v are scalars, deriv is size (2,2,nDim). Otherwise the
+            shape is u.shape + (2,2,nDim).
         """
         u = numpy.array(u)
         v = numpy.array(v)
         if not u.shape == v.shape:
             raise Error("u and v must have the same shape")
-        if not numpy.ndim(u) == 0:
-            raise Error("getSecondDerivative only accepts scalar arguments")
 
-        deriv = libspline.eval_surface_deriv2(u, v, self.tu, self.tv, self.ku,
-                                             self.kv, self.coef.T)
-        return deriv.T
+        deriv = libspline.eval_surface_deriv2_m(
+            numpy.atleast_2d(u.T), numpy.atleast_2d(v.T), self.tu, self.tv,
+            self.ku, self.kv, self.coef.T)
+        return deriv.T.reshape(u.shape + (2, 2, self.nDim))
+
+    def evaluate(self, u, v, order=2):
+        """Evaluate the spline surface and its derivatives at
+        parametric positions u,v in a single pass. The basis
+        functions are only computed once per point, so this is
+        cheaper than calling getValue(), getDerivative() and
+        getSecondDerivative() separately.
+
+        Parameters
+        ----------
+        u : float, array or matrix (rank 0, 1, or 2)
+            Parametric u values
+        v : float, array or matrix (rank 0, 1, or 2)
+            Parametric v values
+        order : int
+            Highest derivative to compute. Must be 0, 1 or 2.
+
+        Returns
+        -------
+        result : list
+            [values, deriv, deriv2] truncated to order+1 entries. The
+            entries have the shapes returned by getValue(),
+            getDerivative() and getSecondDerivative() respectively.
+        """
+        if order not in [0, 1, 2]:
+            raise Error("order must be 0, 1 or 2")
+
+        u = numpy.array(u)
+        v = numpy.array(v)
+        if not u.shape == v.shape:
+            raise Error("u and v must have the same shape")
+
+        vals, deriv, deriv2 = libspline.eval_surface_derivs(
+            numpy.atleast_2d(u.T), numpy.atleast_2d(v.T), self.tu, self.tv,
+            self.ku, self.kv, self.coef.T, order)
+        nDim = vals.shape[0]
+        result = [vals.squeeze().T,
+                  deriv.T.reshape(u.shape + (2, nDim)),
+                  deriv2.T.reshape(u.shape + (2, 2, nDim))]
+
+        return result[:order+1]
 
     def getBounds(self):
         """Determine the extents of the surface
@@ -2119,19 +3472,18 @@ MUST be defined for task lms or interpolate'
         if not len(x0) == len(u) == len(v):
             raise Error("The length of x0 and u, v must be the same")
 
-        # If necessary get brute-force starting point
+        # If necessary get starting point from the discrete data
         if numpy.any(u<0) or numpy.any(u>1) or numpy.any(v<0):
-            self.computeData()
-            u, v = libspline.point_surface_start(
-                x0.T, self.udata, self.vdata, self.data.T)
+            ind = _closestData(self, x0)
+            i, j = numpy.unravel_index(ind, self.data.shape[0:2])
+            u = self.udata[i]
+            v = self.vdata[j]
 
-        D = numpy.zeros_like(x0)
-        for i in range(len(x0)):
-            u[i], v[i], D[i] = libspline.point_surface(
-                x0[i], self.tu, self.tv, self.ku, self.kv, self.coef.T,
-                nIter, eps, u[i], v[i])
+        u, v, D = libspline.point_surface_batch(
+            x0.T, self.tu, self.tv, self.ku, self.kv, self.coef.T,
+            nIter, eps, u, v)
 
-        return u.squeeze(), v.squeeze(), D.squeeze()
+        return u.squeeze(), v.squeeze(), D.T.squeeze()
 
     def projectCurve(self, inCurve, nIter=25, eps=1e-10, **kwargs):
         """
@@ -2201,8 +3553,8 @@ MUST be defined for task lms or interpolate'
             self.udata = self.edgeCurves[0].sdata
             self.edgeCurves[2].calcInterpolatedGrevillePoints()
             self.vdata = self.edgeCurves[2].sdata
-            [V, U] = numpy.meshgrid(self.vdata, self.udata)
-            self.data = self.getValue(U, V)
+            self.data = self.getValue(self.udata, self.vdata, grid=True)
+            self.dataTree = None
 
     def writeDirections(self, handle, isurf):
         """Write out and indication of the surface direction"""
@@ -2475,11 +3827,17 @@ class Volume(object):
      0           1      |         0             |
    """
 
+    tu = _splineData('tu')
+    tv = _splineData('tv')
+    tw = _splineData('tw')
+    coef = _splineData('coef')
+
     def __init__(self, recompute=True, **kwargs):
         self.faceSurfaces = [None, None, None, None, None, None]
         self.edgeCurves = [None, None, None, None, None, None,
                             None, None, None, None, None, None]
         self.data = None
+        self.dataTree = None
         self.udata = None
         self.vdata = None
         self.wdata = None
@@ -2610,9 +3968,14 @@ MUST be defined for task lms or interpolate'
                 self.nIter = 1
 
             if 'u' in kwargs and 'v' in kwargs and 'w' in kwargs:
-                self.u = checkInput(kwargs['u'], 'u', float, 1)
-                self.v = checkInput(kwargs['v'], 'v', float, 1)
-                self.w = checkInput(kwargs['w'], 'w', float, 1)
+                self.u = checkInput(kwargs['u'], 'u', float, 1, (self.Nu, ))
+                self.v = checkInput(kwargs['v'], 'v', float, 1, (self.Nv, ))
+                self.w = checkInput(kwargs['w'], 'w', float, 1, (self.Nw, ))
+                self.u = self.u/self.u[-1]
+                self.v = self.v/self.v[-1]
+                self.w = self.w/self.w[-1]
+                [self.U, self.V, self.W] = numpy.meshgrid(
+                    self.u, self.v, self.w, indexing='ij')
             else:
                 if self.nDim == 3:
                     self.calcParameterization()
@@ -2635,34 +3998,89 @@ MUST be defined for task lms or interpolate'
         # end if (Interpolation type)
 
     def recompute(self):
-        """Recompute the volume if any driving data has been modified"""
-
-        self.setCoefSize()
+        """Recompute the volume if any driving data has been modified.
+        If the parameterization is a tensor product grid (e.g. u, v
+        and w were given), the fit is done as successive 1D fits along
+        u, v and w. Otherwise the full basis matrix is assembled and
+        factorized."""
+
+        grid = _tensorGrid(self.U, self.V, self.W)
+        if grid is not None:
+            Ns = [_curveJacobian(grid[0], self.tu, self.ku, self.nCtlu),
+                  _curveJacobian(grid[1], self.tv, self.kv, self.nCtlv),
+                  _curveJacobian(grid[2], self.tw, self.kw, self.nCtlw)]
+            self._fit = _SeparableFit(Ns, self.interp)
+        else:
+            vals, rowPtr, colInd = libspline.volume_jacobian_wrap(\
+                self.U.T, self.V.T, self.W.T, self.tu, self.tv, self.tw,
+                self.ku, self.kv, self.kw, self.nCtlu, self.nCtlv,
+                self.nCtlw)
+
+            N = _assembleMatrix(vals, colInd, rowPtr,
+                                (self.Nu*self.Nv*self.Nw,
+                                 self.nCtlu*self.nCtlv*self.nCtlw))
+            if self.interp:
+                self._fit = _LinearFit(_factorize(N), sparse.identity(
+                    N.shape[0]), N.shape[1])
+            else:
+                self._fit = _LinearFit(_factorize(
+                    N.transpose()*N, symmetric=True), N.transpose(),
+                                       N.shape[1])
 
-        vals, rowPtr, colInd = libspline.volume_jacobian_wrap(\
-            self.U, self.V, self.W, self.tu, self.tv, self.tw, self.ku, \
-                self.kv, self.kw, self.nCtlu, self.nCtlv, self.nCtlw)
+        self.coef = self._fit.solve(self.X).reshape(
+            (self.nCtlu, self.nCtlv, self.nCtlw, self.nDim))
+        self._fitState = _fitState([self.tu, self.tv, self.tw], self.coef)
+        self.setFaceSurfaces()
+        self.setEdgeCurves()
 
-        N = _assembleMatrix(vals, colInd, rowPtr,
-                             (self.Nu*self.Nv*self.Nw,
-                              self.nCtlu*self.nCtlv*self.nCtlw))
-        if self.interp:
-            # Factorize once for efficiency
-            solve = linalg.dsolve.factorized( N )
-            for idim in range(self.nDim):
-                self.coef[:, :, :, idim] =  solve(
-                    self.X[:, :, :, idim].flatten()).reshape(
-                    [self.nCtlu, self.nCtlv, self.nCtlw])
-        else:
-            solve = linalg.dsolve.factorized(N.transpose()*N)
-            for idim in range(self.nDim):
-                rhs  = N.transpose()*self.X[:, :, :, idim].flatten()
-                self.coef[:, :, :, idim] = solve(rhs).reshape(
-                    [self.nCtlu, self.nCtlv, self.nCtlw])
+    def refit(self, X):
+        """
+        Fit new data with the same parameters and knots as the last
+        fit. The factorization from that fit is reused, so only a
+        back substitution is required.
 
+        Parameters
+        ----------
+        X : array, size (Nu, Nv, Nw, nDim)
+            New data. It must have the same shape as the original
+            data.
+        """
+        self._checkFit()
+        X = numpy.array(X, 'd').reshape(self.X.shape)
+        self.coef = self._fit.solve(X).reshape(self.coef.shape)
+        self.X = X
         self.setFaceSurfaces()
         self.setEdgeCurves()
 
+    def refitAdjoint(self, coefBar):
+        """
+        Transpose of the refit() operation. Given the derivative of a
+        function with respect to the coefficients, return its
+        derivative with respect to the data X.
+
+        Parameters
+        ----------
+        coefBar : array, size (nCtlu, nCtlv, nCtlw, nDim)
+            Derivative of a function with respect to the coefficients
+
+        Returns
+        -------
+        XBar : array, size (Nu, Nv, Nw, nDim)
+            Derivative of the function with respect to the data
+        """
+        self._checkFit()
+        coefBar = numpy.array(coefBar, 'd').reshape(self.coef.shape)
+        if isinstance(self._fit, _LinearFit):
+            coefBar = coefBar.reshape((-1, self.nDim))
+
+        return self._fit.solveT(coefBar).reshape(self.X.shape)
+
+    def _checkFit(self):
+        if getattr(self, '_fit', None) is None:
+            raise Error("refit() requires a volume that was fit to data.")
+        _checkFitState(self._fitState, [self.tu, self.tv, self.tw],
+                       self.coef)
+
     def setCoefSize(self):
         self.coef = numpy.zeros((self.nCtlu, self.nCtlv, self.nCtlw, self.nDim))
 
@@ -3028,7 +4446,33 @@ MUST be defined for task lms or interpolate'
         """
         return self.getValue(u, v, w)
 
-    def getValue(self, u, v, w):
+    def setPowerBasis(self, flag=True):
+        """
+        Evaluate the volume from a per-span power basis form of the
+        spline in getValue(). The power basis coefficients are
+        computed once, after which each point only requires a span
+        search and Horner's scheme instead of the b-spline basis
+        recursion. This is worthwhile when the same volume is
+        evaluated many times. The cached form is rebuilt when the knots
+        or coefficients are assigned; coefficients modified in place
+        must be assigned back, e.g. ``volume.coef = volume.coef``. Points
+        outside the range of the knots are evaluated with the
+        b-spline basis since extrapolating the end spans is not
+        accurate. The values are the same as the standard evaluation
+        to within round-off.
+
+        Parameters
+        ----------
+        flag : bool
+            True to use the power basis form, False to go back to the
+            standard evaluation and free the cache.
+        """
+        self._power = _PowerBasis() if flag else None
+
+    def _usePower(self):
+        return getattr(self, '_power', None) is not None
+
+    def getValue(self, u, v, w, grid=False):
         """Get the value at the volume points(s) u, v, w. This is the
         main evaluation routine for the volume object.
 
@@ -3040,12 +4484,24 @@ MUST be defined for task lms or interpolate'
             v position
         w : scalar, vector or matrix or tensor of values
             w position
+        grid : bool
+            If True, u, v and w must be 1D arrays and the volume is
+            evaluated at every combination of u, v and w. Each basis
+            function is only computed once.
 
         Returns
         -------
         values : scalar, vector, matrix or tensor of values
-           The spline evaluation at (u, v, w)
+           The spline evaluation at (u, v, w). With grid=True the
+           shape is (len(u), len(v), len(w), nDim).
            """
+        if grid:
+            vals = libspline.eval_volume_grid(
+                numpy.atleast_1d(u), numpy.atleast_1d(v), numpy.atleast_1d(w),
+                self.tu, self.tv, self.tw, self.ku, self.kv, self.kw,
+                self.coef.T)
+            return vals.squeeze().T
+
         u = numpy.atleast_3d(u).T
         v = numpy.atleast_3d(v).T
         w = numpy.atleast_3d(w).T
@@ -3053,10 +4509,171 @@ MUST be defined for task lms or interpolate'
         if not u.shape == v.shape == w.shape:
             raise Error("u and v must have the same shape")
             
-        vals = libspline.eval_volume(u, v, w, self.tu, self.tv, self.tw,
-                                    self.ku, self.kv, self.kw, self.coef.T)
+        if self._usePower():
+            b, pcoef = self._power.update(
+                [self.tu, self.tv, self.tw], [self.ku, self.kv, self.kw],
+                self.coef)
+            vals, nOut = libspline.eval_volume_power(
+                u, v, w, b[0], b[1], b[2], pcoef.T)
+            if nOut > 0:
+                mask = _outside(b, u, v, w)
+                vals[:, mask] = libspline.eval_volume(
+                    u[mask][None, None, :], v[mask][None, None, :],
+                    w[mask][None, None, :], self.tu, self.tv, self.tw,
+                    self.ku, self.kv, self.kw, self.coef.T)[:, 0, 0, :]
+        else:
+            vals = libspline.eval_volume(u, v, w, self.tu, self.tv, self.tw,
+                                         self.ku, self.kv, self.kw,
+                                         self.coef.T)
         return vals.squeeze().T
 
+    def getBasisMatrix(self, u, v, w):
+        """
+        Compute the basis function matrix for a fixed set of
+        parametric positions. The returned object can then evaluate
+        the volume at (u, v, w) for any coefficients much faster than
+        calling getValue() repeatedly.
+
+        Parameters
+        ----------
+        u : scalar, vector or matrix or tensor of values
+            u position
+        v : scalar, vector or matrix or tensor of values
+            v position
+        w : scalar, vector or matrix or tensor of values
+            w position
+
+        Returns
+        -------
+        N : BasisMatrix
+            Basis matrix object. N(coef) gives the same result as
+            getValue(u, v, w) would with these coefficients.
+        """
+        u = numpy.array(u, 'd')
+        v = numpy.array(v, 'd')
+        w = numpy.array(w, 'd')
+        if not u.shape == v.shape == w.shape:
+            raise Error("u, v, and w must have the same shape")
+
+        vals, rowPtr, colInd = libspline.volume_jacobian_wrap(
+            u.reshape((1, 1, -1)), v.reshape((1, 1, -1)),
+            w.reshape((1, 1, -1)), self.tu, self.tv, self.tw, self.ku,
+            self.kv, self.kw, self.nCtlu, self.nCtlv, self.nCtlw)
+        N = _assembleMatrix(vals, colInd, rowPtr,
+                            (u.size, self.nCtlu*self.nCtlv*self.nCtlw))
+
+        return BasisMatrix(N, u.shape, (self.nCtlu, self.nCtlv, self.nCtlw))
+
+    def getDerivative(self, u, v, w):
+        """Evaluate the first derivatives of the volume at the point(s)
+        u, v, w.
+
+        Parameters
+        ----------
+        u : scalar, vector or matrix or tensor of values
+            u position
+        v : scalar, vector or matrix or tensor of values
+            v position
+        w : scalar, vector or matrix or tensor of values
+            w position
+
+        Returns
+        -------
+        deriv : array
+            The derivatives with respect to u, v and w. If u, v, w
+            are scalars, deriv is size (3, nDim). Otherwise the shape
+            is u.shape + (3, nDim).
+        """
+        u = numpy.array(u)
+        v = numpy.array(v)
+        w = numpy.array(w)
+        if not u.shape == v.shape == w.shape:
+            raise Error("u, v and w must have the same shape")
+
+        deriv = libspline.eval_volume_deriv_m(
+            numpy.atleast_3d(u.T), numpy.atleast_3d(v.T),
+            numpy.atleast_3d(w.T), self.tu, self.tv, self.tw,
+            self.ku, self.kv, self.kw, self.coef.T)
+        return deriv.T.reshape(u.shape + (3, self.coef.shape[-1]))
+
+    def getSecondDerivative(self, u, v, w):
+        """Evaluate the second derivatives of the volume at the
+        point(s) u, v, w. deriv[i, j] is the derivative with respect
+        to parametric directions i and j.
+
+        Parameters
+        ----------
+        u : scalar, vector or matrix or tensor of values
+            u position
+        v : scalar, vector or matrix or tensor of values
+            v position
+        w : scalar, vector or matrix or tensor of values
+            w position
+
+        Returns
+        -------
+        deriv : array
+            The second derivatives. If u, v, w are scalars, deriv is
+            size (3, 3, nDim). Otherwise the shape is
+            u.shape + (3, 3, nDim).
+        """
+        u = numpy.array(u)
+        v = numpy.array(v)
+        w = numpy.array(w)
+        if not u.shape == v.shape == w.shape:
+            raise Error("u, v and w must have the same shape")
+
+        deriv = libspline.eval_volume_deriv2_m(
+            numpy.atleast_3d(u.T), numpy.atleast_3d(v.T),
+            numpy.atleast_3d(w.T), self.tu, self.tv, self.tw,
+            self.ku, self.kv, self.kw, self.coef.T)
+        return deriv.T.reshape(u.shape + (3, 3, self.coef.shape[-1]))
+
+    def evaluate(self, u, v, w, order=2):
+        """Evaluate the volume and its derivatives at the point(s)
+        u, v, w in a single pass. The basis functions are only
+        computed once per point, so this is cheaper than calling
+        getValue(), getDerivative() and getSecondDerivative()
+        separately.
+
+        Parameters
+        ----------
+        u : scalar, vector or matrix or tensor of values
+            u position
+        v : scalar, vector or matrix or tensor of values
+            v position
+        w : scalar, vector or matrix or tensor of values
+            w position
+        order : int
+            Highest derivative to compute. Must be 0, 1 or 2.
+
+        Returns
+        -------
+        result : list
+            [values, deriv, deriv2] truncated to order+1 entries. The
+            entries have the shapes returned by getValue(),
+            getDerivative() and getSecondDerivative() respectively.
+        """
+        if order not in [0, 1, 2]:
+            raise Error("order must be 0, 1 or 2")
+
+        u = numpy.array(u)
+        v = numpy.array(v)
+        w = numpy.array(w)
+        if not u.shape == v.shape == w.shape:
+            raise Error("u, v and w must have the same shape")
+
+        vals, deriv, deriv2 = libspline.eval_volume_derivs(
+            numpy.atleast_3d(u.T), numpy.atleast_3d(v.T),
+            numpy.atleast_3d(w.T), self.tu, self.tv, self.tw,
+            self.ku, self.kv, self.kw, self.coef.T, order)
+        nDim = vals.shape[0]
+        result = [vals.squeeze().T,
+                  deriv.T.reshape(u.shape + (3, nDim)),
+                  deriv2.T.reshape(u.shape + (3, 3, nDim))]
+
+        return result[:order+1]
+
     def getValueEdge(self, edge, s):
         """Get the value at the volume points(s) u, v, w
 
@@ -3211,18 +4828,18 @@ MUST be defined for task lms or interpolate'
         if not len(x0) == len(u) == len(v) == len(w): 
             raise Error("The length of x0 and u, v, w must be the same")
 
-        # If necessary get brute-force starting point
+        # If necessary get starting point from the discrete data
         if numpy.any(u<0) or numpy.any(u>1) or numpy.any(v<0) or numpy.any(v>1):
-            self.computeData()
-            u, v, w = libspline.point_volume_start(
-                x0.real.T, self.udata, self.vdata, self.wdata, self.data.T)
-        D = numpy.zeros_like(x0)
-        for i in range(len(x0)):
-            u[i], v[i], w[i], D[i] = libspline.point_volume(
-                x0[i].real, self.tu, self.tv, self.tw, self.ku, self.kv,
-                self.kw, self.coef.T, nIter, eps, u[i], v[i], w[i])
+            ind = _closestData(self, x0.real)
+            i, j, k = numpy.unravel_index(ind, self.data.shape[0:3])
+            u = self.udata[i]
+            v = self.vdata[j]
+            w = self.wdata[k]
+        u, v, w, D = libspline.point_volume_batch(
+            x0.real.T, self.tu, self.tv, self.tw, self.ku, self.kv,
+            self.kw, self.coef.T, nIter, eps, u, v, w)
 
-        return u.squeeze(), v.squeeze(), w.squeeze(), D.squeeze()
+        return u.squeeze(), v.squeeze(), w.squeeze(), D.T.squeeze()
 
     def computeData(self):
         """
@@ -3238,16 +4855,9 @@ MUST be defined for task lms or interpolate'
             self.vdata = self.edgeCurves[2].sdata
             self.edgeCurves[8].calcInterpolatedGrevillePoints()
             self.wdata = self.edgeCurves[8].sdata
-            U = numpy.zeros((len(self.udata), len(self.vdata), len(self.wdata)))
-            V = numpy.zeros((len(self.udata), len(self.vdata), len(self.wdata)))
-            W = numpy.zeros((len(self.udata), len(self.vdata), len(self.wdata)))
-            for i in range(len(self.udata)):
-                for j in range(len(self.vdata)):
-                    for k in range(len(self.wdata)):
-                        U[i, j, k] = self.udata[i]
-                        V[i, j, k] = self.vdata[j]
-                        W[i, j, k] = self.wdata[k]
-            self.data = self.getValue(U, V, W)
+            self.data = self.getValue(self.udata, self.vdata, self.wdata,
+                                      grid=True)
+            self.dataTree = None
 
     def insertKnot(self, direction, s, r):
         """
@@ -3277,62 +4887,122 @@ MUST be defined for task lms or interpolate'
         if s >= 1.0:
             return
 
-        # This is relatively inefficient, but we'll do it for
-        # simplicity just call insertknot for each slab 
+        axis = ['u', 'v', 'w'].index(direction)
+        nCtl = self.coef.shape[axis]
+        self.refine(direction, numpy.full(r, s))
+        t = [self.tu, self.tv, self.tw][axis]
+        k = [self.ku, self.kv, self.kw][axis]
 
-        if direction == 'u':
-            # Insert once to know how many times it was actually inserted
-            # so we know how big to make the new coef:
-            actualR, tNew, coefNew, breakPt = libspline.insertknot(
-                s, r, self.tu, self.ku, self.coef[:, 0, 0].T)
-
-            newCoef = numpy.zeros((self.nCtlu + actualR, self.nCtlv, 
-                                   self.nCtlw, self.nDim))
-            for k in range(self.nCtlvw):
-                for j in range(self.nCtlv):
-                    actualR, tNew, coefSlice, breakPt = libspline.insertknot(
-                        s, r, self.tu, self.ku, self.coef[:, j, k].T)
-                    newCoef[:, j, k] = coefSlice[:, 0:self.nCtlu+actualR].T
-
-            self.tu = tNew[0:self.nCtlu+self.ku+actualR]
-            self.nCtlu = self.nCtlu + actualR
+        return self.coef.shape[axis] - nCtl, _knotSpan(t, k, s)
+
+    def refine(self, direction, knots):
+        """
+        Insert a set of knots into the volume along u, v or w. All the
+        knots are inserted into every line of control points in a
+        single pass.
+
+        Parameters
+        ----------
+        direction : str
+            Parameteric direction to refine. Either 'u', 'v', or 'w'
+        knots : array
+            Parametric positions of the knots to insert. A value may
+            be repeated to insert it more than once. Knots outside the
+            volume are ignored and the multiplicity of any knot is
+            limited to the order minus one.
+        """
+        if direction not in ['u', 'v', 'w']:
+            raise Error("Direction must be one of 'u' or 'v' or 'w'")
 
+        if direction == 'u':
+            self.tu, self.coef = _insertKnots(self.tu, self.ku, self.coef,
+                                              0, knots)
         elif direction == 'v':
-            actualR, tNew, coefNew, breakPt = libspline.insertknot(
-                s, r, self.tv, self.kv, self.coef[0, :, 0].T)
-
-            newCoef = numpy.zeros((self.nCtlu, self.nCtlv+actualR, 
-                                   self.nCtlw, self.nDim))
-
-            for k in range(self.nCtlw):
-                for i in range(self.nCtlu):
-                    actualR, tNew, coefSlice, breakPt = libspline.insertknot(
-                        s, r, self.tv, self.kv, self.coef[i, :, k].T)
-                    newCoef[i, :, k] = coefSlice[:, 0:self.nCtlv+actualR].T
-                    
-            self.tv = tNew[0:self.nCtlv+self.kv+actualR]
-            self.nCtlv = self.nCtlv + actualR
-
-        elif direction == 'w':
-            actualR, tNew, coefNew, breakPt = libspline.insertknot(
-                s, r, self.tw, self.kw, self.coef[0, 0, :].T)
-
-            newCoef = numpy.zeros((self.nCtlu, self.nCtlv, 
-                                   self.nCtlw+actualR, self.nDim))
-
-            for j in range(self.nCtlv):
-                for i in range(self.nCtlu):
-                    actualR, tNew, coefSlice, breakPt = libspline.insertknot(
-                        s, r, self.tw, self.kw, self.coef[i, j, :].T)
-                    newCoef[i, j, :] = coefSlice[:, 0:self.nCtlw+actualR].T
-                    
-            self.tw = tNew[0:self.nCtlw+self.kw+actualR]
-            self.nCtlw = self.nCtlw + actualR
-
-        self.coef = newCoef
+            self.tv, self.coef = _insertKnots(self.tv, self.kv, self.coef,
+                                              1, knots)
+        else:
+            self.tw, self.coef = _insertKnots(self.tw, self.kw, self.coef,
+                                              2, knots)
+        self.nCtlu, self.nCtlv, self.nCtlw = self.coef.shape[0:3]
+        self._fit = None
 
-        # break_pt is converted to zero based ordering here!!!
-        return actualR, breakPt-1
+    def splitVolume(self, direction, s):
+        """
+        Split the volume into two volumes at parametric location s.
+        The knots are inserted once and both volumes are sliced from
+        the result; this volume is not modified.
+
+        Parameters
+        ----------
+        direction : str
+            Parameteric direction along which to split. Either 'u',
+            'v' or 'w'.
+        s : float
+            Parametric position along 'direction' to split
+
+        Returns
+        -------
+        vol1 : pySpline.Volume
+            Lower part of the volume. None if s <= 0
+
+        vol2 : pySpline.Volume
+            Upper part of the volume. None if s >= 1
+        """
+        if direction not in ['u', 'v', 'w']:
+            raise Error("Direction must be one of 'u' or 'v' or 'w'")
+
+        knots = [self.tu, self.tv, self.tw]
+        orders = [self.ku, self.kv, self.kw]
+        if s <= 0.0:
+            return None, self._copyVolume(knots, self.coef)
+        if s >= 1.0:
+            return self._copyVolume(knots, self.coef), None
+
+        axis = ['u', 'v', 'w'].index(direction)
+        t, coef = _insertKnots(knots[axis], orders[axis], self.coef, axis,
+                               [s]*(orders[axis]-1))
+
+        vols = []
+        for low, high in [(t[0], s), (s, t[-1])]:
+            knots[axis], coefNew = _window(t, orders[axis], coef, axis, low,
+                                           high)
+            vols.append(self._copyVolume(knots, coefNew))
+
+        return vols[0], vols[1]
+
+    def windowVolume(self, uvwLow, uvwHigh):
+        """
+        Create a volume that is windowed by the parametric box defined
+        by uvwLow and uvwHigh. Knots are inserted at the window bounds
+        and the coefficients are sliced once in each direction.
+
+        Parameters
+        ----------
+        uvwLow : list or array of length 3
+           (u,v,w) coordinates of the lower corner of the parametric box
+        uvwHigh : list or array of length 3
+           (u,v,w) coordinates of the upper corner of the parametric box
+
+        Returns
+        -------
+        vol : pySpline.Volume
+            A new volume defined only on the interior of uvwLow -> uvwHigh
+        """
+        knots = [self.tu, self.tv, self.tw]
+        orders = [self.ku, self.kv, self.kw]
+        coef = self.coef
+        for axis in range(3):
+            knots[axis], coef = _window(knots[axis], orders[axis], coef, axis,
+                                        uvwLow[axis], uvwHigh[axis])
+
+        return self._copyVolume(knots, coef)
+
+    def _copyVolume(self, knots, coef):
+        """Create a new volume with the orders of this volume and the
+        given knots and coefficients"""
+        return Volume(ku=self.ku, kv=self.kv, kw=self.kw,
+                      tu=knots[0].copy(), tv=knots[1].copy(),
+                      tw=knots[2].copy(), coef=coef.copy())
 
     def writeTecplot(self, fileName, vols=True, coef=True, orig=False):
         """Write the volume to a tecplot data file.
@@ -3362,6 +5032,490 @@ MUST be defined for task lms or interpolate'
             writeTecplot3D(f, 'orig_data', self.X)
         closeTecplot(f)
 
+class QuadADT(object):
+    """
+    Create a persistent alternating digital tree (ADT) for finding
+    the closest point on a set of quadrilaterals. This is the same
+    search as libspline.adtprojections.searchquads, but the tree is
+    built once and can then be searched any number of times. When
+    the nodes move but the connectivity does not, the tree can be
+    refit with update() instead of being rebuilt.
+
+    The tree is stored in the compiled library and must be released
+    with free() once it is no longer required.
+
+    Parameters
+    ----------
+    pts : array of size (nPts, 3)
+        Coordinates of the quad nodes
+    conn : int array of size (nConn, 4)
+        Quad connectivity. As for searchquads, the node indices are
+        1-based.
+
+    Examples
+    --------
+    >>> adt = pySpline.QuadADT(pts, conn)
+    >>> faceID, uv = adt.search(searchPts)
+    >>> adt.update(newPts)
+    >>> faceID, uv = adt.search(searchPts)
+    >>> adt.free()
+    """
+    def __init__(self, pts, conn):
+        pts = numpy.atleast_2d(pts)
+        conn = numpy.atleast_2d(conn)
+        self.nPts = len(pts)
+        self.nConn = len(conn)
+        self.adtIndex = libspline.adtprojections.adtbuildquads(pts.T, conn.T)
+
+    def search(self, searchPts):
+        """
+        Find the closest point on the quads for each of the search
+        points
+
+        Parameters
+        ----------
+        searchPts : array of size (N, 3)
+            Points to search for
+
+        Returns
+        -------
+        faceID : int array of length N
+            1-based index of the quad containing the closest point
+        uv : array of size (N, 2)
+            Parametric position of the closest point on each quad
+        """
+        self._checkActive()
+        searchPts = numpy.atleast_2d(searchPts)
+        faceID, uv = libspline.adtprojections.adtsearchquads(
+            self.adtIndex, searchPts.T)
+
+        return faceID, uv.T
+
+    def update(self, pts):
+        """
+        Update the node coordinates. The structure of the tree is kept
+        and only the bounding boxes are recomputed, which is much
+        cheaper than building a new tree.
+
+        Parameters
+        ----------
+        pts : array of size (nPts, 3)
+            New coordinates of the quad nodes. The number of nodes
+            must be unchanged.
+        """
+        self._checkActive()
+        pts = numpy.atleast_2d(pts)
+        if len(pts) != self.nPts:
+            raise Error("The number of points cannot change when updating "
+                        "the ADT. Expected %d points, but %d were given." % (
+                            self.nPts, len(pts)))
+        libspline.adtprojections.adtupdatequads(self.adtIndex, pts.T)
+
+    def free(self):
+        """Release the memory used by the tree"""
+        if self.adtIndex is not None:
+            libspline.adtprojections.adtdeallocate(self.adtIndex)
+            self.adtIndex = None
+
+    def _checkActive(self):
+        if self.adtIndex is None:
+            raise Error("This ADT has already been freed.")
+
+class BasisMatrix(object):
+    """
+    Sparse basis function matrix for a fixed set of parametric
+    locations. Evaluating a spline at a fixed set of parameters is a
+    linear function of the coefficients, values = N * coef. This class
+    stores N so that the spline can be evaluated for any number of new
+    coefficient arrays without repeating the span search and basis
+    function computation for each point.
+
+    This class is not normally created directly; use the
+    getBasisMatrix() method of :class:`Curve`, :class:`Surface` or
+    :class:`Volume`.
+
+    Parameters
+    ----------
+    N : scipy sparse matrix of size (nPts, nCtl)
+        The basis function matrix. Row i contains the basis functions
+        for the i'th parametric point, in C order
+    shape : tuple
+        Shape of the parametric arrays used to create N
+    coefShape : tuple
+        Shape of the coefficient array without the nDim dimension
+    """
+    def __init__(self, N, shape, coefShape):
+        self.N = N
+        self.shape = tuple(shape)
+        self.coefShape = tuple(coefShape)
+
+    def getValue(self, coef):
+        """
+        Evaluate the spline for the given coefficients.
+
+        Parameters
+        ----------
+        coef : array
+            Spline coefficients. This must have the same shape as the
+            coef attribute of the spline used to create this matrix.
+
+        Returns
+        -------
+        values : array
+            The spline evaluated at each parametric point. The shape
+            is the same as returned by the spline's getValue().
+        """
+        coef = numpy.asarray(coef)
+        if coef.shape[:-1] != self.coefShape:
+            raise Error("coef must have shape %s + (nDim,). Input was "
+                        "shape %s." % (repr(self.coefShape), repr(coef.shape)))
+
+        nDim = coef.shape[-1]
+        vals = self.N.dot(coef.reshape((self.N.shape[1], nDim)))
+
+        return vals.reshape(self.shape + (nDim,)).squeeze()
+
+    def __call__(self, coef):
+        """
+        Equivalant to getValue()
+        """
+        return self.getValue(coef)
+
+class StreamingFit(object):
+    """
+    Least squares fit of a curve or surface to a set of points that is
+    supplied in chunks. For each chunk the basis matrix N is computed
+    and only N^T W N and N^T W X are kept, so the memory required
+    depends on the number of control points and not on the number of
+    points. Since the points are never all available at once, the knot
+    vectors and the parameters of the points must be given; no
+    parameter correction is done.
+
+    Parameters
+    ----------
+    k : int or list of 2 ints
+        Spline order. Give a single order for a curve and [ku, kv] for
+        a surface.
+    nCtl : int or list of 2 ints
+        Number of control points, in the same form as k
+    t : array or list of 2 arrays
+        Optional knot vectors. If not given, uniform open knot vectors
+        on [0, 1] are used.
+    nDim : int
+        Spatial dimension of the data. Default is 3.
+
+    Examples
+    --------
+    >>> fit = pySpline.StreamingFit([4, 4], [20, 20])
+    >>> for u, v, X in chunks:
+    ...     fit.add([u, v], X)
+    >>> surf = fit.solve()
+
+    A memory-mapped array can be passed directly to add() with a
+    chunkSize so that only chunkSize points are read at a time.
+    """
+    def __init__(self, k, nCtl, t=None, nDim=3):
+        k = numpy.atleast_1d(k)
+        nCtl = numpy.atleast_1d(nCtl)
+        if len(k) not in [1, 2] or len(k) != len(nCtl):
+            raise Error("k and nCtl must both be an int for a curve or "
+                        "both have length 2 for a surface.")
+        self.k = [int(kk) for kk in k]
+        self.nCtl = [int(n) for n in nCtl]
+        if t is None:
+            t = [_uniformKnots(n, kk) for n, kk in zip(self.nCtl, self.k)]
+        elif len(self.k) == 1:
+            t = [t]
+        self.t = [checkInput(t[i], 't', float, 1,
+                             (self.nCtl[i] + self.k[i], ))
+                  for i in range(len(self.k))]
+        self.nDim = nDim
+        nTotal = numpy.prod(self.nCtl)
+        self.NTWN = sparse.csr_matrix((nTotal, nTotal))
+        self.NTWX = numpy.zeros((nTotal, nDim))
+        self.XTWX = numpy.zeros(nDim)
+        self.sumW = 0.0
+        self.nPts = 0
+        self.rms = None
+        self.spline = None
+
+    def add(self, params, X, weights=None, chunkSize=None):
+        """
+        Add a set of points to the fit
+
+        Parameters
+        ----------
+        params : array or list of 2 arrays
+            Parameters of the points. For a surface give [u, v].
+        X : array, size (N, nDim)
+            Points to fit
+        weights : array, size (N)
+            Optional positive weights. By default all weights are 1.0
+        chunkSize : int
+            If given, the points are processed chunkSize at a time.
+            Use this when X is a large memory-mapped array.
+        """
+        if len(self.k) == 1:
+            params = [params]
+        N = len(X)
+        if chunkSize is None:
+            chunkSize = max(N, 1)
+        for i in range(0, N, chunkSize):
+            sl = slice(i, min(i + chunkSize, N))
+            w = None if weights is None else weights[sl]
+            self._addChunk([p[sl] for p in params], X[sl], w)
+
+    def _addChunk(self, params, X, weights):
+        X = numpy.array(X, 'd').reshape((-1, self.nDim))
+        params = [numpy.array(p, 'd').flatten() for p in params]
+        nPts = len(X)
+        for p in params:
+            if len(p) != nPts:
+                raise Error("The number of parameters and points must "
+                            "be the same.")
+        if weights is None:
+            weights = numpy.ones(nPts)
+        else:
+            weights = checkInput(weights, 'weights', float, 1, (nPts, ))
+
+        if len(self.k) == 1:
+            N = _curveJacobian(params[0], self.t[0], self.k[0],
+                               self.nCtl[0])
+        else:
+            vals, rowPtr, colInd = libspline.surface_jacobian_wrap(
+                params[0].reshape((1, -1)), params[1].reshape((1, -1)),
+                self.t[0], self.t[1], self.k[0], self.k[1],
+                self.nCtl[0], self.nCtl[1])
+            N = _assembleMatrix(vals, colInd, rowPtr,
+                                (nPts, self.NTWN.shape[0]))
+
+        WX = weights[:, numpy.newaxis]*X
+        self.NTWN = self.NTWN + (N.transpose()*sparse.diags(weights)*N)
+        self.NTWX += N.transpose()*WX
+        self.XTWX += numpy.sum(WX*X, axis=0)
+        self.sumW += numpy.sum(weights)
+        self.nPts += nPts
+
+    def solve(self, smoothing=0.0):
+        """
+        Solve for the coefficients using all the points added so far.
+        An estimate of the weighted RMS error of the fit is stored in
+        the rms attribute. Since it is computed from the accumulated
+        products it suffers from cancellation and is only accurate to
+        about 1e-8 times the size of the data. Use computeRMS() for
+        the exact value.
+
+        Parameters
+        ----------
+        smoothing : float
+            Weight of a penalty on the second differences of the
+            control points, relative to the mean diagonal of N^T W N.
+            A small value such as 1e-3 keeps the system well-posed when
+            some control points have little or no data.
+
+        Returns
+        -------
+        spline : Curve or Surface
+            The fitted spline
+        """
+        if self.nPts == 0:
+            raise Error("No points have been added to the fit.")
+        A = self.NTWN
+        if smoothing > 0.0:
+            A = A + (smoothing*A.diagonal().mean())*_smoothingPenalty(
+                self.nCtl)
+        coef = _factorize(A, symmetric=True)(self.NTWX)
+        coef = coef.reshape((-1, self.nDim))
+
+        # The residual follows from the accumulated products without
+        # needing the points: r^T W r = X^T W X - 2 c^T N^T W X +
+        # c^T N^T W N c
+        err = (numpy.sum(self.XTWX) - 2*numpy.sum(coef*self.NTWX) +
+               numpy.sum(coef*(self.NTWN*coef)))
+        self.rms = numpy.sqrt(max(err, 0.0)/self.sumW)
+
+        if len(self.k) == 1:
+            self.spline = Curve(k=self.k[0], t=self.t[0], coef=coef)
+        else:
+            self.spline = Surface(ku=self.k[0], kv=self.k[1], tu=self.t[0],
+                                  tv=self.t[1], coef=coef.reshape(
+                                      (self.nCtl[0], self.nCtl[1],
+                                       self.nDim)))
+
+        return self.spline
+
+    def computeRMS(self, params, X, weights=None, chunkSize=None):
+        """
+        Compute the exact weighted RMS error of the last solve() by
+        evaluating the spline at the points. The points are passed
+        again, in the same way as to add(), and are processed
+        chunkSize at a time. The result is also stored in the rms
+        attribute.
+
+        Parameters
+        ----------
+        params : array or list of 2 arrays
+            Parameters of the points. For a surface give [u, v].
+        X : array, size (N, nDim)
+            Points that were fit
+        weights : array, size (N)
+            Optional positive weights. By default all weights are 1.0
+        chunkSize : int
+            If given, the points are processed chunkSize at a time.
+
+        Returns
+        -------
+        rms : float
+            The weighted RMS error
+        """
+        if self.spline is None:
+            raise Error("solve() must be called before computeRMS().")
+        if len(self.k) == 1:
+            params = [params]
+        N = len(X)
+        if chunkSize is None:
+            chunkSize = max(N, 1)
+
+        err = 0.0
+        sumW = 0.0
+        for i in range(0, N, chunkSize):
+            sl = slice(i, min(i + chunkSize, N))
+            p = [numpy.array(pp[sl], 'd').flatten() for pp in params]
+            values = self.spline.getValue(*p).reshape((-1, self.nDim))
+            D = numpy.sum((values - numpy.array(X[sl], 'd').reshape(
+                (-1, self.nDim)))**2, axis=1)
+            w = numpy.ones(len(D)) if weights is None else \
+                numpy.array(weights[sl], 'd')
+            err += numpy.sum(w*D)
+            sumW += numpy.sum(w)
+        self.rms = numpy.sqrt(err/sumW)
+
+        return self.rms
+
+def fitSurface(u, v, X, ku, kv, nCtlu, nCtlv, weights=None, tu=None,
+               tv=None, smoothing=0.0, chunkSize=100000):
+    """
+    LMS fit of a surface to scattered data. Unlike the LMS fit done by
+    :class:`Surface`, the data does not need to be a structured grid;
+    each point just needs its own (u, v) parameters, for example from
+    a projection onto an existing surface.
+
+    Parameters
+    ----------
+    u : array, size (N)
+        u parameters of the points
+    v : array, size (N)
+        v parameters of the points
+    X : array, size (N, nDim)
+        Points to fit
+    ku : int
+        Spline order in u
+    kv : int
+        Spline order in v
+    nCtlu : int
+        Number of control points in u
+    nCtlv : int
+        Number of control points in v
+    weights : array, size (N)
+        Optional positive weights. By default all weights are 1.0
+    tu : array, size (nCtlu + ku)
+        Optional knot vector in u. By default the knots are placed
+        using the distribution of the u parameters.
+    tv : array, size (nCtlv + kv)
+        Optional knot vector in v
+    smoothing : float
+        Weight of a penalty on the second differences of the control
+        points. See :meth:`StreamingFit.solve`. This should be used
+        if there are regions with no data.
+    chunkSize : int
+        Number of points whose basis functions are computed at once.
+        This limits the memory used for very large point sets.
+
+    Returns
+    -------
+    surface : Surface
+        The fitted surface. The RMS error of the fit is stored in the
+        rms attribute.
+    """
+    u = numpy.array(u, 'd').flatten()
+    v = numpy.array(v, 'd').flatten()
+    X = numpy.array(X, 'd')
+    if X.ndim == 1:
+        X = X[:, numpy.newaxis]
+    if not (len(u) == len(v) == len(X)):
+        raise Error("u, v and X must have the same number of points.")
+
+    if tu is None:
+        tu = libspline.knots_lms(numpy.sort(u), nCtlu, ku)
+    if tv is None:
+        tv = libspline.knots_lms(numpy.sort(v), nCtlv, kv)
+
+    fit = StreamingFit([ku, kv], [nCtlu, nCtlv], t=[tu, tv],
+                       nDim=X.shape[1])
+    fit.add([u, v], X, weights=weights, chunkSize=chunkSize)
+    surface = fit.solve(smoothing=smoothing)
+    surface.rms = fit.computeRMS([u, v], X, weights=weights,
+                                 chunkSize=chunkSize)
+
+    return surface
+
+def fitCurves(Xs, s, k, nCtl=None, weights=None):
+    """
+    Fit many curves that share the same parameterization. The knot
+    vector and basis matrix are computed once, the system is
+    factorized once and all the curves are solved for together. This
+    is much faster than creating each curve separately. No parameter
+    correction is done since the parameterization is shared.
+
+    Parameters
+    ----------
+    Xs : array, size (nCurves, N, nDim)
+        The data for each curve
+    s : array, size (N)
+        The parameter values of the data, common to all curves
+    k : int
+        Order of the curves
+    nCtl : int
+        Number of control points for an LMS fit. If not given, the
+        curves interpolate the data.
+    weights : array, size (N)
+        Optional positive weights for the LMS fit. By default all
+        weights are 1.0
+
+    Returns
+    -------
+    curves : list of Curve
+        The fitted curves, in the same order as Xs
+    """
+    Xs = numpy.array(Xs, 'd')
+    if Xs.ndim == 2:
+        Xs = Xs[:, :, numpy.newaxis]
+    nCurves, N, nDim = Xs.shape
+    s = checkInput(s, 's', float, 1, (N, ))
+    k = min(checkInput(k, 'k', int, 0), N)
+
+    rhs = Xs.transpose((1, 0, 2)).reshape((N, nCurves*nDim))
+    if nCtl is None or nCtl >= N:
+        nCtl = N
+        t = libspline.knots_interp(s, numpy.array([], 'd'), k)
+        A = _curveJacobian(s, t, k, nCtl)
+    else:
+        nCtl = checkInput(nCtl, 'nCtl', int, 0)
+        t = libspline.knots_lms(s, nCtl, k)
+        N = _curveJacobian(s, t, k, nCtl)
+        if weights is None:
+            weights = numpy.ones(len(s))
+        W = sparse.diags(checkInput(weights, 'weights', float, 1,
+                                    (len(s), )))
+        A = N.transpose()*W*N
+        rhs = N.transpose()*(W*rhs)
+
+    coef = _factorize(A, symmetric=nCtl < len(s))(rhs)
+    coef = coef.reshape((nCtl, nCurves, nDim))
+
+    return [Curve(k=k, t=t, coef=numpy.ascontiguousarray(coef[:, i]))
+            for i in range(nCurves)]
+
 # For backwards compatibility, the old curve, surface and volume definitions:
 def curve(*args, **kwargs):
     warnings.warn('pySpline.curve has been changed to Curve()')
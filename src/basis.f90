@@ -32,6 +32,16 @@ subroutine basis(t, nctl, k, u, ind, B)
   real(kind=realType)              :: left(0:k-1), right(0:k-1), temp, saved
   integer                          :: j, r, p
 
+  ! Linear and cubic splines are by far the most common so they have
+  ! their own unrolled versions
+  if (k == 2) then
+     call basis2(t, nctl, u, ind, B)
+     return
+  else if (k == 4) then
+     call basis4(t, nctl, u, ind, B)
+     return
+  end if
+
   ! To be consistent with algorithm in The NURBS Book we will use
   ! zero-based ordering here
   B(0) = 1.0
@@ -53,6 +63,109 @@ subroutine basis(t, nctl, k, u, ind, B)
 
 end subroutine basis
 
+subroutine basis2(t, nctl, u, ind, B)
+
+  !***DESCRIPTION
+  !
+  !     Abstract: basis2 is the unrolled version of basis for k=2. The
+  !               operations are done in the same order so the result
+  !               is identical.
+
+  !     Description of Arguments
+  !     Input
+  !     t       - Real, Vector of knots. Size (nctl + 2)
+  !     nctl    - Integer, number of knots
+  !     u       - Real, location for evaluation of basis
+  !     ind     - Integer, position in knot vector such that t(ind) <= x
+  !
+  !     Ouput
+  !     B       - Real, Vector, The 2 basis vector values
+  use precision
+  implicit none
+
+  ! Input
+  real(kind=realType), intent(in)  :: t(nctl+2), u
+  integer,             intent(in)  :: nctl, ind
+
+  ! Output
+  real(kind=realType), intent(out) :: B(0:1)
+
+  ! Working
+  real(kind=realType)              :: left1, right1, temp
+
+  left1  = u - t(ind)
+  right1 = t(ind+1) - u
+  temp = 1.0/(right1+left1)
+  B(0) = right1*temp
+  B(1) = left1*temp
+
+end subroutine basis2
+
+subroutine basis4(t, nctl, u, ind, B)
+
+  !***DESCRIPTION
+  !
+  !     Abstract: basis4 is the unrolled version of basis for k=4. The
+  !               operations are done in the same order so the result
+  !               is identical.
+
+  !     Description of Arguments
+  !     Input
+  !     t       - Real, Vector of knots. Size (nctl + 4)
+  !     nctl    - Integer, number of knots
+  !     u       - Real, location for evaluation of basis
+  !     ind     - Integer, position in knot vector such that t(ind) <= x
+  !
+  !     Ouput
+  !     B       - Real, Vector, The 4 basis vector values
+  use precision
+  implicit none
+
+  ! Input
+  real(kind=realType), intent(in)  :: t(nctl+4), u
+  integer,             intent(in)  :: nctl, ind
+
+  ! Output
+  real(kind=realType), intent(out) :: B(0:3)
+
+  ! Working
+  real(kind=realType)              :: left1, left2, left3
+  real(kind=realType)              :: right1, right2, right3
+  real(kind=realType)              :: temp, saved
+
+  left1  = u - t(ind)
+  left2  = u - t(ind-1)
+  left3  = u - t(ind-2)
+  right1 = t(ind+1) - u
+  right2 = t(ind+2) - u
+  right3 = t(ind+3) - u
+
+  ! Degree 1
+  temp = 1.0/(right1+left1)
+  B(0) = right1*temp
+  B(1) = left1*temp
+
+  ! Degree 2
+  temp = B(0)/(right1+left2)
+  B(0) = right1*temp
+  saved = left2*temp
+  temp = B(1)/(right2+left1)
+  B(1) = saved+right2*temp
+  B(2) = left1*temp
+
+  ! Degree 3
+  temp = B(0)/(right1+left3)
+  B(0) = right1*temp
+  saved = left3*temp
+  temp = B(1)/(right2+left2)
+  B(1) = saved+right2*temp
+  saved = left2*temp
+  temp = B(2)/(right3+left1)
+  B(2) = saved+right3*temp
+  B(3) = left1*temp
+
+end subroutine basis4
+
 subroutine derivBasis(t, nctl, ku, u, ind, n, Bd)
  
   !***DESCRIPTION
@@ -73,7 +186,7 @@ subroutine derivBasis(t, nctl, ku, u, ind, n, Bd)
   !     n       - Integer, order of derivates to evaluate
   !
   !     Ouput 
-  !     Bd      - Real, size(k,k) Basis functions and their derivatives
+  !     Bd      - Real, size(n+1,k) Basis functions and their derivatives
 
   use precision
   implicit none
@@ -83,7 +196,7 @@ subroutine derivBasis(t, nctl, ku, u, ind, n, Bd)
   integer,             intent(in)  :: nctl, ku, ind, n
   
   ! Output
-  real(kind=realType), intent(out) :: Bd(0:n,0:n)
+  real(kind=realType), intent(out) :: Bd(0:n,0:ku-1)
 
   ! Working
   real(kind=realType)              :: left(0:ku-1), right(0:ku-1), saved
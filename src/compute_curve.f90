@@ -9,14 +9,17 @@ subroutine curve_jacobian_wrap(s, sd, t, k, nctl, n, nd, vals, row_ptr, col_ind)
   real(kind=realType)  , intent(inout)   :: vals((n+nd)*k)
   integer              , intent(inout)   :: row_ptr(n+nd+1)
   integer              , intent(inout)   :: col_ind((n+nd)*k)
-  real(kind=realType)                   :: basisu(k), basisud(k,k)
+  real(kind=realType)                   :: basisu(k), basisud(2,k)
   integer                               :: i, j, counter, ileft
 
-  counter = 1
+  ! Each row has exactly k entries so the position of each row in
+  ! the CSR arrays is known up front and the rows are independent.
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, j, counter, ileft, basisu)
   do i=1, n ! Do the values first 
      call findSpan(s(i), k, t, nctl, ileft)
      call basis(t, nctl, k, s(i), ileft, basisu)
 
+     counter = (i-1)*k + 1
      row_ptr(i) = counter-1
      do j=1, k
         col_ind(counter) = ileft-k+j-1
@@ -24,10 +27,12 @@ subroutine curve_jacobian_wrap(s, sd, t, k, nctl, n, nd, vals, row_ptr, col_ind)
         counter = counter + 1
      end do
   end do
+  !$OMP END PARALLEL DO
   do i=1, nd ! Do the derivatives next
      call findSpan(sd(i), k, t, nctl, ileft)
      call derivBasis(t, nctl, k, sd(i), ileft, 1, basisud)
 
+     counter = (n+i-1)*k + 1
      row_ptr(i+n) = counter-1
      do j=1, k
         col_ind(counter) = ileft-k+j-1
@@ -35,7 +40,7 @@ subroutine curve_jacobian_wrap(s, sd, t, k, nctl, n, nd, vals, row_ptr, col_ind)
         counter = counter + 1
      end do
   end do
-  row_ptr(n+nd+1) = counter-1
+  row_ptr(n+nd+1) = (n+nd)*k
 end subroutine curve_jacobian_wrap
 
 subroutine constr_jac(A_val, A_row_ptr, A_col_ind, B_val, B_row_ptr, B_col_ind, C_val, C_row_ptr, C_col_ind, &
@@ -18,7 +18,10 @@ subroutine surface_jacobian_wrap(u, v, tu, tv, ku, kv, nctlu, nctlv, nu, nv, val
   integer                              :: ileftu, ileftv
   integer                              :: i, j, ii, jj, counter
 
-  counter = 1
+  ! Each row has exactly ku*kv entries so the position of each row
+  ! in the CSR arrays is known up front and the rows are independent.
+  !$OMP PARALLEL DO IF(nu*nv > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(i, j, ii, jj, counter, ileftu, ileftv, basisu, basisv)
   do i=1, nu
      do j = 1, nv
         ! Get u interval
@@ -29,6 +32,7 @@ subroutine surface_jacobian_wrap(u, v, tu, tv, ku, kv, nctlu, nctlv, nu, nv, val
         call findSpan(v(j, i), kv, tv, nctlv, ileftv)
         call basis(tv, nctlv, kv, v(j, i), ileftv, basisv)
 
+        counter = ((i-1)*nv + j-1)*ku*kv + 1
         row_ptr( (i-1)*nv + j  ) = counter-1
         do ii=1, ku
            do jj = 1, kv
@@ -40,13 +44,17 @@ subroutine surface_jacobian_wrap(u, v, tu, tv, ku, kv, nctlu, nctlv, nu, nv, val
         end do
      end do
   end do
-  row_ptr(nu*nv+1) = counter-1
+  !$OMP END PARALLEL DO
+  row_ptr(nu*nv+1) = nu*nv*ku*kv
   
 end subroutine surface_jacobian_wrap
 
 subroutine surface_para_corr(tu, tv, ku, kv, u, v, coef, nctlu, nctlv, ndim, nu, nv, X, rms)
 
-  ! Do Hoschek parameter correction
+  ! Do Hoschek parameter correction. Each parameter pair is moved by
+  ! a Newton step towards the foot point of its data point on the
+  ! current surface. Parameters on the boundary are only allowed to
+  ! slide along the boundary and the corners are fixed.
   use precision
   implicit none
 
@@ -62,48 +70,60 @@ subroutine surface_para_corr(tu, tv, ku, kv, u, v, coef, nctlu, nctlv, ndim, nu,
   integer                               :: i, j, jj, max_inner_iter
   real(kind=realType)                   :: D(ndim), D2(ndim)
   real(kind=realType)                   :: val(ndim), deriv(ndim, 2), deriv2(ndim, 2, 2)
-  real(kind=realType)                   :: u_tilde, v_tilde
+  real(kind=realType)                   :: u_tilde(1), v_tilde(1)
   real(kind=realType)                   :: A(2, 2), ki(2), delta(2)
 
   !Functions
-  real(kind=realType)                   :: norm
+  real(kind=realType)                   :: norm, compute_rms_surface
 
   max_inner_iter = 10
-  rms = 0.0
 
-  do i=2, nu-1
-     do j = 2, nv-2
-        call eval_surface(u(j, i), v(j, i), tu, tv, ku, kv, coef, nctlu, nctlv, ndim, val)
-        call eval_surface_deriv(u(j, i), v(j, i), tu, tv, ku, kv, coef, nctlu, nctlv, ndim, deriv)
-        call eval_surface_deriv2(u(j, i), v(j, i), tu, tv, ku, kv, coef, nctlu, nctlv, ndim, deriv2)
+  !$OMP PARALLEL DO IF(nu*nv > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(i, j, jj, D, D2, val, deriv, deriv2, u_tilde, v_tilde, A, ki, delta)
+  do i=1, nu
+     do j=1, nv
+        if ((i == 1 .or. i == nu) .and. (j == 1 .or. j == nv)) then
+           cycle
+        end if
+
+        call eval_surface_derivs(u(j, i), v(j, i), tu, tv, ku, kv, coef, &
+             nctlu, nctlv, ndim, 1, 1, 2, val, deriv, deriv2)
 
         D = val-X(:, j, i)
 
-        A(1, 1) = norm(deriv(:, i), ndim)**2 + dot_product(D, deriv2(:, 1, 1))
+        A(1, 1) = norm(deriv(:, 1), ndim)**2 + dot_product(D, deriv2(:, 1, 1))
         A(1, 2) = dot_product(deriv(:, 1), deriv(:, 2)) + dot_product(D, deriv2(:, 1, 2))
         A(2, 1) = A(1, 2)
         A(2, 2) = norm(deriv(:, 2), ndim)**2 + dot_product(D, deriv2(:, 2, 2))
-        
+
         ki(1) = -dot_product(D, deriv(:, 1))
         ki(2) = -dot_product(D, deriv(:, 2))
-        
-        call solve_2by2(A, ki, delta)
-        
-        if (j .eq.1 .or. j .eq. nv) then
-           delta(1) = 0.0
-        end if
-        if (i .eq.1 .or. i .eq. nu) then
-           delta(2) = 0.0
+
+        delta(:) = 0.0
+        if (i == 1 .or. i == nu) then
+           ! u is fixed on this boundary; 1D Newton step in v
+           if (A(2, 2) /= 0) then
+              delta(2) = ki(2)/A(2, 2)
+           end if
+        else if (j == 1 .or. j == nv) then
+           ! v is fixed on this boundary; 1D Newton step in u
+           if (A(1, 1) /= 0) then
+              delta(1) = ki(1)/A(1, 1)
+           end if
+        else
+           call solve_2by2(A, ki, delta)
         end if
+
         inner_loop: do jj=1, max_inner_iter
-           u_tilde = u(j, i) + delta(1)
-           v_tilde = v(j, i) + delta(2)
+           u_tilde(1) = min(max(u(j, i) + delta(1), tu(1)), tu(nctlu+ku))
+           v_tilde(1) = min(max(v(j, i) + delta(2), tv(1)), tv(nctlv+kv))
 
-           call eval_surface(u_tilde, v_tilde, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, val)
-           D2 = val-X(i, j, :)
+           call eval_surface(u_tilde, v_tilde, tu, tv, ku, kv, coef, nctlu, nctlv, &
+                ndim, 1, 1, val)
+           D2 = val-X(:, j, i)
            if (norm(D, ndim) .ge. norm(D2, ndim)) then
-              u(j, i) = u_tilde
-              v(j, i) = v_tilde
+              u(j, i) = u_tilde(1)
+              v(j, i) = v_tilde(1)
               exit inner_loop
            else
               delta = delta*0.5
@@ -111,29 +131,21 @@ subroutine surface_para_corr(tu, tv, ku, kv, u, v, coef, nctlu, nctlv, ndim, nu,
         end do inner_loop
      end do
   end do
+  !$OMP END PARALLEL DO
 
   ! Lets redo the full RMS
-  rms = 0.0
-
-  do i=1, nu
-     do j=1, nv
-        call eval_surface(u(j, i), v(j, i), tu, tv, ku, kv, coef, nctlu, nctlv, ndim, val)
-        D = X(i, j, :)-val
-        rms = rms + dot_product(D, D)
-     end do
-  end do
-  rms = sqrt(rms/(nu*nv))
+  rms = compute_rms_surface(tu, tv, ku, kv, u, v, coef, nctlu, nctlv, ndim, nu, nv, X)
 
 end subroutine surface_para_corr
 
 function compute_rms_surface(tu, tv, ku, kv, u, v, coef, nctlu, nctlv, ndim, nu, nv, X)
- ! Do Hoschek parameter correction
+ ! Compute the RMS distance between the data and the surface
   use precision
   implicit none
 
   ! Input/Output
   real(kind=realType)  , intent(in)      :: tu(ku+nctlu), tv(kv+nctlv)
-  real(kind=realType)  , intent(inout)   :: u(nv, nu), v(nv, nu)
+  real(kind=realType)  , intent(in)      :: u(nv, nu), v(nv, nu)
   real(kind=realType)  , intent(in)      :: coef(ndim, nctlv, nctlu)
   integer              , intent(in)      :: ku, kv, nctlu, nctlv, ndim, nu, nv
   real(kind=realType)  , intent(in)      :: X(ndim, nv, nu)
@@ -146,7 +158,8 @@ function compute_rms_surface(tu, tv, ku, kv, u, v, coef, nctlu, nctlv, ndim, nu,
   compute_rms_surface = 0.0
   do i=1, nu
      do j=1, nv
-        call eval_surface(u(j, i), v(j, i), tu, tv, ku, kv, coef, nctlu, nctlv, ndim, val)
+        call eval_surface(u(j, i), v(j, i), tu, tv, ku, kv, coef, nctlu, nctlv, ndim, &
+             1, 1, val)
         D = val-X(:, j, i)
         do idim=1, ndim
            compute_rms_surface = compute_rms_surface + D(idim)**2
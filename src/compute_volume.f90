@@ -17,7 +17,11 @@ subroutine volume_jacobian_wrap(u, v, w, tu, tv, tw, ku, kv, kw, nctlu, nctlv, n
   integer                              :: i, j, k, ii, jj, kk, counter, c1, c2
   integer                              :: ileftu, ileftv, ileftw
 
-  counter = 1
+  ! Each row has exactly ku*kv*kw entries so the position of each
+  ! row in the CSR arrays is known up front and the rows are independent.
+  !$OMP PARALLEL DO IF(nu*nv*nw > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(i, j, k, ii, jj, kk, c1, c2, counter, ileftu, ileftv, ileftw, &
+  !$OMP basisu, basisv, basisw)
   do i=1, nu
      do j = 1, nv
         do k=1, nw
@@ -33,6 +37,7 @@ subroutine volume_jacobian_wrap(u, v, w, tu, tv, tw, ku, kv, kw, nctlu, nctlv, n
            call findSpan(w(k, j, i), kw, tw, nctlw, ileftw)
            call basis(tw, nctlw, kw, w(k, j, i), ileftw, basisw)
 
+           counter = ((i-1)*nv*nw + (j-1)*nw + k-1)*ku*kv*kw + 1
            row_ptr( (i-1)*nv*nw + (j-1)*nw + k  ) = counter-1
            do ii=1, ku
               c1 = (ileftu-ku+ii-1)*Nctlv*Nctlw
@@ -48,6 +53,7 @@ subroutine volume_jacobian_wrap(u, v, w, tu, tv, tw, ku, kv, kw, nctlu, nctlv, n
         end do
      end do
   end do
-  row_ptr(nu*nv*nw+1) = counter-1
+  !$OMP END PARALLEL DO
+  row_ptr(nu*nv*nw+1) = nu*nv*nw*ku*kv*kw
 
 end subroutine volume_jacobian_wrap
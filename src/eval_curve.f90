@@ -33,6 +33,7 @@ subroutine eval_curve(s, t, k, coef, nctl, ndim, n, val)
   real(kind=realType)              :: basisu(k)
 
   val(:, :) = 0.0
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, idim, istart, ileft, basisu)
   do i=1, n
      call findSpan(s(i), k, t, nctl, ileft)
      call basis(t, nctl, k, s(i), ileft, basisu)
@@ -43,6 +44,7 @@ subroutine eval_curve(s, t, k, coef, nctl, ndim, n, val)
         end do
      end do
   end do
+  !$OMP END PARALLEL DO
 end subroutine eval_curve
 
 subroutine eval_curve_deriv(s, t, k, coef, nctl, ndim, val)
@@ -136,6 +138,164 @@ subroutine eval_curve_deriv2(s, t, k, coef, nctl, ndim, val)
 
 end subroutine eval_curve_deriv2
 
+subroutine eval_curve_deriv_m(s, t, k, coef, nctl, ndim, n, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_curve_deriv_m is a vector version of the B-spline
+  !              first derivative evaluation function
+  !
+  !     Description of Arguments
+  !     Input
+  !     s       - Real, Vector of s coordinates, length n
+  !     t       - Real, Knot vector. Length nctl+k
+  !     k       - Integer, order of B-spline
+  !     coef    - Real, Array of B-spline coefficients. Size (ndim, nctl)
+  !     nctl    - Integer, Number of control points
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated derivatives, size ndim by n
+
+  use precision
+  implicit none
+  ! Input
+  integer               , intent(in)   :: k, nctl, ndim, n
+  real(kind=realType)   , intent(in)   :: s(n)
+  real(kind=realType)   , intent(in)   :: t(nctl+k)
+  real(kind=realType)   , intent(in)   :: coef(ndim, nctl)
+
+  ! Output
+  real(kind=realType)   , intent(out)  :: val(ndim, n)
+
+  ! Working
+  integer                              :: i, l, istart, ileft
+  real(kind=realType)                  :: Bd(0:1, k)
+
+  val(:, :) = 0.0
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, istart, ileft, Bd)
+  do i=1, n
+     call findSpan(s(i), k, t, nctl, ileft)
+     call derivBasis(t, nctl, k, s(i), ileft, 1, Bd)
+     istart = ileft-k
+     do l=1, k
+        val(:, i) = val(:, i) + Bd(1, l)*coef(:, istart+l)
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_curve_deriv_m
+
+subroutine eval_curve_deriv2_m(s, t, k, coef, nctl, ndim, n, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_curve_deriv2_m is a vector version of the B-spline
+  !              second derivative evaluation function
+  !
+  !     Description of Arguments
+  !     Input
+  !     s       - Real, Vector of s coordinates, length n
+  !     t       - Real, Knot vector. Length nctl+k
+  !     k       - Integer, order of B-spline
+  !     coef    - Real, Array of B-spline coefficients. Size (ndim, nctl)
+  !     nctl    - Integer, Number of control points
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated derivatives, size ndim by n
+
+  use precision
+  implicit none
+  ! Input
+  integer               , intent(in)   :: k, nctl, ndim, n
+  real(kind=realType)   , intent(in)   :: s(n)
+  real(kind=realType)   , intent(in)   :: t(nctl+k)
+  real(kind=realType)   , intent(in)   :: coef(ndim, nctl)
+
+  ! Output
+  real(kind=realType)   , intent(out)  :: val(ndim, n)
+
+  ! Working
+  integer                              :: i, l, istart, ileft
+  real(kind=realType)                  :: Bd(0:2, k)
+
+  val(:, :) = 0.0
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, istart, ileft, Bd)
+  do i=1, n
+     call findSpan(s(i), k, t, nctl, ileft)
+     call derivBasis(t, nctl, k, s(i), ileft, 2, Bd)
+     istart = ileft-k
+     do l=1, k
+        val(:, i) = val(:, i) + Bd(2, l)*coef(:, istart+l)
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_curve_deriv2_m
+
+subroutine eval_curve_derivs(s, t, k, coef, nctl, ndim, n, order, val, deriv, &
+     deriv2)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_curve_derivs evaluates the value and the
+  !              derivatives up to order of (possibly) many points on
+  !              the curve using a single basis evaluation per point
+  !
+  !     Description of Arguments
+  !     Input
+  !     s       - Real, Vector of s coordinates, length n
+  !     t       - Real, Knot vector. Length nctl+k
+  !     k       - Integer, order of B-spline
+  !     coef    - Real, Array of B-spline coefficients. Size (ndim, nctl)
+  !     nctl    - Integer, Number of control points
+  !     order   - Integer, Highest derivative to evaluate (0, 1 or 2)
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated points, size ndim by n
+  !     deriv   - Real, First derivatives, size ndim by n
+  !     deriv2  - Real, Second derivatives, size ndim by n
+
+  use precision
+  implicit none
+  ! Input
+  integer            , intent(in)   :: k, nctl, ndim, n, order
+  real(kind=realType), intent(in)   :: s(n)
+  real(kind=realType), intent(in)   :: t(nctl+k)
+  real(kind=realType), intent(in)   :: coef(ndim, nctl)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, n), deriv(ndim, n)
+  real(kind=realType), intent(out)  :: deriv2(ndim, n)
+
+  ! Working
+  integer                           :: i, l, istart, ileft
+  real(kind=realType)               :: Bd(0:order, k)
+
+  val(:, :) = 0.0
+  deriv(:, :) = 0.0
+  deriv2(:, :) = 0.0
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, istart, ileft, Bd)
+  do i=1, n
+     call findSpan(s(i), k, t, nctl, ileft)
+     call derivBasis(t, nctl, k, s(i), ileft, order, Bd)
+     istart = ileft-k
+     do l=1, k
+        val(:, i) = val(:, i) + Bd(0, l)*coef(:, istart+l)
+        if (order >= 1) then
+           deriv(:, i) = deriv(:, i) + Bd(1, l)*coef(:, istart+l)
+        end if
+        if (order >= 2) then
+           deriv2(:, i) = deriv2(:, i) + Bd(2, l)*coef(:, istart+l)
+        end if
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_curve_derivs
+
 
 subroutine eval_curve_c(s, t, k, coef, nctl, ndim, n, val)
 
@@ -175,6 +335,7 @@ subroutine eval_curve_c(s, t, k, coef, nctl, ndim, n, val)
   complex(kind=realType)                   :: basisu(k)
 
   val(:, :) = cmplx(0.0, 0.0)
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, idim, istart, ileft, basisu)
   do i=1, n
      call findSpan(real(s(i)), k, t, nctl, ileft)
      call basis_c(t, nctl, k, s(i), ileft, basisu)
@@ -186,6 +347,7 @@ subroutine eval_curve_c(s, t, k, coef, nctl, ndim, n, val)
         end do
      end do
   end do
+  !$OMP END PARALLEL DO
 end subroutine eval_curve_c
 
 subroutine eval_curve_deriv_c(s, t, k, coef, nctl, ndim, val)
@@ -273,3 +435,99 @@ subroutine eval_curve_deriv2_c(s, t, k, coef, nctl, ndim, val)
   end do
 
 end subroutine eval_curve_deriv2_c
+
+subroutine eval_curve_deriv_m_c(s, t, k, coef, nctl, ndim, n, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_curve_deriv_m_c is a vector version of the B-spline
+  !              first derivative evaluation function
+  !
+  !     Description of Arguments
+  !     Input
+  !     s       - Real, Vector of s coordinates, length n
+  !     t       - Real, Knot vector. Length nctl+k
+  !     k       - Integer, order of B-spline
+  !     coef    - Complex, Array of B-spline coefficients. Size (ndim, nctl)
+  !     nctl    - Integer, Number of control points
+  !
+  !     Ouput 
+  !     val     - Complex, Evaluated derivatives, size ndim by n
+
+  use precision
+  implicit none
+  ! Input
+  integer               , intent(in)   :: k, nctl, ndim, n
+  real(kind=realType)   , intent(in)   :: s(n)
+  real(kind=realType)   , intent(in)   :: t(nctl+k)
+  complex(kind=realType), intent(in)   :: coef(ndim, nctl)
+
+  ! Output
+  complex(kind=realType), intent(out)  :: val(ndim, n)
+
+  ! Working
+  integer                              :: i, l, istart, ileft
+  real(kind=realType)                  :: Bd(0:1, k)
+
+  val(:, :) = cmplx(0.0, 0.0)
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, istart, ileft, Bd)
+  do i=1, n
+     call findSpan(s(i), k, t, nctl, ileft)
+     call derivBasis(t, nctl, k, s(i), ileft, 1, Bd)
+     istart = ileft-k
+     do l=1, k
+        val(:, i) = val(:, i) + Bd(1, l)*coef(:, istart+l)
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_curve_deriv_m_c
+
+subroutine eval_curve_deriv2_m_c(s, t, k, coef, nctl, ndim, n, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_curve_deriv2_m_c is a vector version of the B-spline
+  !              second derivative evaluation function
+  !
+  !     Description of Arguments
+  !     Input
+  !     s       - Real, Vector of s coordinates, length n
+  !     t       - Real, Knot vector. Length nctl+k
+  !     k       - Integer, order of B-spline
+  !     coef    - Complex, Array of B-spline coefficients. Size (ndim, nctl)
+  !     nctl    - Integer, Number of control points
+  !
+  !     Ouput 
+  !     val     - Complex, Evaluated derivatives, size ndim by n
+
+  use precision
+  implicit none
+  ! Input
+  integer               , intent(in)   :: k, nctl, ndim, n
+  real(kind=realType)   , intent(in)   :: s(n)
+  real(kind=realType)   , intent(in)   :: t(nctl+k)
+  complex(kind=realType), intent(in)   :: coef(ndim, nctl)
+
+  ! Output
+  complex(kind=realType), intent(out)  :: val(ndim, n)
+
+  ! Working
+  integer                              :: i, l, istart, ileft
+  real(kind=realType)                  :: Bd(0:2, k)
+
+  val(:, :) = cmplx(0.0, 0.0)
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, istart, ileft, Bd)
+  do i=1, n
+     call findSpan(s(i), k, t, nctl, ileft)
+     call derivBasis(t, nctl, k, s(i), ileft, 2, Bd)
+     istart = ileft-k
+     do l=1, k
+        val(:, i) = val(:, i) + Bd(2, l)*coef(:, istart+l)
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_curve_deriv2_m_c
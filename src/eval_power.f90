@@ -0,0 +1,269 @@
+subroutine findBreak(u, b, nspan, ind)
+
+  !***DESCRIPTION
+  !
+  !     Abstract: findBreak determines the span of a power basis
+  !               spline that contains u. Values outside the break
+  !               points use the first or last span, the same as
+  !               findSpan.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, parametric location we are looking for
+  !     b       - Real, Strictly increasing break points. Size nspan+1
+  !     nspan   - Integer, Number of polynomial spans
+  !
+  !     Ouput
+  !     ind     - Integer, span index such that b(ind) <= u < b(ind+1)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer, intent(in)             :: nspan
+  real(kind=realType), intent(in) :: u, b(nspan+1)
+
+  ! Output
+  integer, intent(out)            :: ind
+
+  ! Working
+  integer :: low, mid, high
+
+  low = 1
+  high = nspan
+  do while (low < high)
+     mid = (low+high+1)/2
+     if (u < b(mid)) then
+        high = mid-1
+     else
+        low = mid
+     end if
+  end do
+
+  ind = low
+
+end subroutine findBreak
+
+subroutine eval_curve_power(s, b, k, pcoef, nspan, ndim, n, val, nout)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_curve_power evaluates (possibly) many points on
+  !              a curve stored in per-span power basis form. Each
+  !              point requires only a span search and Horner's
+  !              scheme.
+  !
+  !     Description of Arguments
+  !     Input
+  !     s       - Real, Vector of s coordinates, length n
+  !     b       - Real, Break points. Length nspan+1
+  !     k       - Integer, order of B-spline
+  !     pcoef   - Real, Power basis coefficients in the local span
+  !               coordinate (s-b(i))/(b(i+1)-b(i)).
+  !               Size (ndim, k, nspan)
+  !     nspan   - Integer, Number of polynomial spans
+  !
+  !     Ouput
+  !     val     - Real, Evaluated points, size ndim by n
+  !     nout    - Integer, Number of points outside the break points.
+  !               These are extrapolated from the end spans, which
+  !               amplifies round-off when the end spans are short, so
+  !               the caller should evaluate them with the b-spline
+  !               basis instead.
+
+  use precision
+  implicit none
+  ! Input
+  integer         , intent(in)     :: k, nspan, ndim, n
+  real(kind=realType), intent(in)  :: s(n)
+  real(kind=realType), intent(in)  :: b(nspan+1)
+  real(kind=realType), intent(in)  :: pcoef(ndim, k, nspan)
+
+  ! Output
+  real(kind=realType), intent(out) :: val(ndim, n)
+  integer, intent(out)             :: nout
+
+  ! Working
+  integer                          :: i, l, ispan
+  real(kind=realType)              :: x
+
+  nout = 0
+  !$OMP PARALLEL DO IF(n > 1) PRIVATE(i, l, ispan, x) REDUCTION(+:nout)
+  do i=1, n
+     if (s(i) < b(1) .or. s(i) > b(nspan+1)) then
+        nout = nout + 1
+     end if
+     call findBreak(s(i), b, nspan, ispan)
+     x = (s(i)-b(ispan))/(b(ispan+1)-b(ispan))
+     val(:, i) = pcoef(:, k, ispan)
+     do l=k-1, 1, -1
+        val(:, i) = val(:, i)*x + pcoef(:, l, ispan)
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_curve_power
+
+subroutine eval_surface_power(u, v, bu, bv, ku, kv, pcoef, nspanu, nspanv, &
+     ndim, n, m, val, nout)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_surface_power evaluates (possibly) many points
+  !              on a surface stored in per-span power basis form
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(m, n)
+  !     v       - Real, v coordinate, size(m, n)
+  !     bu      - Real, Break points in u. Length nspanu+1
+  !     bv      - Real, Break points in v. Length nspanv+1
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     pcoef   - Real, Power basis coefficients of each span.
+  !               Size (ndim, kv, ku, nspanv, nspanu)
+  !     nspanu  - Integer, Number of polynomial spans in u
+  !     nspanv  - Integer, Number of polynomial spans in v
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput
+  !     val     - Real, Evaluated points, size (ndim, m, n)
+  !     nout    - Integer, Number of points outside the break points.
+  !               These are extrapolated from the end spans, which
+  !               amplifies round-off when the end spans are short, so
+  !               the caller should evaluate them with the b-spline
+  !               basis instead.
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, nspanu, nspanv, ndim, n, m
+  real(kind=realType), intent(in)   :: u(m, n), v(m, n)
+  real(kind=realType), intent(in)   :: bu(nspanu+1), bv(nspanv+1)
+  real(kind=realType), intent(in)   :: pcoef(ndim, kv, ku, nspanv, nspanu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, m, n)
+  integer, intent(out)              :: nout
+
+  ! Working
+  integer                           :: i, j, ii, jj, ispanu, ispanv
+  real(kind=realType)               :: x, y, tmp(ndim)
+
+  nout = 0
+  !$OMP PARALLEL DO IF(n*m > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(ii, jj, i, j, ispanu, ispanv, x, y, tmp) REDUCTION(+:nout)
+  do ii=1, n
+     do jj=1, m
+        if (u(jj, ii) < bu(1) .or. u(jj, ii) > bu(nspanu+1) .or. &
+            v(jj, ii) < bv(1) .or. v(jj, ii) > bv(nspanv+1)) then
+           nout = nout + 1
+        end if
+        call findBreak(u(jj, ii), bu, nspanu, ispanu)
+        call findBreak(v(jj, ii), bv, nspanv, ispanv)
+        x = (u(jj, ii)-bu(ispanu))/(bu(ispanu+1)-bu(ispanu))
+        y = (v(jj, ii)-bv(ispanv))/(bv(ispanv+1)-bv(ispanv))
+
+        val(:, jj, ii) = 0.0
+        do i=ku, 1, -1
+           tmp = pcoef(:, kv, i, ispanv, ispanu)
+           do j=kv-1, 1, -1
+              tmp = tmp*y + pcoef(:, j, i, ispanv, ispanu)
+           end do
+           val(:, jj, ii) = val(:, jj, ii)*x + tmp
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_surface_power
+
+subroutine eval_volume_power(u, v, w, bu, bv, bw, ku, kv, kw, pcoef, &
+     nspanu, nspanv, nspanw, ndim, n, m, l, val, nout)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_volume_power evaluates (possibly) many points on
+  !              a volume stored in per-span power basis form
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(l, m, n)
+  !     v       - Real, v coordinate, size(l, m, n)
+  !     w       - Real, w coordinate, size(l, m, n)
+  !     bu      - Real, Break points in u. Length nspanu+1
+  !     bv      - Real, Break points in v. Length nspanv+1
+  !     bw      - Real, Break points in w. Length nspanw+1
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     kw      - Integer, order of B-spline in w
+  !     pcoef   - Real, Power basis coefficients of each span.
+  !               Size (ndim, kw, kv, ku, nspanw, nspanv, nspanu)
+  !     nspanu  - Integer, Number of polynomial spans in u
+  !     nspanv  - Integer, Number of polynomial spans in v
+  !     nspanw  - Integer, Number of polynomial spans in w
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput
+  !     val     - Real, Evaluated points, size (ndim, l, m, n)
+  !     nout    - Integer, Number of points outside the break points.
+  !               These are extrapolated from the end spans, which
+  !               amplifies round-off when the end spans are short, so
+  !               the caller should evaluate them with the b-spline
+  !               basis instead.
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, kw, nspanu, nspanv, nspanw
+  integer            , intent(in)   :: ndim, n, m, l
+  real(kind=realType), intent(in)   :: u(l, m, n) , v(l, m, n), w(l, m, n)
+  real(kind=realType), intent(in)   :: bu(nspanu+1), bv(nspanv+1), bw(nspanw+1)
+  real(kind=realType), intent(in)   :: pcoef(ndim, kw, kv, ku, &
+                                             nspanw, nspanv, nspanu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, l, m, n)
+  integer, intent(out)              :: nout
+
+  ! Working
+  integer                           :: i, j, k, ii, jj, kk
+  integer                           :: ispanu, ispanv, ispanw
+  real(kind=realType)               :: x, y, z, tmpv(ndim), tmpw(ndim)
+
+  nout = 0
+  !$OMP PARALLEL DO IF(n*m*l > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(ii, jj, kk, i, j, k, ispanu, ispanv, ispanw, x, y, z, &
+  !$OMP tmpv, tmpw) REDUCTION(+:nout)
+  do ii=1, n
+     do jj=1, m
+        do kk=1, l
+           if (u(kk, jj, ii) < bu(1) .or. u(kk, jj, ii) > bu(nspanu+1) .or. &
+               v(kk, jj, ii) < bv(1) .or. v(kk, jj, ii) > bv(nspanv+1) .or. &
+               w(kk, jj, ii) < bw(1) .or. w(kk, jj, ii) > bw(nspanw+1)) then
+              nout = nout + 1
+           end if
+           call findBreak(u(kk, jj, ii), bu, nspanu, ispanu)
+           call findBreak(v(kk, jj, ii), bv, nspanv, ispanv)
+           call findBreak(w(kk, jj, ii), bw, nspanw, ispanw)
+           x = (u(kk, jj, ii)-bu(ispanu))/(bu(ispanu+1)-bu(ispanu))
+           y = (v(kk, jj, ii)-bv(ispanv))/(bv(ispanv+1)-bv(ispanv))
+           z = (w(kk, jj, ii)-bw(ispanw))/(bw(ispanw+1)-bw(ispanw))
+
+           val(:, kk, jj, ii) = 0.0
+           do i=ku, 1, -1
+              tmpv = 0.0
+              do j=kv, 1, -1
+                 tmpw = pcoef(:, kw, j, i, ispanw, ispanv, ispanu)
+                 do k=kw-1, 1, -1
+                    tmpw = tmpw*z + pcoef(:, k, j, i, ispanw, ispanv, ispanu)
+                 end do
+                 tmpv = tmpv*y + tmpw
+              end do
+              val(:, kk, jj, ii) = val(:, kk, jj, ii)*x + tmpv
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_power
@@ -35,12 +35,63 @@ subroutine eval_surface(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, &
   ! Output
   real(kind=realType), intent(out):: val(ndim, m, n)
 
+  ! Dispatch to the order specialized versions
+  if (ku == 2 .and. kv == 2) then
+     call eval_surface_k2(u, v, tu, tv, coef, nctlu, nctlv, ndim, n, m, val)
+  else if (ku == 4 .and. kv == 4) then
+     call eval_surface_k4(u, v, tu, tv, coef, nctlu, nctlv, ndim, n, m, val)
+  else
+     call eval_surface_generic(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, &
+          ndim, n, m, val)
+  end if
+
+end subroutine eval_surface
+
+subroutine eval_surface_generic(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, &
+     ndim, n, m, val)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_surface_generic evaluates (possibly) many points
+  !              on the surface for any order. eval_surface uses the
+  !              order specialized kernels instead where they exist.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(m, n)
+  !     v       - Real, v coordinate, size(m, n)
+  !     tu      - Real, Knot vector in u. size(nctlu+ku)
+  !     tv      - Real, Knot vector in v. size(nctlv+kv)
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     coef    - Real, Array of B-spline coefficients  Size (ndim, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated point(s), size (ndim, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer         , intent(in)    :: ku, kv, nctlu, nctlv, ndim, n, m
+  real(kind=realType), intent(in) :: u(m, n), v(m, n)
+  real(kind=realType), intent(in) :: tu(nctlu+ku), tv(nctlv+kv)
+  real(kind=realType), intent(in) :: coef(ndim, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out):: val(ndim, m, n)
+
   ! Working
   integer                         :: idim, istartu, istartv, i, j, ii, jj
   integer                         :: ileftu, ileftv
   real(kind=realType)             :: basisu(ku), basisv(kv)
 
   val(:, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(ii, jj, i, j, idim, ileftu, ileftv, istartu, istartv, basisu, basisv)
   do ii=1, n
      do jj = 1, m
         ! U
@@ -62,8 +113,221 @@ subroutine eval_surface(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, &
         end do
      end do
   end do
+  !$OMP END PARALLEL DO
 
-end subroutine eval_surface
+end subroutine eval_surface_generic
+
+subroutine eval_surface_k2(u, v, tu, tv, coef, nctlu, nctlv, ndim, n, m, val)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_surface_k2 is eval_surface specialized for
+  !              ku=kv=2. The fixed sizes let the compiler fully
+  !              unroll the loops. It is called automatically by
+  !              eval_surface.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(m, n)
+  !     v       - Real, v coordinate, size(m, n)
+  !     tu      - Real, Knot vector in u. size(nctlu+2)
+  !     tv      - Real, Knot vector in v. size(nctlv+2)
+  !     coef    - Real, Array of B-spline coefficients  Size (ndim, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput
+  !     val     - Real, Evaluated point(s), size (ndim, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer         , intent(in)    :: nctlu, nctlv, ndim, n, m
+  real(kind=realType), intent(in) :: u(m, n), v(m, n)
+  real(kind=realType), intent(in) :: tu(nctlu+2), tv(nctlv+2)
+  real(kind=realType), intent(in) :: coef(ndim, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out):: val(ndim, m, n)
+
+  ! Working
+  integer, parameter              :: order=2
+  integer                         :: idim, istartu, istartv, i, j, ii, jj
+  integer                         :: ileftu, ileftv
+  real(kind=realType)             :: basisu(order), basisv(order)
+
+  !$OMP PARALLEL DO IF(n*m > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(ii, jj, i, j, idim, ileftu, ileftv, istartu, istartv, basisu, basisv)
+  do ii=1, n
+     do jj = 1, m
+        call findSpan(u(jj,ii), order, tu, nctlu, ileftu)
+        call basis2(tu, nctlu, u(jj, ii), ileftu, basisu)
+        istartu = ileftu-order
+
+        call findSpan(v(jj,ii), order, tv, nctlv, ileftv)
+        call basis2(tv, nctlv, v(jj, ii), ileftv, basisv)
+        istartv = ileftv-order
+
+        val(:, jj, ii) = 0.0
+        do i=1, order
+           do j=1, order
+              do idim=1, ndim
+                 val(idim, jj, ii) = val(idim, jj, ii) + basisu(i)*basisv(j)*coef(idim, istartv+j, istartu+i)
+              end do
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+
+end subroutine eval_surface_k2
+
+subroutine eval_surface_k4(u, v, tu, tv, coef, nctlu, nctlv, ndim, n, m, val)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_surface_k4 is eval_surface specialized for
+  !              ku=kv=4. The fixed sizes let the compiler fully
+  !              unroll the loops. It is called automatically by
+  !              eval_surface.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(m, n)
+  !     v       - Real, v coordinate, size(m, n)
+  !     tu      - Real, Knot vector in u. size(nctlu+4)
+  !     tv      - Real, Knot vector in v. size(nctlv+4)
+  !     coef    - Real, Array of B-spline coefficients  Size (ndim, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput
+  !     val     - Real, Evaluated point(s), size (ndim, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer         , intent(in)    :: nctlu, nctlv, ndim, n, m
+  real(kind=realType), intent(in) :: u(m, n), v(m, n)
+  real(kind=realType), intent(in) :: tu(nctlu+4), tv(nctlv+4)
+  real(kind=realType), intent(in) :: coef(ndim, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out):: val(ndim, m, n)
+
+  ! Working
+  integer, parameter              :: order=4
+  integer                         :: idim, istartu, istartv, i, j, ii, jj
+  integer                         :: ileftu, ileftv
+  real(kind=realType)             :: basisu(order), basisv(order)
+
+  !$OMP PARALLEL DO IF(n*m > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(ii, jj, i, j, idim, ileftu, ileftv, istartu, istartv, basisu, basisv)
+  do ii=1, n
+     do jj = 1, m
+        call findSpan(u(jj,ii), order, tu, nctlu, ileftu)
+        call basis4(tu, nctlu, u(jj, ii), ileftu, basisu)
+        istartu = ileftu-order
+
+        call findSpan(v(jj,ii), order, tv, nctlv, ileftv)
+        call basis4(tv, nctlv, v(jj, ii), ileftv, basisv)
+        istartv = ileftv-order
+
+        val(:, jj, ii) = 0.0
+        do i=1, order
+           do j=1, order
+              do idim=1, ndim
+                 val(idim, jj, ii) = val(idim, jj, ii) + basisu(i)*basisv(j)*coef(idim, istartv+j, istartu+i)
+              end do
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+
+end subroutine eval_surface_k4
+
+subroutine eval_surface_grid(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, &
+     nu, nv, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_surface_grid evaluates the surface on the tensor
+  !     product grid of u and v. The basis functions are computed only
+  !     once for each u and each v value and the coefficients are
+  !     contracted one direction at a time.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinates, size(nu)
+  !     v       - Real, v coordinates, size(nv)
+  !     tu      - Real, Knot vector in u. size(nctlu+ku)
+  !     tv      - Real, Knot vector in v. size(nctlv+kv)
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     coef    - Real, Array of B-spline coefficients  Size (ndim, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated points, size (ndim, nv, nu)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, nctlu, nctlv, ndim, nu, nv
+  real(kind=realType), intent(in)   :: u(nu), v(nv)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, nv, nu)
+
+  ! Working
+  integer                           :: istartu, istartv, i, j, l
+  integer                           :: ileftu(nu), ileftv(nv)
+  real(kind=realType)               :: Bu(ku, nu), Bv(kv, nv)
+  real(kind=realType)               :: tmp(ndim, nctlv)
+
+  do i=1, nu
+     call findSpan(u(i), ku, tu, nctlu, ileftu(i))
+     call basis(tu, nctlu, ku, u(i), ileftu(i), Bu(:, i))
+  end do
+
+  do j=1, nv
+     call findSpan(v(j), kv, tv, nctlv, ileftv(j))
+     call basis(tv, nctlv, kv, v(j), ileftv(j), Bv(:, j))
+  end do
+
+  val(:, :, :) = 0.0
+  !$OMP PARALLEL DO IF(nu > 1) PRIVATE(i, j, l, istartu, istartv, tmp)
+  do i=1, nu
+     ! Contract the u direction first
+     istartu = ileftu(i)-ku
+     tmp(:, :) = 0.0
+     do l=1, ku
+        tmp = tmp + Bu(l, i)*coef(:, :, istartu+l)
+     end do
+
+     ! And then the v direction for each v value
+     do j=1, nv
+        istartv = ileftv(j)-kv
+        do l=1, kv
+           val(:, j, i) = val(:, j, i) + Bv(l, j)*tmp(:, istartv+l)
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+
+end subroutine eval_surface_grid
 
 subroutine eval_surface_deriv(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, &
      ndim, val)
@@ -164,3 +428,241 @@ subroutine eval_surface_deriv2(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, v
   end do
 
 end subroutine eval_surface_deriv2
+
+subroutine eval_surface_deriv_m(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, &
+     n, m, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_surface_deriv_m evaluates the first derivatives
+  !     of (possibly) many points on the surface
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(m, n)
+  !     v       - Real, v coordinate, size(m, n)
+  !     tu      - Real, Knot vector in u. size(nctlu+ku)
+  !     tv      - Real, Knot vector in v. size(nctlv+kv)
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     coef    - Real, Array of B-spline coefficients  Size (ndim, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated derivatives, size (ndim, 2, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, nctlu, nctlv, ndim, n, m
+  real(kind=realType), intent(in)   :: u(m, n), v(m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, 2, m, n)
+
+  ! Working
+  integer                           :: istartu, istartv, i, j, ii, jj
+  integer                           :: ileftu, ileftv
+  real(kind=realType)               :: Bu(0:1, ku), Bv(0:1, kv)
+
+  val(:, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(ii, jj, i, j, ileftu, ileftv, istartu, istartv, Bu, Bv)
+  do ii=1, n
+     do jj = 1, m
+        ! U
+        call findSpan(u(jj, ii), ku, tu, nctlu, ileftu)
+        call derivBasis(tu, nctlu, ku, u(jj, ii), ileftu, 1, Bu)
+        istartu = ileftu-ku
+
+        ! V
+        call findSpan(v(jj, ii), kv, tv, nctlv, ileftv)
+        call derivBasis(tv, nctlv, kv, v(jj, ii), ileftv, 1, Bv)
+        istartv = ileftv-kv
+
+        do i=1, ku
+           do j=1, kv
+              val(:, 1, jj, ii) = val(:, 1, jj, ii) + &
+                   Bu(1, i)*Bv(0, j)*coef(:, istartv+j, istartu+i)
+              val(:, 2, jj, ii) = val(:, 2, jj, ii) + &
+                   Bu(0, i)*Bv(1, j)*coef(:, istartv+j, istartu+i)
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+
+end subroutine eval_surface_deriv_m
+
+subroutine eval_surface_deriv2_m(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, &
+     n, m, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_surface_deriv2_m evaluates the second derivatives
+  !     of (possibly) many points on the surface
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(m, n)
+  !     v       - Real, v coordinate, size(m, n)
+  !     tu      - Real, Knot vector in u. size(nctlu+ku)
+  !     tv      - Real, Knot vector in v. size(nctlv+kv)
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     coef    - Real, Array of B-spline coefficients  Size (ndim, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated second derivatives, size (ndim, 2, 2, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, nctlu, nctlv, ndim, n, m
+  real(kind=realType), intent(in)   :: u(m, n), v(m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, 2, 2, m, n)
+
+  ! Working
+  integer                           :: istartu, istartv, i, j, ii, jj
+  integer                           :: ileftu, ileftv
+  real(kind=realType)               :: Bu(0:2, ku), Bv(0:2, kv)
+
+  val(:, :, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(ii, jj, i, j, ileftu, ileftv, istartu, istartv, Bu, Bv)
+  do ii=1, n
+     do jj = 1, m
+        ! U
+        call findSpan(u(jj, ii), ku, tu, nctlu, ileftu)
+        call derivBasis(tu, nctlu, ku, u(jj, ii), ileftu, 2, Bu)
+        istartu = ileftu-ku
+
+        ! V
+        call findSpan(v(jj, ii), kv, tv, nctlv, ileftv)
+        call derivBasis(tv, nctlv, kv, v(jj, ii), ileftv, 2, Bv)
+        istartv = ileftv-kv
+
+        do i=1, ku
+           do j=1, kv
+              val(:, 1, 1, jj, ii) = val(:, 1, 1, jj, ii) + &
+                   Bu(2, i)*Bv(0, j)*coef(:, istartv+j, istartu+i)
+              val(:, 1, 2, jj, ii) = val(:, 1, 2, jj, ii) + &
+                   Bu(1, i)*Bv(1, j)*coef(:, istartv+j, istartu+i)
+              val(:, 2, 2, jj, ii) = val(:, 2, 2, jj, ii) + &
+                   Bu(0, i)*Bv(2, j)*coef(:, istartv+j, istartu+i)
+           end do
+        end do
+        val(:, 2, 1, jj, ii) = val(:, 1, 2, jj, ii)
+     end do
+  end do
+  !$OMP END PARALLEL DO
+
+end subroutine eval_surface_deriv2_m
+
+subroutine eval_surface_derivs(u, v, tu, tv, ku, kv, coef, nctlu, nctlv, ndim, &
+     n, m, order, val, deriv, deriv2)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_surface_derivs evaluates the value and the
+  !     derivatives up to order of (possibly) many points on the
+  !     surface using a single basis evaluation per point
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(m, n)
+  !     v       - Real, v coordinate, size(m, n)
+  !     tu      - Real, Knot vector in u. size(nctlu+ku)
+  !     tv      - Real, Knot vector in v. size(nctlv+kv)
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     coef    - Real, Array of B-spline coefficients  Size (ndim, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     ndim    - Integer, Spatial Dimension
+  !     order   - Integer, Highest derivative to evaluate (0, 1 or 2)
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated points, size (ndim, m, n)
+  !     deriv   - Real, First derivatives, size (ndim, 2, m, n)
+  !     deriv2  - Real, Second derivatives, size (ndim, 2, 2, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, nctlu, nctlv, ndim, n, m, order
+  real(kind=realType), intent(in)   :: u(m, n), v(m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, m, n), deriv(ndim, 2, m, n)
+  real(kind=realType), intent(out)  :: deriv2(ndim, 2, 2, m, n)
+
+  ! Working
+  integer                           :: istartu, istartv, i, j, ii, jj
+  integer                           :: ileftu, ileftv
+  real(kind=realType)               :: Bu(0:order, ku), Bv(0:order, kv)
+  real(kind=realType)               :: B(ndim)
+
+  val(:, :, :) = 0.0
+  deriv(:, :, :, :) = 0.0
+  deriv2(:, :, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m > 1) COLLAPSE(2) &
+  !$OMP PRIVATE(ii, jj, i, j, ileftu, ileftv, istartu, istartv, Bu, Bv, B)
+  do ii=1, n
+     do jj = 1, m
+        ! U
+        call findSpan(u(jj, ii), ku, tu, nctlu, ileftu)
+        call derivBasis(tu, nctlu, ku, u(jj, ii), ileftu, order, Bu)
+        istartu = ileftu-ku
+
+        ! V
+        call findSpan(v(jj, ii), kv, tv, nctlv, ileftv)
+        call derivBasis(tv, nctlv, kv, v(jj, ii), ileftv, order, Bv)
+        istartv = ileftv-kv
+
+        do i=1, ku
+           do j=1, kv
+              B = coef(:, istartv+j, istartu+i)
+              val(:, jj, ii) = val(:, jj, ii) + Bu(0, i)*Bv(0, j)*B
+              if (order >= 1) then
+                 deriv(:, 1, jj, ii) = deriv(:, 1, jj, ii) + Bu(1, i)*Bv(0, j)*B
+                 deriv(:, 2, jj, ii) = deriv(:, 2, jj, ii) + Bu(0, i)*Bv(1, j)*B
+              end if
+              if (order >= 2) then
+                 deriv2(:, 1, 1, jj, ii) = deriv2(:, 1, 1, jj, ii) + &
+                      Bu(2, i)*Bv(0, j)*B
+                 deriv2(:, 1, 2, jj, ii) = deriv2(:, 1, 2, jj, ii) + &
+                      Bu(1, i)*Bv(1, j)*B
+                 deriv2(:, 2, 2, jj, ii) = deriv2(:, 2, 2, jj, ii) + &
+                      Bu(0, i)*Bv(2, j)*B
+              end if
+           end do
+        end do
+        deriv2(:, 2, 1, jj, ii) = deriv2(:, 1, 2, jj, ii)
+     end do
+  end do
+  !$OMP END PARALLEL DO
+
+end subroutine eval_surface_derivs
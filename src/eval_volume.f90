@@ -42,6 +42,63 @@ subroutine eval_volume(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
   ! Output
   real(kind=realType), intent(out)  :: val(ndim, l, m, n)
 
+  ! Dispatch to the order specialized versions
+  if (ku == 2 .and. kv == 2 .and. kw == 2) then
+     call eval_volume_k2(u, v, w, tu, tv, tw, coef, nctlu, nctlv, nctlw, &
+          ndim, n, m, l, val)
+  else if (ku == 4 .and. kv == 4 .and. kw == 4) then
+     call eval_volume_k4(u, v, w, tu, tv, tw, coef, nctlu, nctlv, nctlw, &
+          ndim, n, m, l, val)
+  else
+     call eval_volume_generic(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
+          nctlu, nctlv, nctlw, ndim, n, m, l, val)
+  end if
+
+end subroutine eval_volume
+
+subroutine eval_volume_generic(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
+     nctlu, nctlv, nctlw, ndim, n, m, l, val)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_volume_generic evaluates (possibly) many points
+  !              on the b-spline volume for any order. eval_volume uses
+  !              the order specialized kernels instead where they exist.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(l, m, n)
+  !     v       - Real, v coordinate, size(l, m, n)
+  !     w       - Real, w coordinate, size(l, m, n)
+  !     tu      - Real, Knot vector in u. Length nctlu+ku
+  !     tv      - Real, Knot vector in v. Length nctlv+kv
+  !     tw      - Real, Knot vector in w. Length nctlv+kw
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     kw      - Integer, order of B-spline in w
+  !     coef    - Real, Array of B-spline coefficients 
+  !                 Size (ndim, nctlw, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     nctlw   - Integer, Number of control points in w
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated points, size (ndim, l, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, kw, nctlu, nctlv, nctlw
+  integer            , intent(in)   :: ndim, n, m, l
+  real(kind=realType), intent(in)   :: u(l, m, n) , v(l, m, n), w(l, m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv), tw(nctlw+kw)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlw, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, l, m, n)
+
   ! Working
   integer                           :: idim, istartu, istartv, istartw
   integer                           :: i, j, k, ii, jj, kk
@@ -49,6 +106,9 @@ subroutine eval_volume(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
   real(kind=realType)               :: basisu(ku), basisv(kv), basisw(kw)
 
   val(:, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m*l > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(ii, jj, kk, i, j, k, idim, ileftu, ileftv, ileftw, &
+  !$OMP istartu, istartv, istartw, basisu, basisv, basisw)
   do ii=1, n
      do jj=1, m
         do kk=1, l
@@ -81,7 +141,275 @@ subroutine eval_volume(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
         end do
      end do
   end do
-end subroutine eval_volume
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_generic
+
+subroutine eval_volume_k2(u, v, w, tu, tv, tw, coef, nctlu, nctlv, nctlw, &
+     ndim, n, m, l, val)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_volume_k2 is eval_volume specialized for
+  !              ku=kv=kw=2. All loop bounds are compile time
+  !              constants so the basis and tensor product loops are
+  !              unrolled. It is called automatically by eval_volume.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(l, m, n)
+  !     v       - Real, v coordinate, size(l, m, n)
+  !     w       - Real, w coordinate, size(l, m, n)
+  !     tu      - Real, Knot vector in u. Length nctlu+2
+  !     tv      - Real, Knot vector in v. Length nctlv+2
+  !     tw      - Real, Knot vector in w. Length nctlw+2
+  !     coef    - Real, Array of B-spline coefficients
+  !                 Size (ndim, nctlw, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     nctlw   - Integer, Number of control points in w
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput
+  !     val     - Real, Evaluated points, size (ndim, l, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: nctlu, nctlv, nctlw
+  integer            , intent(in)   :: ndim, n, m, l
+  real(kind=realType), intent(in)   :: u(l, m, n) , v(l, m, n), w(l, m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+2), tv(nctlv+2), tw(nctlw+2)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlw, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, l, m, n)
+
+  ! Working
+  integer, parameter                :: order=2
+  integer                           :: idim, istartu, istartv, istartw
+  integer                           :: i, j, k, ii, jj, kk
+  integer                           :: ileftu, ileftv, ileftw
+  real(kind=realType)               :: basisu(order), basisv(order), basisw(order)
+
+  !$OMP PARALLEL DO IF(n*m*l > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(ii, jj, kk, i, j, k, idim, ileftu, ileftv, ileftw, &
+  !$OMP istartu, istartv, istartw, basisu, basisv, basisw)
+  do ii=1, n
+     do jj=1, m
+        do kk=1, l
+           call findSpan(u(kk, jj, ii), order, tu, nctlu, ileftu)
+           call basis2(tu, nctlu, u(kk, jj, ii), ileftu, basisu)
+           istartu = ileftu-order
+
+           call findSpan(v(kk, jj, ii), order, tv, nctlv, ileftv)
+           call basis2(tv, nctlv, v(kk, jj, ii), ileftv, basisv)
+           istartv = ileftv-order
+
+           call findSpan(w(kk, jj, ii), order, tw, nctlw, ileftw)
+           call basis2(tw, nctlw, w(kk, jj, ii), ileftw, basisw)
+           istartw = ileftw-order
+
+           val(:, kk, jj, ii) = 0.0
+           do i=1, order
+              do j=1, order
+                 do k=1, order
+                    do idim=1, ndim
+                       val(idim, kk, jj, ii) = val(idim, kk, jj, ii) + &
+                            basisu(i)*basisv(j)*basisw(k)*&
+                            coef(idim, istartw+k, istartv+j, istartu+i)
+                    end do
+                 end do
+              end do
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_k2
+
+subroutine eval_volume_k4(u, v, w, tu, tv, tw, coef, nctlu, nctlv, nctlw, &
+     ndim, n, m, l, val)
+
+  !***DESCRIPTION
+  !
+  !     Abstract eval_volume_k4 is eval_volume specialized for
+  !              ku=kv=kw=4. All loop bounds are compile time
+  !              constants so the basis and tensor product loops are
+  !              unrolled. It is called automatically by eval_volume.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(l, m, n)
+  !     v       - Real, v coordinate, size(l, m, n)
+  !     w       - Real, w coordinate, size(l, m, n)
+  !     tu      - Real, Knot vector in u. Length nctlu+4
+  !     tv      - Real, Knot vector in v. Length nctlv+4
+  !     tw      - Real, Knot vector in w. Length nctlw+4
+  !     coef    - Real, Array of B-spline coefficients
+  !                 Size (ndim, nctlw, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     nctlw   - Integer, Number of control points in w
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput
+  !     val     - Real, Evaluated points, size (ndim, l, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: nctlu, nctlv, nctlw
+  integer            , intent(in)   :: ndim, n, m, l
+  real(kind=realType), intent(in)   :: u(l, m, n) , v(l, m, n), w(l, m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+4), tv(nctlv+4), tw(nctlw+4)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlw, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, l, m, n)
+
+  ! Working
+  integer, parameter                :: order=4
+  integer                           :: idim, istartu, istartv, istartw
+  integer                           :: i, j, k, ii, jj, kk
+  integer                           :: ileftu, ileftv, ileftw
+  real(kind=realType)               :: basisu(order), basisv(order), basisw(order)
+
+  !$OMP PARALLEL DO IF(n*m*l > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(ii, jj, kk, i, j, k, idim, ileftu, ileftv, ileftw, &
+  !$OMP istartu, istartv, istartw, basisu, basisv, basisw)
+  do ii=1, n
+     do jj=1, m
+        do kk=1, l
+           call findSpan(u(kk, jj, ii), order, tu, nctlu, ileftu)
+           call basis4(tu, nctlu, u(kk, jj, ii), ileftu, basisu)
+           istartu = ileftu-order
+
+           call findSpan(v(kk, jj, ii), order, tv, nctlv, ileftv)
+           call basis4(tv, nctlv, v(kk, jj, ii), ileftv, basisv)
+           istartv = ileftv-order
+
+           call findSpan(w(kk, jj, ii), order, tw, nctlw, ileftw)
+           call basis4(tw, nctlw, w(kk, jj, ii), ileftw, basisw)
+           istartw = ileftw-order
+
+           val(:, kk, jj, ii) = 0.0
+           do i=1, order
+              do j=1, order
+                 do k=1, order
+                    do idim=1, ndim
+                       val(idim, kk, jj, ii) = val(idim, kk, jj, ii) + &
+                            basisu(i)*basisv(j)*basisw(k)*&
+                            coef(idim, istartw+k, istartv+j, istartu+i)
+                    end do
+                 end do
+              end do
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_k4
+
+subroutine eval_volume_grid(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
+     nctlu, nctlv, nctlw, ndim, nu, nv, nw, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_volume_grid evaluates the volume on the tensor
+  !              product grid of u, v and w. The basis functions are
+  !              computed only once for each u, v and w value and the
+  !              coefficients are contracted one direction at a time.
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinates, size(nu)
+  !     v       - Real, v coordinates, size(nv)
+  !     w       - Real, w coordinates, size(nw)
+  !     tu      - Real, Knot vector in u. Length nctlu+ku
+  !     tv      - Real, Knot vector in v. Length nctlv+kv
+  !     tw      - Real, Knot vector in w. Length nctlv+kw
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     kw      - Integer, order of B-spline in w
+  !     coef    - Real, Array of B-spline coefficients 
+  !                 Size (ndim, nctlw, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     nctlw   - Integer, Number of control points in w
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated points, size (ndim, nw, nv, nu)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, kw, nctlu, nctlv, nctlw
+  integer            , intent(in)   :: ndim, nu, nv, nw
+  real(kind=realType), intent(in)   :: u(nu), v(nv), w(nw)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv), tw(nctlw+kw)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlw, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, nw, nv, nu)
+
+  ! Working
+  integer                           :: istartu, istartv, istartw
+  integer                           :: i, j, k, l
+  integer                           :: ileftu(nu), ileftv(nv), ileftw(nw)
+  real(kind=realType)               :: Bu(ku, nu), Bv(kv, nv), Bw(kw, nw)
+  real(kind=realType)               :: tmpu(ndim, nctlw, nctlv), tmpv(ndim, nctlw)
+
+  do i=1, nu
+     call findSpan(u(i), ku, tu, nctlu, ileftu(i))
+     call basis(tu, nctlu, ku, u(i), ileftu(i), Bu(:, i))
+  end do
+
+  do j=1, nv
+     call findSpan(v(j), kv, tv, nctlv, ileftv(j))
+     call basis(tv, nctlv, kv, v(j), ileftv(j), Bv(:, j))
+  end do
+
+  do k=1, nw
+     call findSpan(w(k), kw, tw, nctlw, ileftw(k))
+     call basis(tw, nctlw, kw, w(k), ileftw(k), Bw(:, k))
+  end do
+
+  val(:, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(nu > 1) &
+  !$OMP PRIVATE(i, j, k, l, istartu, istartv, istartw, tmpu, tmpv)
+  do i=1, nu
+     ! Contract the u direction
+     istartu = ileftu(i)-ku
+     tmpu(:, :, :) = 0.0
+     do l=1, ku
+        tmpu = tmpu + Bu(l, i)*coef(:, :, :, istartu+l)
+     end do
+
+     do j=1, nv
+        ! Contract the v direction
+        istartv = ileftv(j)-kv
+        tmpv(:, :) = 0.0
+        do l=1, kv
+           tmpv = tmpv + Bv(l, j)*tmpu(:, :, istartv+l)
+        end do
+
+        ! And finally the w direction
+        do k=1, nw
+           istartw = ileftw(k)-kw
+           do l=1, kw
+              val(:, k, j, i) = val(:, k, j, i) + Bw(l, k)*tmpv(:, istartw+l)
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_grid
 
 subroutine eval_volume_deriv(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
      nctlu, nctlv, nctlw, ndim, val)
@@ -226,3 +554,321 @@ subroutine eval_volume_deriv2(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
   end do
 
 end subroutine eval_volume_deriv2
+
+subroutine eval_volume_deriv_m(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
+     nctlu, nctlv, nctlw, ndim, n, m, l, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_volume_deriv_m evaluates the first derivatives of
+  !              (possibly) many points on the b-spline volume
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(l, m, n)
+  !     v       - Real, v coordinate, size(l, m, n)
+  !     w       - Real, w coordinate, size(l, m, n)
+  !     tu      - Real, Knot vector in u. Length nctlu+ku
+  !     tv      - Real, Knot vector in v. Length nctlv+kv
+  !     tw      - Real, Knot vector in w. Length nctlv+kw
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     kw      - Integer, order of B-spline in w
+  !     coef    - Real, Array of B-spline coefficients 
+  !                 Size (ndim, nctlw, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     nctlw   - Integer, Number of control points in w
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated derivatives, size (ndim, 3, l, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, kw, nctlu, nctlv, nctlw
+  integer            , intent(in)   :: ndim, n, m, l
+  real(kind=realType), intent(in)   :: u(l, m, n) , v(l, m, n), w(l, m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv), tw(nctlw+kw)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlw, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, 3, l, m, n)
+
+  ! Working
+  integer                           :: istartu, istartv, istartw
+  integer                           :: i, j, k, ii, jj, kk
+  integer                           :: ileftu, ileftv, ileftw
+  real(kind=realType)               :: Bu(0:1, ku), Bv(0:1, kv), Bw(0:1, kw)
+  real(kind=realType)               :: B(ndim)
+
+  val(:, :, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m*l > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(ii, jj, kk, i, j, k, ileftu, ileftv, ileftw, &
+  !$OMP istartu, istartv, istartw, Bu, Bv, Bw, B)
+  do ii=1, n
+     do jj=1, m
+        do kk=1, l
+           ! U
+           call findSpan(u(kk, jj, ii), ku, tu, nctlu, ileftu)
+           call derivBasis(tu, nctlu, ku, u(kk, jj, ii), ileftu, 1, Bu)
+           istartu = ileftu-ku
+
+           ! V
+           call findSpan(v(kk, jj, ii), kv, tv, nctlv, ileftv)
+           call derivBasis(tv, nctlv, kv, v(kk, jj, ii), ileftv, 1, Bv)
+           istartv = ileftv-kv
+
+           ! W
+           call findSpan(w(kk, jj, ii), kw, tw, nctlw, ileftw)
+           call derivBasis(tw, nctlw, kw, w(kk, jj, ii), ileftw, 1, Bw)
+           istartw = ileftw-kw
+
+           do i=1, ku
+              do j=1, kv
+                 do k=1, kw
+                    B = coef(:, istartw+k, istartv+j, istartu+i)
+                    val(:, 1, kk, jj, ii) = val(:, 1, kk, jj, ii) + &
+                         Bu(1, i)*Bv(0, j)*Bw(0, k)*B
+                    val(:, 2, kk, jj, ii) = val(:, 2, kk, jj, ii) + &
+                         Bu(0, i)*Bv(1, j)*Bw(0, k)*B
+                    val(:, 3, kk, jj, ii) = val(:, 3, kk, jj, ii) + &
+                         Bu(0, i)*Bv(0, j)*Bw(1, k)*B
+                 end do
+              end do
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_deriv_m
+
+subroutine eval_volume_deriv2_m(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
+     nctlu, nctlv, nctlw, ndim, n, m, l, val)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_volume_deriv2_m evaluates the second derivatives of
+  !              (possibly) many points on the b-spline volume
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(l, m, n)
+  !     v       - Real, v coordinate, size(l, m, n)
+  !     w       - Real, w coordinate, size(l, m, n)
+  !     tu      - Real, Knot vector in u. Length nctlu+ku
+  !     tv      - Real, Knot vector in v. Length nctlv+kv
+  !     tw      - Real, Knot vector in w. Length nctlv+kw
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     kw      - Integer, order of B-spline in w
+  !     coef    - Real, Array of B-spline coefficients 
+  !                 Size (ndim, nctlw, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     nctlw   - Integer, Number of control points in w
+  !     ndim    - Integer, Spatial Dimension
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated derivatives, size (ndim, 3, 3, l, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, kw, nctlu, nctlv, nctlw
+  integer            , intent(in)   :: ndim, n, m, l
+  real(kind=realType), intent(in)   :: u(l, m, n) , v(l, m, n), w(l, m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv), tw(nctlw+kw)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlw, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, 3, 3, l, m, n)
+
+  ! Working
+  integer                           :: istartu, istartv, istartw
+  integer                           :: i, j, k, ii, jj, kk
+  integer                           :: ileftu, ileftv, ileftw
+  real(kind=realType)               :: Bu(0:2, ku), Bv(0:2, kv), Bw(0:2, kw)
+  real(kind=realType)               :: B(ndim)
+
+  val(:, :, :, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m*l > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(ii, jj, kk, i, j, k, ileftu, ileftv, ileftw, &
+  !$OMP istartu, istartv, istartw, Bu, Bv, Bw, B)
+  do ii=1, n
+     do jj=1, m
+        do kk=1, l
+           ! U
+           call findSpan(u(kk, jj, ii), ku, tu, nctlu, ileftu)
+           call derivBasis(tu, nctlu, ku, u(kk, jj, ii), ileftu, 2, Bu)
+           istartu = ileftu-ku
+
+           ! V
+           call findSpan(v(kk, jj, ii), kv, tv, nctlv, ileftv)
+           call derivBasis(tv, nctlv, kv, v(kk, jj, ii), ileftv, 2, Bv)
+           istartv = ileftv-kv
+
+           ! W
+           call findSpan(w(kk, jj, ii), kw, tw, nctlw, ileftw)
+           call derivBasis(tw, nctlw, kw, w(kk, jj, ii), ileftw, 2, Bw)
+           istartw = ileftw-kw
+
+           do i=1, ku
+              do j=1, kv
+                 do k=1, kw
+                    B = coef(:, istartw+k, istartv+j, istartu+i)
+                    val(:, 1, 1, kk, jj, ii) = val(:, 1, 1, kk, jj, ii) + &
+                         Bu(2, i)*Bv(0, j)*Bw(0, k)*B
+                    val(:, 1, 2, kk, jj, ii) = val(:, 1, 2, kk, jj, ii) + &
+                         Bu(1, i)*Bv(1, j)*Bw(0, k)*B
+                    val(:, 1, 3, kk, jj, ii) = val(:, 1, 3, kk, jj, ii) + &
+                         Bu(1, i)*Bv(0, j)*Bw(1, k)*B
+                    val(:, 2, 2, kk, jj, ii) = val(:, 2, 2, kk, jj, ii) + &
+                         Bu(0, i)*Bv(2, j)*Bw(0, k)*B
+                    val(:, 2, 3, kk, jj, ii) = val(:, 2, 3, kk, jj, ii) + &
+                         Bu(0, i)*Bv(1, j)*Bw(1, k)*B
+                    val(:, 3, 3, kk, jj, ii) = val(:, 3, 3, kk, jj, ii) + &
+                         Bu(0, i)*Bv(0, j)*Bw(2, k)*B
+                 end do
+              end do
+           end do
+           val(:, 2, 1, kk, jj, ii) = val(:, 1, 2, kk, jj, ii)
+           val(:, 3, 1, kk, jj, ii) = val(:, 1, 3, kk, jj, ii)
+           val(:, 3, 2, kk, jj, ii) = val(:, 2, 3, kk, jj, ii)
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_deriv2_m
+
+subroutine eval_volume_derivs(u, v, w, tu, tv, tw, ku, kv, kw, coef, &
+     nctlu, nctlv, nctlw, ndim, n, m, l, order, val, deriv, deriv2)
+
+  !***DESCRIPTION
+  !
+  !     Written by Gaetan Kenway
+  !
+  !     Abstract eval_volume_derivs evaluates the value and the
+  !              derivatives up to order of (possibly) many points on
+  !              the b-spline volume using a single basis evaluation
+  !              per point
+  !
+  !     Description of Arguments
+  !     Input
+  !     u       - Real, u coordinate, size(l, m, n)
+  !     v       - Real, v coordinate, size(l, m, n)
+  !     w       - Real, w coordinate, size(l, m, n)
+  !     tu      - Real, Knot vector in u. Length nctlu+ku
+  !     tv      - Real, Knot vector in v. Length nctlv+kv
+  !     tw      - Real, Knot vector in w. Length nctlv+kw
+  !     ku      - Integer, order of B-spline in u
+  !     kv      - Integer, order of B-spline in v
+  !     kw      - Integer, order of B-spline in w
+  !     coef    - Real, Array of B-spline coefficients 
+  !                 Size (ndim, nctlw, nctlv, nctlu)
+  !     nctlu   - Integer, Number of control points in u
+  !     nctlv   - Integer, Number of control points in v
+  !     nctlw   - Integer, Number of control points in w
+  !     ndim    - Integer, Spatial Dimension
+  !     order   - Integer, Highest derivative to evaluate (0, 1 or 2)
+  !
+  !     Ouput 
+  !     val     - Real, Evaluated points, size (ndim, l, m, n)
+  !     deriv   - Real, First derivatives, size (ndim, 3, l, m, n)
+  !     deriv2  - Real, Second derivatives, size (ndim, 3, 3, l, m, n)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)   :: ku, kv, kw, nctlu, nctlv, nctlw
+  integer            , intent(in)   :: ndim, n, m, l, order
+  real(kind=realType), intent(in)   :: u(l, m, n) , v(l, m, n), w(l, m, n)
+  real(kind=realType), intent(in)   :: tu(nctlu+ku), tv(nctlv+kv), tw(nctlw+kw)
+  real(kind=realType), intent(in)   :: coef(ndim, nctlw, nctlv, nctlu)
+
+  ! Output
+  real(kind=realType), intent(out)  :: val(ndim, l, m, n)
+  real(kind=realType), intent(out)  :: deriv(ndim, 3, l, m, n)
+  real(kind=realType), intent(out)  :: deriv2(ndim, 3, 3, l, m, n)
+
+  ! Working
+  integer                           :: istartu, istartv, istartw
+  integer                           :: i, j, k, ii, jj, kk, p, q
+  integer                           :: ileftu, ileftv, ileftw
+  real(kind=realType)               :: Bu(0:order, ku), Bv(0:order, kv), Bw(0:order, kw)
+  real(kind=realType)               :: B(ndim)
+  integer                           :: du(3), dv(3), dw(3)
+
+  ! Derivative order in each direction for the three parametric
+  ! directions
+  du = (/1, 0, 0/)
+  dv = (/0, 1, 0/)
+  dw = (/0, 0, 1/)
+
+  val(:, :, :, :) = 0.0
+  deriv(:, :, :, :, :) = 0.0
+  deriv2(:, :, :, :, :, :) = 0.0
+  !$OMP PARALLEL DO IF(n*m*l > 1) COLLAPSE(3) &
+  !$OMP PRIVATE(ii, jj, kk, i, j, k, p, q, ileftu, ileftv, ileftw, &
+  !$OMP istartu, istartv, istartw, Bu, Bv, Bw, B)
+  do ii=1, n
+     do jj=1, m
+        do kk=1, l
+           ! U
+           call findSpan(u(kk, jj, ii), ku, tu, nctlu, ileftu)
+           call derivBasis(tu, nctlu, ku, u(kk, jj, ii), ileftu, order, Bu)
+           istartu = ileftu-ku
+
+           ! V
+           call findSpan(v(kk, jj, ii), kv, tv, nctlv, ileftv)
+           call derivBasis(tv, nctlv, kv, v(kk, jj, ii), ileftv, order, Bv)
+           istartv = ileftv-kv
+
+           ! W
+           call findSpan(w(kk, jj, ii), kw, tw, nctlw, ileftw)
+           call derivBasis(tw, nctlw, kw, w(kk, jj, ii), ileftw, order, Bw)
+           istartw = ileftw-kw
+
+           do i=1, ku
+              do j=1, kv
+                 do k=1, kw
+                    B = coef(:, istartw+k, istartv+j, istartu+i)
+                    val(:, kk, jj, ii) = val(:, kk, jj, ii) + &
+                         Bu(0, i)*Bv(0, j)*Bw(0, k)*B
+                    if (order >= 1) then
+                       do p=1, 3
+                          deriv(:, p, kk, jj, ii) = deriv(:, p, kk, jj, ii) + &
+                               Bu(du(p), i)*Bv(dv(p), j)*Bw(dw(p), k)*B
+                       end do
+                    end if
+                    if (order >= 2) then
+                       do p=1, 3
+                          do q=p, 3
+                             deriv2(:, q, p, kk, jj, ii) = &
+                                  deriv2(:, q, p, kk, jj, ii) + &
+                                  Bu(du(p)+du(q), i)*Bv(dv(p)+dv(q), j)* &
+                                  Bw(dw(p)+dw(q), k)*B
+                          end do
+                       end do
+                    end if
+                 end do
+              end do
+           end do
+           do p=1, 3
+              do q=p+1, 3
+                 deriv2(:, p, q, kk, jj, ii) = deriv2(:, q, p, kk, jj, ii)
+              end do
+           end do
+        end do
+     end do
+  end do
+  !$OMP END PARALLEL DO
+end subroutine eval_volume_derivs
@@ -110,3 +110,249 @@ subroutine insertKnot(u, r, t, k, coef, nctl, ndim, t_new, coef_new, ileft)
   call findSpan(u, k, t_new, nctl+r, ileft)
 end subroutine insertKnot
  
+
+subroutine refineKnot(x, nx, t, k, coef, nctl, ndim, t_new, coef_new)
+
+  !***DESCRIPTION
+  !
+  !     Abstract refineKnot inserts all the knots in x into the curve
+  !     in a single pass. Adapted from "The NURBS Book" Algorithm A5.4
+  !
+  !     Since ndim can be any size, this can also refine every slice
+  !     of a surface or volume at once by treating the coefficients
+  !     of all the slices as one long vector.
+  !
+  !     Description of Arguments
+  !     Input
+  !     x       - Real, knots to insert, size(nx). Must be sorted and
+  !               lie strictly inside the knot vector
+  !     nx      - Integer, number of knots to insert
+  !     t       - Real,Knot vector. Length nctl+k
+  !     k       - Integer,order of B-spline
+  !     coef    - Real,Array of B-spline coefficients  Size (ndim,nctl)
+  !     nctl    - Integer,Number of control points
+  !     ndim    - Integer, dimension of curve
+
+  !     Ouput
+  !     t_new    - Real, vector of lenght(nctl+k+nx)
+  !     coef_new - Real, Array of new cofficients size(ndim,nctl+nx)
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)     :: nx, k, nctl, ndim
+  real(kind=realType), intent(in)     :: x(0:nx-1)
+  real(kind=realType), intent(in)     :: t(0:nctl+k-1)
+  real(kind=realType), intent(in)     :: coef(ndim, 0:nctl-1)
+
+  ! Output
+  real(kind=realType), intent(out)    :: t_new(0:nctl+k+nx-1)
+  real(kind=realType), intent(out)    :: coef_new(ndim, 0:nctl+nx-1)
+
+  ! Working
+  integer                             :: p, n, m, r, a, b, i, j, kk, l, ind
+  real(kind=realType)                 :: alpha
+
+  ! Use the notation of the NURBS book, with zero based indices
+  p = k-1
+  n = nctl-1
+  m = n+p+1
+  r = nx-1
+
+  ! findSpan returns one based indices
+  call findSpan(x(0), k, t, nctl, a)
+  a = a - 1
+  call findSpan(x(r), k, t, nctl, b)
+
+  ! -------- Save unaltered control points and knots
+  do j=0,a-p
+     coef_new(:,j) = coef(:,j)
+  end do
+
+  do j=b-1,n
+     coef_new(:,j+r+1) = coef(:,j)
+  end do
+
+  do j=0,a
+     t_new(j) = t(j)
+  end do
+
+  do j=b+p,m
+     t_new(j+r+1) = t(j)
+  end do
+
+  ! -------- Insert the knots from the back
+  i = b+p-1
+  kk = b+p+r
+  do j=r,0,-1
+     do while (x(j) <= t(i) .and. i > a)
+        coef_new(:,kk-p-1) = coef(:,i-p-1)
+        t_new(kk) = t(i)
+        kk = kk - 1
+        i = i - 1
+     end do
+
+     coef_new(:,kk-p-1) = coef_new(:,kk-p)
+     do l=1,p
+        ind = kk-p+l
+        alpha = t_new(kk+l) - x(j)
+        if (alpha == 0.0) then
+           coef_new(:,ind-1) = coef_new(:,ind)
+        else
+           alpha = alpha/(t_new(kk+l) - t(i-p+l))
+           coef_new(:,ind-1) = alpha*coef_new(:,ind-1) + &
+                (1.0-alpha)*coef_new(:,ind)
+        end if
+     end do
+     t_new(kk) = x(j)
+     kk = kk - 1
+  end do
+
+end subroutine refineKnot
+
+subroutine removeKnot(r, s, num, t, k, coef, nctl, ndim, nslice, tol, &
+     t_new, coef_new, nremoved)
+
+  !***DESCRIPTION
+  !
+  !     Abstract removeKnot tries to remove the knot t(r) up to num
+  !     times. A removal is only done if the control points can be
+  !     recovered to within tol. Adapted from "The NURBS Book"
+  !     Algorithm A5.8
+  !
+  !     The coefficients may contain several slices, e.g. the rows of
+  !     a surface, in which case the knot is only removed if the
+  !     tolerance is met for every slice.
+  !
+  !     Description of Arguments
+  !     Input
+  !     r       - Integer, zero based index of the last occurrence of
+  !               the knot to remove
+  !     s       - Integer, multiplicity of the knot
+  !     num     - Integer, maximum number of times to remove the knot
+  !     t       - Real,Knot vector. Length nctl+k
+  !     k       - Integer,order of B-spline
+  !     coef    - Real,Array of B-spline coefficients
+  !               Size (ndim,nslice,nctl)
+  !     nctl    - Integer,Number of control points
+  !     ndim    - Integer, dimension of curve
+  !     nslice  - Integer, number of slices
+  !     tol     - Real, tolerance on the control point distance
+
+  !     Ouput
+  !     t_new    - Real, new knot vector. Only the first
+  !                nctl+k-nremoved values are used
+  !     coef_new - Real, new coefficients. Only the first
+  !                nctl-nremoved control points are used
+  !     nremoved - Integer, number of times the knot was removed
+
+  use precision
+  implicit none
+
+  ! Input
+  integer            , intent(in)     :: r, s, num, k, nctl, ndim, nslice
+  real(kind=realType), intent(in)     :: t(0:nctl+k-1)
+  real(kind=realType), intent(in)     :: coef(ndim, nslice, 0:nctl-1)
+  real(kind=realType), intent(in)     :: tol
+
+  ! Output
+  real(kind=realType), intent(out)    :: t_new(0:nctl+k-1)
+  real(kind=realType), intent(out)    :: coef_new(ndim, nslice, 0:nctl-1)
+  integer            , intent(out)    :: nremoved
+
+  ! Working
+  integer                             :: p, n, m, ord, fout, first, last, off
+  integer                             :: i, j, ii, jj, tt, kk
+  real(kind=realType)                 :: u, alfi, alfj, dist
+  real(kind=realType), allocatable    :: temp(:, :, :)
+
+  ! Use the notation of the NURBS book, with zero based indices
+  p = k-1
+  n = nctl-1
+  m = n+p+1
+  ord = p+1
+  u = t(r)
+  fout = (2*r-s-p)/2
+  last = r-s
+  first = r-p
+
+  t_new = t
+  coef_new = coef
+  allocate(temp(ndim, nslice, 0:2*k+1))
+
+  tt = 0
+  removal: do while (tt < num)
+     ! Compute the new control points for one removal step
+     off = first-1
+     temp(:, :, 0) = coef_new(:, :, off)
+     temp(:, :, last+1-off) = coef_new(:, :, last+1)
+     i = first
+     j = last
+     ii = 1
+     jj = last-off
+     do while (j-i > tt)
+        alfi = (u-t(i))/(t(i+ord+tt)-t(i))
+        alfj = (u-t(j-tt))/(t(j+ord)-t(j-tt))
+        temp(:, :, ii) = (coef_new(:, :, i) - (1.0-alfi)*temp(:, :, ii-1))/alfi
+        temp(:, :, jj) = (coef_new(:, :, j) - alfj*temp(:, :, jj+1))/(1.0-alfj)
+        i = i + 1
+        ii = ii + 1
+        j = j - 1
+        jj = jj - 1
+     end do
+
+     ! Check if the knot is removable
+     if (j-i < tt) then
+        dist = maxval(sqrt(sum((temp(:, :, ii-1) - temp(:, :, jj+1))**2, 1)))
+     else
+        alfi = (u-t(i))/(t(i+ord+tt)-t(i))
+        dist = maxval(sqrt(sum((coef_new(:, :, i) - alfi*temp(:, :, ii+tt+1) - &
+             (1.0-alfi)*temp(:, :, ii-1))**2, 1)))
+     end if
+
+     if (dist > tol) then
+        exit removal
+     end if
+
+     ! Save the new control points
+     i = first
+     j = last
+     do while (j-i > tt)
+        coef_new(:, :, i) = temp(:, :, i-off)
+        coef_new(:, :, j) = temp(:, :, j-off)
+        i = i + 1
+        j = j - 1
+     end do
+     first = first - 1
+     last = last + 1
+     tt = tt + 1
+  end do removal
+
+  deallocate(temp)
+  nremoved = tt
+  if (tt == 0) then
+     return
+  end if
+
+  ! Shift the knots and control points down
+  do kk=r+1,m
+     t_new(kk-tt) = t_new(kk)
+  end do
+
+  j = fout
+  i = j
+  do kk=1,tt-1
+     if (mod(kk, 2) == 1) then
+        i = i + 1
+     else
+        j = j - 1
+     end if
+  end do
+
+  do kk=i+1,n
+     coef_new(:, :, j) = coef_new(:, :, kk)
+     j = j + 1
+  end do
+
+end subroutine removeKnot
@@ -0,0 +1,45 @@
+subroutine set_num_threads(n)
+
+  !***DESCRIPTION
+  !
+  !     Abstract: set_num_threads sets the number of OpenMP threads
+  !     used by the evaluation, jacobian and projection routines. If
+  !     the library was compiled without OpenMP support this does
+  !     nothing.
+  !
+  !     Description of Arguments
+  !     Input
+  !     n       - Integer, Number of threads to use
+
+  !$ use omp_lib
+  implicit none
+
+  ! Input
+  integer, intent(in) :: n
+
+  !$ call omp_set_num_threads(max(n, 1))
+
+end subroutine set_num_threads
+
+subroutine get_num_threads(n)
+
+  !***DESCRIPTION
+  !
+  !     Abstract: get_num_threads returns the number of OpenMP threads
+  !     that will be used by the next parallel region. If the library
+  !     was compiled without OpenMP support this is always 1.
+  !
+  !     Description of Arguments
+  !     Ouput
+  !     n       - Integer, Number of threads
+
+  !$ use omp_lib
+  implicit none
+
+  ! Output
+  integer, intent(out) :: n
+
+  n = 1
+  !$ n = omp_get_max_threads()
+
+end subroutine get_num_threads
@@ -96,6 +96,295 @@ class Test(unittest.TestCase):
     
 
 
+    def test_project_batch(self):
+        # The batch projection must find the closest point on the
+        # curve. The reference is the minimum over a dense sampling of
+        # the curve, polished with the single point Newton search.
+        n = 100
+        theta = numpy.linspace(0.0, numpy.pi*2, n)
+        x = numpy.cos(theta)
+        y = numpy.sin(theta)
+        z = numpy.linspace(0,1,n)
+        curve = pySpline.Curve(x=x,y=y,z=z,k=4,nCtl=16)
+        pts = numpy.array([[0.4,1.5,1.5],[-.1,.5,1.8],[1,0,0.5],
+                           [0.3,-0.2,0.6],[0,-1.5,0.4]])
+        s, D = curve.projectPoint(pts)
+
+        sCheck = numpy.linspace(0,1,10001)
+        X = curve(sCheck)
+        for i in range(len(pts)):
+            dist = numpy.linalg.norm(X - pts[i], axis=1)
+            j = numpy.argmin(dist)
+            self.assertLessEqual(numpy.linalg.norm(D[i]), dist[j])
+            si, Di = pySpline.libspline.point_curve(
+                pts[i], curve.t, curve.k, curve.coef.T, 25, 1e-12,
+                sCheck[j])
+            numpy.testing.assert_allclose(s[i], si, atol=1e-8)
+            numpy.testing.assert_allclose(D[i], Di, atol=1e-8)
+            numpy.testing.assert_allclose(D[i], curve(s[i]) - pts[i],
+                                          atol=1e-12)
+
+    def test_deriv_batch(self):
+        # Vector derivative evaluation must match the scalar bvalu
+        # based routines and finite differences of the curve
+        n = 100
+        theta = numpy.linspace(0.0, numpy.pi*2, n)
+        x = numpy.cos(theta)
+        y = numpy.sin(theta)
+        z = numpy.linspace(0,1,n)
+        curve = pySpline.Curve(x=x,y=y,z=z,k=4,nCtl=16)
+        s = numpy.linspace(0,1,25)
+        ds = curve.getDerivative(s)
+        d2s = curve.getSecondDerivative(s)
+        self.assertEqual(ds.shape, (25, 3))
+        self.assertEqual(d2s.shape, (25, 3))
+        libspline = pySpline.libspline
+        for i in range(len(s)):
+            numpy.testing.assert_allclose(
+                ds[i], libspline.eval_curve_deriv(s[i], curve.t, curve.k,
+                                                  curve.coef.T), atol=1e-12)
+            numpy.testing.assert_allclose(
+                d2s[i], libspline.eval_curve_deriv2(s[i], curve.t, curve.k,
+                                                    curve.coef.T), atol=1e-10)
+
+        h = 1e-6
+        s = s[1:-1]
+        numpy.testing.assert_allclose(curve.getDerivative(s),
+                                      (curve(s+h) - curve(s-h))/(2*h),
+                                      atol=1e-7)
+        numpy.testing.assert_allclose(
+            curve.getSecondDerivative(s),
+            (curve.getDerivative(s+h) - curve.getDerivative(s-h))/(2*h),
+            atol=1e-5)
+
+    def test_evaluate(self):
+        # The fused evaluation must match the separate calls
+        rand = numpy.random.RandomState(0)
+        t = [0,0,0,0,0.3,0.3,0.7,1,1,1,1]
+        curve = pySpline.Curve(t=t, k=4, coef=rand.random_sample((7, 3)))
+        s = numpy.hstack([rand.random_sample(20), [0.0, 0.3, 1.0]])
+        val, ds, d2s = curve.evaluate(s)
+        numpy.testing.assert_allclose(val, curve(s), atol=1e-14)
+        numpy.testing.assert_allclose(ds, curve.getDerivative(s), atol=1e-13)
+        numpy.testing.assert_allclose(d2s, curve.getSecondDerivative(s),
+                                      atol=1e-12)
+        val, ds = curve.evaluate(s[3], order=1)
+        numpy.testing.assert_allclose(val, curve(s[3]), atol=1e-14)
+        numpy.testing.assert_allclose(ds, curve.getDerivative(s[3]),
+                                      atol=1e-13)
+        self.assertEqual(len(curve.evaluate(s, order=0)), 1)
+        self.assertRaises(pySpline.Error, curve.evaluate, s, order=3)
+
+    def test_fit_report(self):
+        # The parameter correction must reduce the error and stop as
+        # soon as one of the tolerances is met
+        n = 100
+        theta = numpy.linspace(0.0, numpy.pi*2, n)**1.4
+        x = numpy.cos(theta)
+        y = numpy.sin(2*theta)
+        z = theta/6
+        curve = pySpline.Curve(x=x,y=y,z=z,k=4,nCtl=16)
+        report = curve.recompute(maxIter=10)
+        self.assertEqual(len(report['rms']), 10)
+        self.assertLess(report['rms'][-1], report['rms'][0])
+        self.assertIs(curve.fitReport, report)
+        report = curve.recompute(maxIter=10, rmsTol=1.0)
+        self.assertEqual(len(report['rms']), 1)
+        self.assertEqual(report['exitReason'], 'rmsTol')
+        report = curve.recompute(maxIter=100, stallTol=0.5)
+        self.assertEqual(report['exitReason'], 'stall')
+
+    def test_para_corr(self):
+        # nIter > 1 runs the parameter correction after each fit, which
+        # must reduce the error, and the tolerances must stop it early
+        n = 100
+        theta = numpy.linspace(0.0, numpy.pi*2, n)**1.4
+        kwargs = {'x': numpy.cos(theta), 'y': numpy.sin(2*theta),
+                  'z': theta/6, 'k': 4, 'nCtl': 16}
+        curve = pySpline.Curve(nIter=10, **kwargs)
+        rms = numpy.array(curve.fitReport['rms'])
+        self.assertEqual(len(rms), 10)
+        self.assertTrue(numpy.all(numpy.diff(rms) < 0))
+        self.assertLess(rms[-1], 0.2*rms[0])
+        self.assertGreater(numpy.max(abs(curve.s - pySpline.Curve(**kwargs).s)),
+                           1e-3)
+
+        rms = pySpline.Curve(**kwargs).recompute(nIter=10)['rms']
+        report = pySpline.Curve(**kwargs).recompute(nIter=10, rmsTol=rms[3])
+        self.assertEqual(report['exitReason'], 'rmsTol')
+        numpy.testing.assert_allclose(report['rms'], rms[:4])
+
+        report = pySpline.Curve(**kwargs).recompute(nIter=10, stallTol=0.2)
+        self.assertEqual(report['exitReason'], 'stall')
+        rms = numpy.array(report['rms'])
+        decrease = (rms[:-1] - rms[1:])/rms[:-1]
+        self.assertLess(len(rms), 10)
+        self.assertLess(decrease[-1], 0.2)
+        self.assertTrue(numpy.all(decrease[:-1] >= 0.2))
+
+    def test_fit_curves(self):
+        # Batch fitting must match fitting each curve separately
+        rand = numpy.random.RandomState(0)
+        n = 30
+        s = numpy.linspace(0,1,n)
+        Xs = rand.random_sample((5, n, 3))
+        for nCtl in [None, 10]:
+            curves = pySpline.fitCurves(Xs, s, 4, nCtl=nCtl)
+            self.assertEqual(len(curves), 5)
+            for i in range(5):
+                if nCtl is None:
+                    curve = pySpline.Curve(X=Xs[i], s=s, k=4)
+                else:
+                    curve = pySpline.Curve(X=Xs[i], s=s, k=4, nCtl=nCtl)
+                numpy.testing.assert_allclose(curves[i].t, curve.t)
+                numpy.testing.assert_allclose(curves[i].coef, curve.coef,
+                                              atol=1e-12)
+
+    def test_streaming_fit(self):
+        # Fitting a curve in weighted chunks must match a dense weighted
+        # least squares solve with all the points at once
+        rand = numpy.random.RandomState(0)
+        s = rand.random_sample(500)
+        X = numpy.vstack([s, numpy.sin(5*s), numpy.cos(3*s)]).T
+        weights = 0.5 + rand.random_sample(500)
+        fit = pySpline.StreamingFit(4, 12)
+        fit.add(s, X, weights=weights, chunkSize=70)
+        curve = fit.solve()
+        N = pySpline._curveJacobian(s, curve.t, 4, 12).toarray()
+        W = numpy.sqrt(weights)[:, numpy.newaxis]
+        coef = numpy.linalg.lstsq(W*N, W*X, rcond=None)[0]
+        numpy.testing.assert_allclose(curve.coef, coef, atol=1e-10)
+        rms = numpy.sqrt(numpy.sum(weights[:, numpy.newaxis]*
+                                   (N.dot(coef) - X)**2)/numpy.sum(weights))
+        numpy.testing.assert_allclose(
+            fit.computeRMS(s, X, weights=weights, chunkSize=70), rms,
+            rtol=1e-12)
+
+    def test_banded_solve(self):
+        # The banded factorizations must match a dense solve
+        rand = numpy.random.RandomState(0)
+        s = numpy.linspace(0,1,50)
+        X = rand.random_sample((50, 2))
+        curve = pySpline.Curve(X=X, s=s, k=4)
+        N = pySpline._curveJacobian(s, curve.t, 4, 50)
+        numpy.testing.assert_allclose(pySpline._factorize(N)(X),
+                                      numpy.linalg.solve(N.toarray(), X),
+                                      atol=1e-10)
+        curve = pySpline.Curve(X=X, s=s, k=4, nCtl=20)
+        N = pySpline._curveJacobian(s, curve.t, 4, 20)
+        NTN = N.T*N
+        numpy.testing.assert_allclose(
+            pySpline._factorize(NTN, symmetric=True)(N.T*X),
+            numpy.linalg.solve(NTN.toarray(), N.T*X), atol=1e-10)
+
+        # A singular system must raise an error rather than return
+        # garbage
+        t = pySpline.Curve(X=X, s=s, k=4).t
+        s[26] = s[25]
+        N = pySpline._curveJacobian(s, t, 4, 50)
+        self.assertRaises(pySpline.Error, pySpline._factorize, N)
+
+    def test_refit(self):
+        # refit() must match a new fit with the same parameters and
+        # refitAdjoint() must be the transpose of refit()
+        rand = numpy.random.RandomState(0)
+        s = numpy.linspace(0,1,40)
+        X = numpy.vstack([s, numpy.sin(4*s)]).T
+        weights = numpy.ones(40)
+        weights[[0, -1]] = -1
+        curve = pySpline.Curve(X=X, s=s, k=4, nCtl=12, weights=weights)
+        dX = rand.random_sample(X.shape)
+        curve.refit(X + dX)
+        newCurve = pySpline.Curve(X=X+dX, s=s, k=4, nCtl=12, weights=weights)
+        numpy.testing.assert_allclose(curve.coef, newCurve.coef, atol=1e-12)
+
+        coef0 = pySpline.Curve(X=X, s=s, k=4, nCtl=12, weights=weights).coef
+        coefBar = rand.random_sample(curve.coef.shape)
+        numpy.testing.assert_allclose(
+            numpy.sum(coefBar*(curve.coef - coef0)),
+            numpy.sum(curve.refitAdjoint(coefBar)*dX), rtol=1e-10)
+
+        # The factorization is only valid for the knots it was built
+        # with
+        curve.t = curve.t**1.1
+        self.assertRaises(pySpline.Error, curve.refit, X)
+        self.assertRaises(pySpline.Error, curve.refitAdjoint, coefBar)
+        curve = pySpline.Curve(X=X, s=s, k=4, nCtl=12, weights=weights)
+        curve.insertKnot(0.5, 1)
+        self.assertRaises(pySpline.Error, curve.refit, X)
+        curve = pySpline.Curve(X=X, s=s, k=4, nCtl=12, weights=weights)
+        curve.refine([0.31, 0.62])
+        self.assertRaises(pySpline.Error, curve.refit, X)
+
+    def test_adaptive_fit(self):
+        # The adaptive fit must meet the tolerance with fewer control
+        # points than a plain LMS fit needs for the same accuracy
+        s = numpy.linspace(0,1,200)
+        X = numpy.vstack([s, numpy.tanh(20*(s-0.3))]).T
+        curve = pySpline.Curve(X=X, s=s, k=4, nCtl=10)
+        maxError = curve.adaptiveFit(1e-4)
+        self.assertLessEqual(maxError, 1e-4)
+        err = numpy.linalg.norm(curve(s) - X, axis=1)
+        numpy.testing.assert_allclose(numpy.max(err), maxError)
+
+        lms = pySpline.Curve(X=X, s=s, k=4, nCtl=curve.nCtl)
+        self.assertGreater(numpy.max(numpy.linalg.norm(lms(s) - X, axis=1)),
+                           1e-4)
+
+        # With the default chord length parameters the split points can
+        # land on data points, which must still be counted in their span
+        s = numpy.linspace(0,1,100)
+        X = numpy.vstack([s, numpy.sin(6*s), s**2]).T
+        curve = pySpline.Curve(X=X, k=4, nCtl=10)
+        maxError = curve.adaptiveFit(1e-5)
+        self.assertLessEqual(maxError, 1e-5)
+        err = numpy.linalg.norm(curve(curve.s) - X, axis=1)
+        numpy.testing.assert_allclose(numpy.max(err), maxError)
+
+    def test_remove_knots(self):
+        # Removing knots from an interpolated curve must keep it within
+        # the tolerance, and knots that were only inserted must be
+        # removed exactly
+        s = numpy.linspace(0,1,100)
+        X = numpy.vstack([s, numpy.sin(4*s), 0.2*numpy.cos(9*s)]).T
+        curve = pySpline.Curve(X=X, s=s, k=4)
+        sCheck = numpy.linspace(0,1,1001)
+        values = curve(sCheck)
+        maxError, ratio = curve.removeKnots(1e-4)
+        self.assertLessEqual(maxError, 1e-4)
+        self.assertGreater(ratio, 4)
+        self.assertLess(numpy.max(numpy.linalg.norm(curve(sCheck) - values,
+                                                    axis=1)), 1.1e-4)
+        self.assertRaises(pySpline.Error, curve.refit, X)
+
+        t = curve.t.copy()
+        curve.refine([0.13, 0.13, 0.57])
+        maxError, ratio = curve.removeKnots(1e-12)
+        numpy.testing.assert_allclose(curve.t, t)
+
+    def test_power_basis(self):
+        # The power basis evaluation must match the standard evaluation,
+        # including outside the parametric range with a short end span
+        # and after the coefficients and knots are modified
+        rand = numpy.random.RandomState(0)
+        t = numpy.hstack([numpy.zeros(8), [0.2, 0.5, 0.99], numpy.ones(8)])
+        curve = pySpline.Curve(t=t, k=8, coef=rand.random_sample((11, 3)))
+        s = numpy.hstack([rand.random_sample(20), [-0.1, 0.0, 0.995, 1.0,
+                                                   1.1]])
+        expected = curve(s)
+        curve.setPowerBasis()
+        numpy.testing.assert_allclose(curve(s), expected, rtol=1e-12,
+                                      atol=1e-13)
+        numpy.testing.assert_allclose(curve(1.1), expected[-1], rtol=1e-12)
+
+        curve.coef[4] += 1.0
+        curve.coef = curve.coef
+        curve.insertKnot(0.7, 1)
+        values = curve(s)
+        curve.setPowerBasis(False)
+        numpy.testing.assert_allclose(values, curve(s), rtol=1e-12,
+                                      atol=1e-13)
+
     def regression_test(self, handler, solve=False):
         
         # print('+--------------------------------------+')
@@ -9,6 +9,7 @@ import os
 # =============================================================================
 import numpy
 import unittest
+from scipy.interpolate import BSpline
 
 # =============================================================================
 # Extension modules
@@ -17,6 +18,13 @@ from pyspline import pySpline
 from baseclasses import BaseRegTest
 
 
+def basis_matrix(t, k, x):
+    '''Reference b-spline basis matrix from scipy for checking the
+    libspline kernels'''
+    nCtl = len(t) - k
+    return BSpline(numpy.array(t, 'd'), numpy.eye(nCtl), k-1)(x)
+
+
 def eval_test(surface, handler):
     '''Eval fixed points from the surface'''
     # Evaluations are only good to about 1e-10 since there is fitting
@@ -186,6 +194,366 @@ class Test(unittest.TestCase):
     
 
 
+    def test_project_batch(self):
+        # The batch projection must find the closest point on the
+        # surface. The reference is the minimum over a dense sampling of
+        # the surface, polished with the single point Newton search.
+        nu = 10
+        nv = 10
+        u = numpy.linspace(0,4,nu)
+        v = numpy.linspace(0,4,nv)
+        [V,U] = numpy.meshgrid(v,u)
+        Z = numpy.cos(U)*numpy.sin(V)
+        surface = pySpline.Surface(x=U, y=V, z=Z, ku=4, kv=4,
+                                   nCtlu=5, nCtlv=5)
+        pts = numpy.array([[0,0,0],[2,3,-1],[3,2.5,-.1],[-1,-1,0],[6,6,0],
+                           [1.5,0.7,1.2]])
+        u, v, D = surface.projectPoint(pts, eps=1e-12)
+
+        s = numpy.linspace(0,1,201)
+        X = surface.getValue(s, s, grid=True)
+        for i in range(len(pts)):
+            dist = numpy.linalg.norm(X - pts[i], axis=-1)
+            iu, iv = numpy.unravel_index(numpy.argmin(dist), dist.shape)
+            self.assertLessEqual(numpy.linalg.norm(D[i]), dist[iu, iv])
+            ui, vi, Di = pySpline.libspline.point_surface(
+                pts[i], surface.tu, surface.tv, surface.ku, surface.kv,
+                surface.coef.T, 25, 1e-12, s[iu], s[iv])
+            numpy.testing.assert_allclose([u[i], v[i]], [ui, vi], atol=1e-8)
+            numpy.testing.assert_allclose(D[i], Di, atol=1e-8)
+            numpy.testing.assert_allclose(
+                D[i], surface.getValue(u[i], v[i]) - pts[i], atol=1e-12)
+
+    def test_quad_adt(self):
+        # The persistent ADT must give the same result as searchquads,
+        # update() must match a new tree, and freed slots are reused
+        rand = numpy.random.RandomState(0)
+        n = 9
+        u = numpy.linspace(0,1,n)
+        [U,V] = numpy.meshgrid(u,u,indexing='ij')
+        pts = numpy.dstack([U, V, 0.3*numpy.sin(3*U)*V]).reshape((-1, 3))
+        ind = numpy.arange(n*n).reshape((n, n)) + 1
+        conn = numpy.vstack([ind[:-1, :-1].flatten(), ind[1:, :-1].flatten(),
+                             ind[1:, 1:].flatten(),
+                             ind[:-1, 1:].flatten()]).T
+        searchPts = rand.random_sample((50, 3))
+        searchquads = pySpline.libspline.adtprojections.searchquads
+
+        adt = pySpline.QuadADT(pts, conn)
+        faceID, uv = adt.search(searchPts)
+        faceID0, uv0 = searchquads(pts.T, conn.T, searchPts.T)
+        numpy.testing.assert_array_equal(faceID, faceID0)
+        numpy.testing.assert_allclose(uv, uv0.T, atol=1e-14)
+
+        newPts = pts + 0.05*rand.random_sample(pts.shape)
+        adt.update(newPts)
+        adt2 = pySpline.QuadADT(newPts, conn)
+        faceID, uv = adt.search(searchPts)
+        faceID2, uv2 = adt2.search(searchPts)
+        numpy.testing.assert_array_equal(faceID, faceID2)
+        numpy.testing.assert_allclose(uv, uv2, atol=1e-14)
+        self.assertRaises(pySpline.Error, adt.update, newPts[1:])
+
+        index = adt.adtIndex
+        adt.free()
+        self.assertRaises(pySpline.Error, adt.search, searchPts)
+        self.assertRaises(pySpline.Error, adt.update, pts)
+        adt.free()
+        adt3 = pySpline.QuadADT(pts, conn)
+        self.assertEqual(adt3.adtIndex, index)
+        faceID, uv = adt3.search(searchPts)
+        numpy.testing.assert_array_equal(faceID, faceID0)
+        numpy.testing.assert_allclose(uv, uv0.T, atol=1e-14)
+        adt2.free()
+        adt3.free()
+
+    def test_basis_matrix(self):
+        # The precomputed basis matrix must reproduce getValue, also
+        # after the coefficients are changed
+        rand = numpy.random.RandomState(0)
+        nu = 10
+        nv = 10
+        u = numpy.linspace(0,4,nu)
+        v = numpy.linspace(0,4,nv)
+        [V,U] = numpy.meshgrid(v,u)
+        Z = numpy.cos(U)*numpy.sin(V)
+        surface = pySpline.Surface(x=U, y=V, z=Z, ku=4, kv=3,
+                                   nCtlu=6, nCtlv=5)
+        uu = rand.random_sample((4, 7))
+        vv = rand.random_sample((4, 7))
+        N = surface.getBasisMatrix(uu, vv)
+        numpy.testing.assert_allclose(N(surface.coef), surface(uu, vv),
+                                      atol=1e-14)
+        surface.coef = rand.random_sample(surface.coef.shape)
+        numpy.testing.assert_allclose(N(surface.coef), surface(uu, vv),
+                                      atol=1e-14)
+        numpy.testing.assert_allclose(N(surface.coef)[1,2],
+                                      surface(uu[1,2], vv[1,2]), atol=1e-14)
+
+    def test_deriv_batch(self):
+        # Array derivative evaluation must match the pointwise calls
+        rand = numpy.random.RandomState(0)
+        nu = 10
+        nv = 10
+        u = numpy.linspace(0,4,nu)
+        v = numpy.linspace(0,4,nv)
+        [V,U] = numpy.meshgrid(v,u)
+        Z = numpy.cos(U)*numpy.sin(V)
+        surface = pySpline.Surface(x=U, y=V, z=Z, ku=4, kv=3,
+                                   nCtlu=6, nCtlv=5)
+        uu = rand.random_sample((4, 7))
+        vv = rand.random_sample((4, 7))
+        d1 = surface.getDerivative(uu, vv)
+        d2 = surface.getSecondDerivative(uu, vv)
+        self.assertEqual(d1.shape, (4, 7, 2, 3))
+        self.assertEqual(d2.shape, (4, 7, 2, 2, 3))
+        for i in range(4):
+            for j in range(7):
+                numpy.testing.assert_allclose(
+                    d1[i, j], surface.getDerivative(uu[i, j], vv[i, j]),
+                    atol=1e-14)
+                numpy.testing.assert_allclose(
+                    d2[i, j], surface.getSecondDerivative(uu[i, j], vv[i, j]),
+                    atol=1e-14)
+        numpy.testing.assert_allclose(
+            surface.getDerivative(uu[0], vv[0]), d1[0], atol=1e-14)
+
+    def test_evaluate(self):
+        # The fused evaluation must match the separate calls
+        nu = 10
+        nv = 10
+        u = numpy.linspace(0,4,nu)
+        v = numpy.linspace(0,4,nv)
+        [V,U] = numpy.meshgrid(v,u)
+        Z = numpy.cos(U)*numpy.sin(V)
+        surface = pySpline.Surface(x=U, y=V, z=Z, ku=4, kv=3,
+                                   nCtlu=6, nCtlv=5)
+        rand = numpy.random.RandomState(0)
+        uu, vv = rand.random_sample((2, 4, 7))
+        val, deriv, deriv2 = surface.evaluate(uu, vv)
+        numpy.testing.assert_allclose(val, surface.getValue(uu, vv),
+                                      atol=1e-14)
+        numpy.testing.assert_allclose(deriv, surface.getDerivative(uu, vv),
+                                      atol=1e-14)
+        numpy.testing.assert_allclose(deriv2,
+                                      surface.getSecondDerivative(uu, vv),
+                                      atol=1e-14)
+        self.assertEqual(len(surface.evaluate(uu, vv, order=1)), 2)
+
+    def test_grid(self):
+        # Grid evaluation must match evaluating on the full meshgrid
+        nu = 10
+        nv = 10
+        u = numpy.linspace(0,4,nu)
+        v = numpy.linspace(0,4,nv)
+        [V,U] = numpy.meshgrid(v,u)
+        Z = numpy.cos(U)*numpy.sin(V)
+        surface = pySpline.Surface(x=U, y=V, z=Z, ku=4, kv=3,
+                                   nCtlu=6, nCtlv=5)
+        uu = numpy.linspace(0,1,13)
+        vv = numpy.linspace(0,1,17)
+        [VV,UU] = numpy.meshgrid(vv,uu)
+        numpy.testing.assert_allclose(surface.getValue(uu, vv, grid=True),
+                                      surface.getValue(UU, VV), atol=1e-14)
+
+    def test_separable_fit(self):
+        # With u and v given the data is on a tensor grid and the fit
+        # is done direction by direction. Check it against the
+        # interpolation condition and a dense least squares solve.
+        u = numpy.linspace(0,4,12)
+        v = numpy.linspace(0,4,9)**1.5
+        [V,U] = numpy.meshgrid(v,u)
+        Z = numpy.cos(U)*numpy.sin(V)
+        X = numpy.dstack([U, V, Z])
+        surface = pySpline.Surface(X=X, ku=4, kv=3, u=u, v=v)
+        numpy.testing.assert_allclose(surface(surface.U, surface.V), X,
+                                      atol=1e-12)
+
+        surface = pySpline.Surface(X=X, ku=4, kv=3, u=u, v=v,
+                                   nCtlu=7, nCtlv=5)
+        N = surface.getBasisMatrix(surface.U, surface.V).N.toarray()
+        coef = numpy.linalg.lstsq(N, X.reshape((-1, 3)), rcond=None)[0]
+        numpy.testing.assert_allclose(surface.coef.reshape((-1, 3)), coef,
+                                      atol=1e-12)
+
+    def test_para_corr(self):
+        # Parameter correction must reduce the LMS fit error and keep
+        # the boundary parameters on the boundary
+        n = 20
+        u = numpy.linspace(0,1,n)**1.3
+        v = numpy.linspace(0,1,n)
+        [V,U] = numpy.meshgrid(v,u)
+        X = numpy.dstack([U+0.05*numpy.sin(7*V), V,
+                          0.3*numpy.sin(3*U)*numpy.cos(2*V)])
+        surface = pySpline.Surface(X=X, ku=4, kv=4, nCtlu=6, nCtlv=6)
+        rms = surface.rms
+        surface.recompute(nIter=5)
+        self.assertLess(surface.rms, 0.5*rms)
+        numpy.testing.assert_allclose(surface.U[[0, -1]], [[0.0]*n, [1.0]*n])
+        numpy.testing.assert_allclose(surface.V[:, [0, -1]].T,
+                                      [[0.0]*n, [1.0]*n])
+
+        # rms is the error of the final fit. rmsTol is an absolute
+        # target and stallTol a relative decrease, both checked after
+        # each refit, so they stop as soon as a fit meets them
+        rms = []
+        for nIter in range(1, 6):
+            surface = pySpline.Surface(X=X, ku=4, kv=4, nCtlu=6, nCtlv=6)
+            surface.recompute(nIter=nIter)
+            D = surface.getValue(surface.U, surface.V) - X
+            self.assertAlmostEqual(surface.rms,
+                                   numpy.sqrt(numpy.sum(D**2)/n**2), 14)
+            rms.append(surface.rms)
+        decrease = (rms[2] - rms[3])/rms[2]
+        for kwargs, nIter in [({'rmsTol': 0.5*(rms[2] + rms[3])}, 4),
+                              ({'rmsTol': 1.0}, 1),
+                              ({'stallTol': 1.01*decrease}, 4)]:
+            surface = pySpline.Surface(X=X, ku=4, kv=4, nCtlu=6, nCtlv=6)
+            surface.recompute(nIter=10, **kwargs)
+            ref = pySpline.Surface(X=X, ku=4, kv=4, nCtlu=6, nCtlv=6)
+            ref.recompute(nIter=nIter)
+            numpy.testing.assert_allclose(surface.U, ref.U, atol=1e-14)
+            self.assertAlmostEqual(surface.rms, rms[nIter-1], 14)
+
+    def test_streaming_fit(self):
+        # Fitting in chunks must match a dense least squares solve
+        # with all the points at once
+        rand = numpy.random.RandomState(0)
+        u = rand.random_sample(2000)
+        v = rand.random_sample(2000)
+        X = numpy.vstack([u, v, numpy.cos(3*u)*numpy.sin(2*v)]).T
+        fit = pySpline.StreamingFit([4, 3], [8, 6])
+        fit.add([u, v], X, chunkSize=300)
+        surface = fit.solve()
+        N = surface.getBasisMatrix(u, v).N.toarray()
+        coef = numpy.linalg.lstsq(N, X, rcond=None)[0]
+        numpy.testing.assert_allclose(surface.coef.reshape((-1, 3)), coef,
+                                      atol=1e-10)
+        rms = numpy.sqrt(numpy.sum((N.dot(coef) - X)**2)/len(u))
+        numpy.testing.assert_allclose(fit.rms, rms, rtol=1e-8)
+        numpy.testing.assert_allclose(
+            fit.computeRMS([u, v], X, chunkSize=300), rms, rtol=1e-12)
+
+    def test_scattered_fit(self):
+        # A cubic surface is reproduced exactly by a scattered fit,
+        # and with smoothing a hole in the data can be filled
+        rand = numpy.random.RandomState(0)
+        u = rand.random_sample(3000)
+        v = rand.random_sample(3000)
+        X = numpy.vstack([u, v, u**3 - 2*u*v**2]).T
+        surface = pySpline.fitSurface(u, v, X, 4, 4, 8, 8, chunkSize=700)
+        self.assertLess(surface.rms, 1e-13)
+        numpy.testing.assert_allclose(surface(0.5, 0.5), [0.5, 0.5, -0.125],
+                                      atol=1e-10)
+
+        mask = (abs(u - 0.5) > 0.2) | (abs(v - 0.5) > 0.2)
+        surface = pySpline.fitSurface(u[mask], v[mask], X[mask], 4, 4, 12,
+                                      12, smoothing=1e-3)
+        numpy.testing.assert_allclose(surface(0.5, 0.5), [0.5, 0.5, -0.125],
+                                      atol=1e-2)
+
+    def test_refit(self):
+        # refitAdjoint() must be the transpose of refit() for both the
+        # separable and the general fit
+        rand = numpy.random.RandomState(0)
+        u = numpy.linspace(0,1,10)
+        v = numpy.linspace(0,1,8)
+        [V,U] = numpy.meshgrid(v,u)
+        X = numpy.dstack([U, V, U*V**2])
+        dX = rand.random_sample(X.shape)
+        for kwargs in [{'u':u, 'v':v}, {}]:
+            surface = pySpline.Surface(X=X, ku=4, kv=4, nCtlu=6, nCtlv=5,
+                                       **kwargs)
+            coef0 = surface.coef.copy()
+            surface.refit(X + dX)
+            coefBar = rand.random_sample(coef0.shape)
+            numpy.testing.assert_allclose(
+                numpy.sum(coefBar*(surface.coef - coef0)),
+                numpy.sum(surface.refitAdjoint(coefBar)*dX), rtol=1e-10)
+
+            # Changing the knots must drop the factorization
+            surface.refine('u', [0.31])
+            self.assertRaises(pySpline.Error, surface.refit, X)
+            surface.recompute()
+            surface.insertKnot('v', 0.4, 1)
+            self.assertRaises(pySpline.Error, surface.refit, X)
+
+    def test_adaptive_fit(self):
+        # The data only varies quickly in u, so the adaptive fit should
+        # refine u and leave v coarse
+        u = numpy.linspace(0,1,50)
+        v = numpy.linspace(0,1,20)
+        [V,U] = numpy.meshgrid(v,u)
+        X = numpy.dstack([U, V, numpy.tanh(10*(U-0.5))*(1+0.5*V)])
+        surface = pySpline.Surface(X=X, ku=4, kv=4, u=u, v=v, nCtlu=6,
+                                   nCtlv=6)
+        maxError = surface.adaptiveFit(1e-3)
+        self.assertLessEqual(maxError, 1e-3)
+        self.assertEqual(surface.nCtlv, 4)
+        self.assertGreater(surface.nCtlu, 6)
+
+    def test_remove_knots(self):
+        # An interpolated surface is reduced to within the tolerance
+        u = numpy.linspace(0,1,30)
+        [V,U] = numpy.meshgrid(u,u)
+        X = numpy.dstack([U, V, numpy.sin(3*U)*numpy.cos(2*V)])
+        surface = pySpline.Surface(X=X, ku=4, kv=4, u=u, v=u)
+        s = numpy.linspace(0,1,101)
+        values = surface.getValue(s, s, grid=True)
+        maxError, ratio = surface.removeKnots(1e-4)
+        self.assertLessEqual(maxError, 1e-4)
+        self.assertAlmostEqual(ratio, 900.0/(surface.nCtlu*surface.nCtlv))
+        self.assertGreater(ratio, 4)
+        err = numpy.linalg.norm(surface.getValue(s, s, grid=True) - values,
+                                axis=-1)
+        self.assertLess(numpy.max(err), 1.1e-4)
+        self.assertRaises(pySpline.Error, surface.refit, X)
+
+    def test_order_kernels(self):
+        # The k=2 and k=4 evaluation kernels must match the generic
+        # kernel and a tensor product of scipy b-spline bases
+        rand = numpy.random.RandomState(0)
+        u, v = rand.random_sample((2, 20))
+        u[0], v[1], u[2], v[3] = 1.0, 0.0, 0.3, 0.4
+        for k, t in [(2, [0,0,0.4,1,1]), (4, [0,0,0,0,0.3,0.3,1,1,1,1])]:
+            nCtl = len(t) - k
+            surface = pySpline.Surface(ku=k, kv=k, tu=t, tv=t,
+                                       coef=rand.random_sample((nCtl,)*2+(3,)))
+            values = surface(u, v)
+            ref = numpy.einsum('ai,aj,ijd->ad', basis_matrix(t, k, u),
+                               basis_matrix(t, k, v), surface.coef)
+            numpy.testing.assert_allclose(values, ref, atol=1e-14)
+            generic = pySpline.libspline.eval_surface_generic(
+                u.reshape((-1, 1)), v.reshape((-1, 1)), surface.tu,
+                surface.tv, k, k, surface.coef.T)
+            numpy.testing.assert_allclose(values, generic[:, :, 0].T,
+                                          atol=1e-14)
+
+    def test_power_basis(self):
+        # The power basis evaluation must match the standard evaluation,
+        # including outside the parametric range and after the
+        # coefficients and knots are modified
+        rand = numpy.random.RandomState(0)
+        tu = [0,0,0,0,0.3,0.3,0.6,1,1,1,1]
+        tv = [0,0,0,0.5,1,1,1]
+        surface = pySpline.Surface(ku=4, kv=3, tu=tu, tv=tv,
+                                   coef=rand.random_sample((7,4,3)))
+        u, v = rand.random_sample((2, 6, 5))
+        u[0, 0], v[0, 0] = 1.0, 0.5
+        u[1, 0], v[2, 0] = -0.1, 1.1
+        expected = surface(u, v)
+        surface.setPowerBasis()
+        numpy.testing.assert_allclose(surface(u, v), expected, atol=1e-13)
+        numpy.testing.assert_allclose(surface(u[1, 0], v[1, 0]),
+                                      expected[1, 0], atol=1e-13)
+
+        surface.coef[3, 1] += 1.0
+        surface.coef = surface.coef
+        surface.refine('v', [0.25])
+        values = surface(u, v)
+        surface.setPowerBasis(False)
+        numpy.testing.assert_allclose(values, surface(u, v), atol=1e-13)
+
     def regression_test(self, handler, solve=False):
         
         # Create a generic surface
@@ -9,6 +9,7 @@ import os
 # =============================================================================
 import numpy
 import unittest
+from scipy.interpolate import BSpline
 
 # =============================================================================
 # Extension modules
@@ -17,6 +18,13 @@ from pyspline import pySpline
 from baseclasses import BaseRegTest
 
 
+def basis_matrix(t, k, x):
+    '''Reference b-spline basis matrix from scipy for checking the
+    libspline kernels'''
+    nCtl = len(t) - k
+    return BSpline(numpy.array(t, 'd'), numpy.eye(nCtl), k-1)(x)
+
+
 def run_volume_test(volume, handler):
     ''' This function is used to test the functions that are apart of
     the curve class. They operate on the 'curve' that is passed. '''
@@ -108,6 +116,236 @@ class Test(unittest.TestCase):
     
 
 
+    def test_separable_fit(self):
+        # With u, v and w given the data is on a tensor grid and the
+        # fit is done direction by direction. Check it against the
+        # interpolation condition and a dense least squares solve.
+        u = numpy.linspace(0,1,7)
+        v = numpy.linspace(0,1,6)**1.5
+        w = numpy.linspace(0,1,8)
+        U, V, W = numpy.meshgrid(u, v, w, indexing='ij')
+        X = numpy.zeros(U.shape + (3,))
+        X[..., 0] = U + 0.1*numpy.sin(3*V)
+        X[..., 1] = V*(1 + W)
+        X[..., 2] = W + U*V
+        volume = pySpline.Volume(X=X, ku=4, kv=3, kw=4, u=u, v=v, w=w)
+        numpy.testing.assert_allclose(volume(U, V, W), X, atol=1e-12)
+
+        volume = pySpline.Volume(X=X, ku=4, kv=3, kw=4, u=u, v=v, w=w,
+                                 nCtlu=5, nCtlv=4, nCtlw=6)
+        N = volume.getBasisMatrix(U, V, W).N.toarray()
+        coef = numpy.linalg.lstsq(N, X.reshape((-1, 3)), rcond=None)[0]
+        numpy.testing.assert_allclose(volume.coef.reshape((-1, 3)), coef,
+                                      atol=1e-12)
+
+        # Refining the fitted volume must drop the factorization
+        volume.refine('w', [0.5])
+        self.assertRaises(pySpline.Error, volume.refit, X)
+
+    def test_project(self):
+        # Points inside the volume must be projected back to the
+        # parameters they were evaluated at. The closest point to
+        # points outside is checked against the minimum over a dense
+        # sampling, polished with the single point Newton search.
+        rand = numpy.random.RandomState(0)
+        u = numpy.linspace(0,1,6)
+        U, V, W = numpy.meshgrid(u, u, u, indexing='ij')
+        X = numpy.zeros(U.shape + (3,))
+        X[..., 0] = U + 0.1*numpy.sin(3*V)
+        X[..., 1] = V*(1 + 0.5*W)
+        X[..., 2] = W + 0.2*U*V
+        volume = pySpline.Volume(X=X, ku=4, kv=4, kw=4, u=u, v=u, w=u)
+
+        param = rand.random_sample((10, 3))
+        pts = volume(param[:, 0], param[:, 1], param[:, 2])
+        ui, vi, wi, D = volume.projectPoint(pts, eps=1e-12)
+        numpy.testing.assert_allclose(numpy.vstack([ui, vi, wi]).T, param,
+                                      atol=1e-8)
+        numpy.testing.assert_allclose(D, 0.0, atol=1e-10)
+
+        pts = numpy.array([[-0.2,0.5,0.5],[0.5,1.8,0.3],[1.3,1.2,1.4],
+                           [0.5,-0.3,-0.2]])
+        ui, vi, wi, D = volume.projectPoint(pts, eps=1e-12)
+        s = numpy.linspace(0,1,41)
+        Xs = volume.getValue(s, s, s, grid=True)
+        for i in range(len(pts)):
+            dist = numpy.linalg.norm(Xs - pts[i], axis=-1)
+            j = numpy.unravel_index(numpy.argmin(dist), dist.shape)
+            self.assertLessEqual(numpy.linalg.norm(D[i]), dist[j])
+            ref = pySpline.libspline.point_volume(
+                pts[i], volume.tu, volume.tv, volume.tw, volume.ku,
+                volume.kv, volume.kw, volume.coef.T, 25, 1e-12, s[j[0]],
+                s[j[1]], s[j[2]])
+            numpy.testing.assert_allclose([ui[i], vi[i], wi[i]], ref[:3],
+                                          atol=1e-8)
+            numpy.testing.assert_allclose(D[i], ref[3], atol=1e-8)
+
+    def test_deriv(self):
+        # The vectorized derivatives must match the scalar b3val based
+        # routines at every point and keep the shape of u
+        rand = numpy.random.RandomState(0)
+        tu = [0,0,0,0,0.3,0.6,1,1,1,1]
+        tv = [0,0,0,0.5,1,1,1]
+        volume = pySpline.Volume(ku=4, kv=3, kw=4, tu=tu, tv=tv, tw=tu,
+                                 coef=rand.random_sample((6,4,6,3)))
+        u, v, w = rand.random_sample((3, 4, 5))
+        u[0, 0], v[1, 0], w[2, 0] = 1.0, 0.0, 0.5
+        deriv = volume.getDerivative(u, v, w)
+        deriv2 = volume.getSecondDerivative(u, v, w)
+        self.assertEqual(deriv.shape, (4, 5, 3, 3))
+        self.assertEqual(deriv2.shape, (4, 5, 3, 3, 3))
+        args = (volume.tu, volume.tv, volume.tw, volume.ku, volume.kv,
+                volume.kw, volume.coef.T)
+        for i in range(4):
+            for j in range(5):
+                ref = pySpline.libspline.eval_volume_deriv(
+                    u[i, j], v[i, j], w[i, j], *args)
+                numpy.testing.assert_allclose(deriv[i, j], ref.T, atol=1e-12)
+                ref = pySpline.libspline.eval_volume_deriv2(
+                    u[i, j], v[i, j], w[i, j], *args)
+                numpy.testing.assert_allclose(deriv2[i, j], ref.T,
+                                              atol=1e-11)
+
+        numpy.testing.assert_allclose(
+            volume.getDerivative(u[0, 1], v[0, 1], w[0, 1]), deriv[0, 1])
+        numpy.testing.assert_allclose(
+            volume.getSecondDerivative(u[0, 1], v[0, 1], w[0, 1]),
+            deriv2[0, 1])
+
+    def test_evaluate(self):
+        # The fused evaluation must match the separate calls
+        rand = numpy.random.RandomState(0)
+        tu = [0,0,0,0,0.3,0.6,1,1,1,1]
+        tv = [0,0,0,0.5,1,1,1]
+        volume = pySpline.Volume(ku=4, kv=3, kw=2, tu=tu, tv=tv,
+                                 tw=[0,0,0.4,1,1],
+                                 coef=rand.random_sample((6,4,3,3)))
+        u, v, w = rand.random_sample((3, 4, 5))
+        u[0, 0], v[1, 0], w[2, 0] = 1.0, 0.0, 0.4
+        val, deriv, deriv2 = volume.evaluate(u, v, w)
+        numpy.testing.assert_allclose(val, volume(u, v, w), atol=1e-14)
+        numpy.testing.assert_allclose(deriv, volume.getDerivative(u, v, w),
+                                      atol=1e-13)
+        numpy.testing.assert_allclose(
+            deriv2, volume.getSecondDerivative(u, v, w), atol=1e-12)
+        val, deriv = volume.evaluate(u[0, 1], v[0, 1], w[0, 1], order=1)
+        numpy.testing.assert_allclose(val, volume(u[0, 1], v[0, 1], w[0, 1]),
+                                      atol=1e-14)
+        self.assertEqual(deriv.shape, (3, 3))
+        self.assertRaises(pySpline.Error, volume.evaluate, u, v, w, order=3)
+
+    def test_grid(self):
+        # Grid evaluation must match evaluating on the full meshgrid
+        rand = numpy.random.RandomState(0)
+        tu = [0,0,0,0,0.3,0.6,1,1,1,1]
+        tv = [0,0,0,0.5,1,1,1]
+        volume = pySpline.Volume(ku=4, kv=3, kw=2, tu=tu, tv=tv,
+                                 tw=[0,0,0.4,1,1],
+                                 coef=rand.random_sample((6,4,3,3)))
+        u = numpy.linspace(0,1,7)
+        v = numpy.linspace(0,1,5)
+        w = rand.random_sample(4)
+        U, V, W = numpy.meshgrid(u, v, w, indexing='ij')
+        values = volume.getValue(u, v, w, grid=True)
+        self.assertEqual(values.shape, (7, 5, 4, 3))
+        numpy.testing.assert_allclose(values, volume(U, V, W), atol=1e-14)
+
+    def test_refine(self):
+        # Refining must not change the volume, and must give the same
+        # knots and coefficients as inserting the knots one at a time
+        rand = numpy.random.RandomState(0)
+        tu = [0,0,0,0.5,1,1,1]
+        tw = [0,0,0,0,0.3,1,1,1,1]
+        coef = rand.random_sample((4,4,5,3))
+        volume = pySpline.Volume(ku=3, kv=3, kw=4, tu=tu, tv=tu, tw=tw,
+                                 coef=coef)
+        volume2 = pySpline.Volume(ku=3, kv=3, kw=4, tu=tu, tv=tu, tw=tw,
+                                  coef=coef)
+        pts = rand.random_sample((20, 3))
+        values = volume(pts[:, 0], pts[:, 1], pts[:, 2])
+        knots = [0.2, 0.5, 0.5, 0.7]
+        for direction in ['u', 'v', 'w']:
+            volume.refine(direction, knots)
+            for knot in knots:
+                volume2.insertKnot(direction, knot, 1)
+        self.assertEqual(volume.coef.shape, (7, 7, 9, 3))
+        numpy.testing.assert_allclose(volume.tw, volume2.tw)
+        numpy.testing.assert_allclose(volume.coef, volume2.coef, atol=1e-14)
+        numpy.testing.assert_allclose(
+            volume(pts[:, 0], pts[:, 1], pts[:, 2]), values, atol=1e-14)
+
+    def test_window(self):
+        # The windowed and split volumes must match the original volume
+        # at the mapped parameters, and the original must not change
+        rand = numpy.random.RandomState(0)
+        tu = [0,0,0,0,0.3,0.6,1,1,1,1]
+        tv = [0,0,0,0.5,1,1,1]
+        coef = rand.random_sample((6,4,6,3))
+        volume = pySpline.Volume(ku=4, kv=3, kw=4, tu=tu, tv=tv, tw=tu,
+                                 coef=coef)
+        pts = rand.random_sample((20, 3))
+        low = numpy.array([0.1, 0.3, 0.25])
+        high = numpy.array([0.8, 0.65, 1.0])
+        window = volume.windowVolume(low, high)
+        mapped = low + pts*(high - low)
+        numpy.testing.assert_allclose(
+            window(pts[:, 0], pts[:, 1], pts[:, 2]),
+            volume(mapped[:, 0], mapped[:, 1], mapped[:, 2]), atol=1e-14)
+
+        vol1, vol2 = volume.splitVolume('w', 0.4)
+        numpy.testing.assert_allclose(
+            vol1(pts[:, 0], pts[:, 1], pts[:, 2]),
+            volume(pts[:, 0], pts[:, 1], 0.4*pts[:, 2]), atol=1e-14)
+        numpy.testing.assert_allclose(
+            vol2(pts[:, 0], pts[:, 1], pts[:, 2]),
+            volume(pts[:, 0], pts[:, 1], 0.4 + 0.6*pts[:, 2]), atol=1e-14)
+        numpy.testing.assert_allclose(volume.coef, coef)
+
+    def test_power_basis(self):
+        # The power basis evaluation must match the standard evaluation,
+        # including outside the parametric range and after the
+        # coefficients and knots are modified
+        rand = numpy.random.RandomState(0)
+        tu = [0,0,0,0,0.3,0.3,0.6,1,1,1,1]
+        tv = [0,0,0.5,1,1]
+        volume = pySpline.Volume(ku=4, kv=2, kw=4, tu=tu, tv=tv, tw=tu,
+                                 coef=rand.random_sample((7,3,7,3)))
+        u, v, w = rand.random_sample((3, 4, 5))
+        u[0, 0], v[0, 0], w[0, 0] = 1.0, 0.5, 0.3
+        u[1, 0], w[2, 0] = -0.1, 1.1
+        expected = volume(u, v, w)
+        volume.setPowerBasis()
+        numpy.testing.assert_allclose(volume(u, v, w), expected, atol=1e-13)
+
+        volume.coef[3, 1, 2] += 1.0
+        volume.coef = volume.coef
+        volume.refine('w', [0.45])
+        values = volume(u, v, w)
+        volume.setPowerBasis(False)
+        numpy.testing.assert_allclose(values, volume(u, v, w), atol=1e-13)
+
+    def test_order_kernels(self):
+        # The k=2 and k=4 evaluation kernels must match the generic
+        # kernel and a tensor product of scipy b-spline bases
+        rand = numpy.random.RandomState(0)
+        u, v, w = rand.random_sample((3, 20))
+        u[0], v[1], w[2], u[3] = 1.0, 0.0, 0.3, 0.4
+        for k, t in [(2, [0,0,0.4,1,1]), (4, [0,0,0,0,0.3,0.3,1,1,1,1])]:
+            nCtl = len(t) - k
+            volume = pySpline.Volume(ku=k, kv=k, kw=k, tu=t, tv=t, tw=t,
+                                     coef=rand.random_sample((nCtl,)*3+(3,)))
+            values = volume(u, v, w)
+            ref = numpy.einsum('ai,aj,ak,ijkd->ad', basis_matrix(t, k, u),
+                               basis_matrix(t, k, v), basis_matrix(t, k, w),
+                               volume.coef)
+            numpy.testing.assert_allclose(values, ref, atol=1e-14)
+            generic = pySpline.libspline.eval_volume_generic(
+                u.reshape((-1, 1, 1)), v.reshape((-1, 1, 1)),
+                w.reshape((-1, 1, 1)), volume.tu, volume.tv, volume.tw,
+                k, k, k, volume.coef.T)
+            numpy.testing.assert_allclose(values, generic[:, :, 0, 0].T,
+                                          atol=1e-14)
+
     def regression_test(self, handler, solve=False):
         
         # Define raw data for a volume: